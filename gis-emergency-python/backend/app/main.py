@@ -3,29 +3,51 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, url_for, stream_with_context
 from flask_cors import CORS
 from datetime import datetime,timedelta
 import random
-from sqlalchemy import text, func
+import json
+import math
+import numpy as np
+from sqlalchemy import text, func, insert, cast, tuple_, Float, Integer
+from sqlalchemy.orm import defer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from geoalchemy2.elements import WKTElement
 
 # Import config
 from app.utils.config import Config
+from app.utils.downsample import downsample_indices
+from app.utils.http_cache import etag_cached
+from app.utils.pagination import (
+    parse_limit, parse_bbox, parse_fields, project, project_feature, encode_cursor, decode_cursor
+)
 
 # Import database and models - use absolute imports
 from app.models.database import db, init_db
 from app.models.incidents import Incident
 from app.models.resource import Resource, ResourceAllocation
 from app.models.user import CallerHistory
-from app.models.crowd import CrowdLocation, CrowdData
+from app.models.crowd import CrowdLocation, CrowdData, CrowdRollupMinute, CrowdRollupHour, ensure_crowd_data_partitions
+from app.models.analytics import IncidentCounter
+from app.models.versioning import current_version, changed_since, table_versions
 
 # Import services
 from app.services.heatmap_service import HeatmapService
+from app.services.heatmap_pyramid import HeatmapPyramid
 from app.services.priority_predictor import PriorityPredictor
 from app.services.crowd_detection import CrowdDetector, CrowdMonitor
+from app.services.frame_cache import FrameCache
+from app.services.frame_upload import FrameUploads, FrameTooLarge, UploadsBusy
+from app.services.detection_pool import DetectionPool
+from app.services.counting_models import create_counting_model
+from app.services.crowd_registry import CrowdLocationRegistry
 from app.services.weather_service import WeatherService
 from app.services.flood_service import FloodPredictor
 from app.services.earthquake_service import EarthquakeService
+from app.services.incident_index import IncidentIndex
+from app.services.event_hub import EventHub
+from app.services.vector_tiles import TileCache, TILE_LAYERS, MAX_TILE_ZOOM, tile_query
 
 
 def create_app():
@@ -34,7 +56,7 @@ def create_app():
     app.config.from_object(Config)
 
     # Initialize extensions
-    CORS(app)
+    CORS(app, expose_headers=['X-Next-Cursor', 'Link', 'ETag'])
 
     # Initialize database
     init_db(app)
@@ -49,13 +71,103 @@ def register_routes(app):
     """Register all routes with the app"""
 
     # Initialize services
+    counting_backend = app.config['COUNTING_BACKEND']
+    counting_options = None
+    if counting_backend != 'heuristic':
+        counting_options = {'backend': counting_backend, 'path': app.config['COUNTING_MODEL_PATH']}
+    detection_processes = app.config['CROWD_DETECT_PROCESSES']
+    worker_counting_options = None
+    if counting_options:
+        # Worker processes split the cores between them
+        worker_threads = app.config['COUNTING_THREADS'] or max(1, (os.cpu_count() or 1) // max(1, detection_processes))
+        worker_counting_options = dict(counting_options, intra_op_threads=worker_threads)
+    detection_pool = DetectionPool(
+        processes=detection_processes,
+        density_resolution=app.config['DENSITY_MAP_RESOLUTION'],
+        counting_options=worker_counting_options
+    )
+    if detection_processes:
+        with app.app_context():
+            engine = db.engine
+        # Workers never touch the database. A forked process forgets the pooled
+        # connections it inherits instead of sharing (or closing) their sockets
+        os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+        try:
+            # Before any background thread (the counting model's included) is
+            # running, and without the connections create_all() left in the pool
+            engine.dispose()
+            detection_pool.start()
+        except Exception as e:
+            print(f"Could not start crowd detection workers: {e}")
+
+    event_hub = EventHub(
+        history_size=app.config['STREAM_HISTORY_SIZE'],
+        client_buffer=app.config['STREAM_CLIENT_BUFFER'],
+        heartbeat_seconds=app.config['STREAM_HEARTBEAT_SECONDS']
+    )
     heatmap_service = HeatmapService()
+    heatmap_pyramid = HeatmapPyramid(
+        min_zoom=app.config['HEATMAP_PYRAMID_MIN_ZOOM'],
+        max_zoom=app.config['HEATMAP_PYRAMID_MAX_ZOOM'],
+        tile_size=app.config['HEATMAP_PYRAMID_TILE_SIZE']
+    )
     priority_predictor = PriorityPredictor()
-    crowd_detector = CrowdDetector()
-    crowd_monitor = CrowdMonitor()
+    frame_cache = FrameCache(
+        max_entries=app.config['FRAME_CACHE_SIZE'],
+        max_distance=app.config['FRAME_CACHE_MAX_DISTANCE']
+    ) if app.config['FRAME_CACHE_SIZE'] > 0 else None
+    counting_model = None
+    if counting_options:
+        try:
+            counting_model = create_counting_model(
+                **counting_options, intra_op_threads=app.config['COUNTING_THREADS'] or None
+            )
+            print(f"Crowd counting model loaded: {counting_model.info()}")
+        except Exception as e:
+            print(f"Could not load counting model, using the brightness heuristic: {e}")
+    crowd_detector = CrowdDetector(
+        frame_cache=frame_cache,
+        density_resolution=app.config['DENSITY_MAP_RESOLUTION'],
+        counting_model=counting_model,
+        max_batch_size=app.config['COUNTING_MAX_BATCH'],
+        max_wait_ms=app.config['COUNTING_MAX_WAIT_MS'],
+        counting_timeout=app.config['COUNTING_TIMEOUT_SECONDS']
+    )
+    # Without worker processes, batches are analysed in the request thread
+    detection_pool.detector = crowd_detector
+    crowd_locations = CrowdLocationRegistry(app)
+    # Shares crowd_detector, so camera polls and uploads are batched together
+    crowd_monitor = CrowdMonitor(
+        event_hub=event_hub,
+        registry=crowd_locations,
+        poll_workers=app.config['CAMERA_POLL_WORKERS'],
+        poll_timeout=app.config['CAMERA_POLL_TIMEOUT_SECONDS'],
+        detector=crowd_detector,
+        heatmap_pyramid=heatmap_pyramid
+    )
     weather_service = WeatherService()
     flood_predictor = FloodPredictor()
     earthquake_service = EarthquakeService()
+    incident_index = IncidentIndex(
+        cell_size_m=app.config['DUPLICATE_RADIUS_METERS'],
+        window_minutes=app.config['DUPLICATE_WINDOW_MINUTES']
+    )
+    tile_cache = TileCache(
+        max_tiles=app.config['TILE_CACHE_SIZE'],
+        directory=app.config['TILE_CACHE_DIR'],
+        check_seconds=app.config['TILE_CACHE_CHECK_SECONDS']
+    )
+    frame_uploads = FrameUploads(
+        max_bytes=app.config['CROWD_FRAME_MAX_BYTES'],
+        max_concurrent=app.config['CROWD_DETECT_MAX_CONCURRENT'],
+        wait_seconds=app.config['CROWD_DETECT_WAIT_SECONDS']
+    )
+
+    # Table behind each vector tile layer, for the tile cache's change checks
+    TILE_LAYER_MODELS = {'incidents': Incident, 'resources': Resource, 'crowd_locations': CrowdLocation}
+
+    # Layers kept in the heatmap pyramid
+    HEATMAP_LAYERS = ('incidents', 'crowd')
 
     # Incident type priority
     INCIDENT_TYPE_SCORES = {
@@ -65,6 +177,14 @@ def register_routes(app):
         'building_collapse': 9, 'riot': 8, 'gas_leak': 7
     }
 
+    # Caller credibility scores
+    CALLER_CREDIBILITY_SCORES = {
+        'emergency_services': 9,
+        'verified': 8,
+        'first_time': 5,
+        'anonymous': 3
+    }
+
     # Location risk scores
     LOCATION_RISK_SCORES = {
         'school': 9, 'hospital': 9, 'mall': 8,
@@ -116,24 +236,66 @@ def register_routes(app):
         })
 
     @app.route('/api/incidents', methods=['GET'])
+    @etag_cached(lambda: table_versions(Incident))
     def get_incidents():
-        """Get all incidents from database"""
+        """Get incidents from database, newest first, one keyset page at a time"""
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            bbox = parse_bbox(request.args.get('bbox'))
+            fields = parse_fields(request.args.get('fields'))
+            cursor = request.args.get('cursor')
+            if cursor:
+                last_reported_at, last_id = decode_cursor(cursor)
+                last_reported_at = datetime.fromisoformat(last_reported_at)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+
         try:
-            incidents = Incident.query.order_by(Incident.reported_at.desc()).all()
-            return jsonify([inc.to_dict() for inc in incidents])
+            query = Incident.query
+            if bbox:
+                query = query.filter(Incident.within_bbox(bbox))
+            if cursor:
+                query = query.filter(
+                    tuple_(Incident.reported_at, Incident.id) < tuple_(last_reported_at, last_id)
+                )
+            query = query.order_by(Incident.reported_at.desc(), Incident.id.desc()).limit(limit + 1)
+
+            incidents = Incident.with_coordinates(query)
+            return page_response(
+                incidents, limit,
+                lambda inc: (inc.reported_at, inc.id),
+                lambda inc: project(inc.to_dict(), fields)
+            )
         except Exception as e:
             return jsonify({'error': str(e), 'message': 'Database error'}), 500
 
     @app.route('/api/incidents/active', methods=['GET'])
+    @etag_cached(lambda: table_versions(Incident))
     def get_active_incidents():
-        """Get active incidents in GeoJSON format"""
+        """Get active incidents in GeoJSON format (only changes when ?since=<version> is given)"""
         try:
-            incidents = Incident.query.filter_by(status='active').all()
+            bbox = parse_bbox(request.args.get('bbox'))
+            fields = parse_fields(request.args.get('fields'))
+            since = parse_since(request.args.get('since'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-            return jsonify({
-                'type': 'FeatureCollection',
-                'features': [inc.to_geojson() for inc in incidents]
-            })
+        try:
+            version = current_version()
+            since = resumable_since(since, version)
+            if since is None:
+                query = Incident.query.filter_by(status='active')
+            else:
+                query = Incident.query.filter(changed_since(Incident.version, since))
+            if bbox:
+                query = query.filter(Incident.within_bbox(bbox))
+            incidents = Incident.with_coordinates(query)
+
+            return jsonify(feature_collection(
+                [project_feature(inc.to_geojson(), fields) for inc in incidents if inc.status == 'active'],
+                version, since,
+                removed=[inc.id for inc in incidents if inc.status != 'active']
+            ))
         except Exception:
             # Return mock data if database not available
             return jsonify({
@@ -171,37 +333,26 @@ def register_routes(app):
 
         if not data:
             return jsonify({'error': 'No data provided'}), 400
-
         try:
-            incident_type = data.get('type', 'unknown')
+            report = parse_report(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-            location = data.get('location', [77.2090, 28.6139])
-            if isinstance(location, list) and len(location) >= 2:
-                lng, lat = location[0], location[1]
-            else:
-                lng, lat = 77.2090, 28.6139
-
-            caller_id = data.get('caller_id', f"caller_{random.randint(1000, 9999)}")
-            caller_type = data.get('caller_type', 'first_time')
-            description = data.get('description', '')
-            location_type = data.get('location_type', 'residential')
-            address = data.get('address', 'Unknown location')
-            severity_input = data.get('severity', 3)
+        try:
+            incident_type = report['incident_type']
+            lng, lat = report['lng'], report['lat']
+            caller_id = report['caller_id']
+            caller_type = report['caller_type']
+            description = report['description']
+            location_type = report['location_type']
+            address = report['address']
+            severity_input = report['severity']
 
             current_hour = datetime.now().hour
             wkt = f'POINT({lng} {lat})'
 
-            call_count = 1
-            try:
-                call_count = Incident.query.filter(
-                    db.func.ST_DWithin(
-                        Incident.location,
-                        func.ST_GeomFromText(wkt, 4326),
-                        1000
-                    )
-                ).count() + 1
-            except Exception:
-                pass
+            duplicates = incident_index.nearby(lat, lng, app.config['DUPLICATE_RADIUS_METERS'])
+            call_count = len(duplicates) + 1
 
             severity_score = calculate_severity_score(
                 incident_type, call_count, location_type, current_hour,
@@ -212,11 +363,14 @@ def register_routes(app):
                 caller_id, caller_type, [lng, lat], incident_type, description, current_hour
             )
 
+            reported_at = datetime.utcnow()
+            severity = int(severity_score / 2) if severity_score else severity_input
             incident = Incident(
                 incident_type=incident_type,
-                severity=int(severity_score / 2) if severity_score else severity_input,
+                severity=severity,
                 severity_score=severity_score,
                 prank_confidence=prank_confidence,
+                location=WKTElement(wkt, srid=4326),
                 address=address,
                 description=description,
                 caller_id=caller_id,
@@ -224,30 +378,37 @@ def register_routes(app):
                 location_type=location_type,
                 call_count=call_count,
                 status='active',
-                affected_people=data.get('affected_people', 0)
+                affected_people=report['affected_people'],
+                reported_at=reported_at
             )
 
-            result = db.session.execute(
-                text("SELECT ST_GeomFromText(:wkt, 4326)"),
-                {'wkt': wkt}
-            ).scalar()
-            incident.location = result
-
             db.session.add(incident)
-            db.session.commit()
+            db.session.flush()
+            incident_id = incident.id
 
-            try:
-                update_caller_history(caller_id, caller_type, prank_confidence > 0.7)
-            except Exception:
-                pass
+            upsert_caller_histories([(caller_id, caller_type, prank_confidence > 0.7)])
+
+            with tile_cache.own_write('incidents'):
+                db.session.commit()
+
+            incident_index.insert(incident_id, lat, lng, reported_at)
+            publish_incident(incident_id, lng, lat, {
+                'incident_type': incident_type,
+                'severity': severity,
+                'severity_score': severity_score,
+                'address': address,
+                'reported_at': reported_at
+            })
 
             return jsonify({
                 'message': 'Incident reported successfully',
-                'incident_id': incident.id,
+                'incident_id': incident_id,
                 'severity_score': severity_score,
                 'prank_confidence': prank_confidence,
                 'verified': prank_confidence < 0.3,
-                'timestamp': incident.reported_at.isoformat()
+                'call_count': call_count,
+                'duplicate_of': duplicates,
+                'timestamp': reported_at.isoformat()
             }), 201
 
         except Exception as e:
@@ -262,25 +423,174 @@ def register_routes(app):
                 'timestamp': datetime.now().isoformat()
             }), 201
 
+    @app.route('/api/incidents/report/batch', methods=['POST'])
+    def report_incidents_batch():
+        """Report many incidents at once - scored together and saved with one bulk insert"""
+        reports = read_batch_reports()
+
+        if reports is None:
+            return jsonify({'error': 'Expected a JSON array or NDJSON stream of reports'}), 400
+        if not reports:
+            return jsonify({'error': 'No data provided'}), 400
+        if len(reports) > app.config['MAX_BATCH_REPORTS']:
+            return jsonify({
+                'error': f"Too many reports in one batch (max {app.config['MAX_BATCH_REPORTS']})"
+            }), 413
+
+        results = [None] * len(reports)
+        parsed = []
+        positions = []
+        for index, data in enumerate(reports):
+            if not isinstance(data, dict):
+                results[index] = {'index': index, 'error': 'Report must be a JSON object'}
+                continue
+            try:
+                parsed.append(parse_report(data))
+            except ValueError as e:
+                results[index] = {'index': index, 'error': str(e)}
+                continue
+            positions.append(index)
+
+        try:
+            if parsed:
+                current_hour = datetime.now().hour
+                lngs = [r['lng'] for r in parsed]
+                lats = [r['lat'] for r in parsed]
+                incident_types = [r['incident_type'] for r in parsed]
+                caller_types = [r['caller_type'] for r in parsed]
+
+                duplicates = find_batch_duplicates(lngs, lats)
+                call_counts = [len(dups) + 1 for dups in duplicates]
+
+                severity_scores = calculate_severity_scores(
+                    incident_types, call_counts, [r['location_type'] for r in parsed],
+                    current_hour, get_historical_risks(lats, lngs), caller_types
+                )
+                prank_confidences = calculate_prank_confidences(caller_types, current_hour)
+
+                reported_at = datetime.utcnow()
+                rows = []
+                for report, call_count, severity_score, prank_confidence in zip(
+                        parsed, call_counts, severity_scores, prank_confidences):
+                    rows.append({
+                        'incident_type': report['incident_type'],
+                        'severity': int(severity_score / 2) if severity_score else report['severity'],
+                        'severity_score': severity_score,
+                        'prank_confidence': prank_confidence,
+                        'location': WKTElement(f"POINT({report['lng']} {report['lat']})", srid=4326),
+                        'address': report['address'],
+                        'description': report['description'],
+                        'caller_id': report['caller_id'],
+                        'caller_type': report['caller_type'],
+                        'location_type': report['location_type'],
+                        'call_count': call_count,
+                        'status': 'active',
+                        'affected_people': report['affected_people'],
+                        'reported_at': reported_at
+                    })
+
+                incident_ids = db.session.scalars(
+                    insert(Incident).returning(Incident.id, sort_by_parameter_order=True),
+                    rows
+                ).all()
+
+                upsert_caller_histories([
+                    (report['caller_id'], report['caller_type'], prank_confidence > 0.7)
+                    for report, prank_confidence in zip(parsed, prank_confidences)
+                ])
+
+                with tile_cache.own_write('incidents'):
+                    db.session.commit()
+
+                for incident_id, lng, lat, row in zip(incident_ids, lngs, lats, rows):
+                    incident_index.insert(incident_id, lat, lng, reported_at)
+                    publish_incident(incident_id, lng, lat, row)
+
+                for index, incident_id, severity_score, prank_confidence, dups in zip(
+                        positions, incident_ids, severity_scores, prank_confidences, duplicates):
+                    results[index] = {
+                        'index': index,
+                        'incident_id': incident_id,
+                        'severity_score': severity_score,
+                        'prank_confidence': prank_confidence,
+                        'verified': prank_confidence < 0.3,
+                        'call_count': len(dups) + 1,
+                        'duplicate_of': [
+                            incident_ids[dup[1]] if isinstance(dup, tuple) else dup
+                            for dup in dups
+                        ],
+                        'timestamp': reported_at.isoformat()
+                    }
+
+            return jsonify({
+                'message': f'{len(parsed)} of {len(reports)} incidents reported successfully',
+                'received': len(reports),
+                'created': len(parsed),
+                'failed': len(reports) - len(parsed),
+                'results': results
+            }), 201
+
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'message': 'Error saving batch to database'}), 500
+
     @app.route('/api/resources', methods=['GET'])
+    @etag_cached(lambda: table_versions(Resource))
     def get_resources():
-        """Get all resources from database"""
+        """Get resources from database, one keyset page at a time"""
         try:
-            resources = Resource.query.all()
-            return jsonify([r.to_dict() for r in resources])
+            limit = parse_limit(request.args.get('limit'))
+            bbox = parse_bbox(request.args.get('bbox'))
+            fields = parse_fields(request.args.get('fields'))
+            cursor = request.args.get('cursor')
+            if cursor:
+                last_id, = decode_cursor(cursor)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        try:
+            query = Resource.query
+            if bbox:
+                query = query.filter(Resource.within_bbox(bbox))
+            if cursor:
+                query = query.filter(Resource.id > last_id)
+            resources = Resource.with_coordinates(query.order_by(Resource.id).limit(limit + 1))
+
+            return page_response(
+                resources, limit,
+                lambda r: (r.id,),
+                lambda r: project(r.to_dict(), fields)
+            )
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
     @app.route('/api/resources/available', methods=['GET'])
+    @etag_cached(lambda: table_versions(Resource))
     def get_available_resources():
-        """Get available resources in GeoJSON"""
+        """Get available resources in GeoJSON (only changes when ?since=<version> is given)"""
         try:
-            resources = Resource.query.filter_by(status='available').all()
+            bbox = parse_bbox(request.args.get('bbox'))
+            fields = parse_fields(request.args.get('fields'))
+            since = parse_since(request.args.get('since'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-            return jsonify({
-                'type': 'FeatureCollection',
-                'features': [r.to_geojson() for r in resources]
-            })
+        try:
+            version = current_version()
+            since = resumable_since(since, version)
+            if since is None:
+                query = Resource.query.filter_by(status='available')
+            else:
+                query = Resource.query.filter(changed_since(Resource.version, since))
+            if bbox:
+                query = query.filter(Resource.within_bbox(bbox))
+            resources = Resource.with_coordinates(query)
+
+            return jsonify(feature_collection(
+                [project_feature(r.to_geojson(), fields) for r in resources if r.status == 'available'],
+                version, since,
+                removed=[r.id for r in resources if r.status != 'available']
+            ))
         except Exception:
             return jsonify({
                 'type': 'FeatureCollection',
@@ -325,7 +635,7 @@ def register_routes(app):
             if resource_type:
                 query = query.filter(Resource.resource_type == resource_type)
 
-            resources = query.all()
+            resources = Resource.with_coordinates(query)
             return jsonify([r.to_dict() for r in resources])
 
         except Exception as e:
@@ -347,20 +657,35 @@ def register_routes(app):
                 return jsonify({'error': 'Incident or resource not found'}), 404
 
             resource.status = 'dispatched'
+            resource_coords = resource.get_coordinates()
 
+            assigned_at = datetime.now()
             allocation = ResourceAllocation(
                 incident_id=incident_id,
                 resource_id=resource_id,
-                assigned_at=datetime.now(),
+                assigned_at=assigned_at,
                 status='dispatched'
             )
 
             db.session.add(allocation)
-            db.session.commit()
+            db.session.flush()
+            dispatch_id = allocation.id
+            with tile_cache.own_write('resources'):
+                db.session.commit()
+
+            event_hub.publish('dispatch', {
+                'dispatch_id': dispatch_id,
+                'incident_id': incident_id,
+                'resource_id': resource_id,
+                'resource_status': 'dispatched',
+                'resource_lat': resource_coords['lat'],
+                'resource_lng': resource_coords['lng'],
+                'assigned_at': assigned_at.isoformat()
+            })
 
             return jsonify({
                 'message': 'Resource dispatched',
-                'dispatch_id': allocation.id,
+                'dispatch_id': dispatch_id,
                 'incident_id': incident_id,
                 'resource_id': resource_id,
                 'estimated_arrival': f'{random.randint(5, 15)} minutes'
@@ -377,10 +702,11 @@ def register_routes(app):
             })
 
     @app.route('/api/heatmap/generate', methods=['GET'])
+    @etag_cached(lambda: table_versions(Incident))
     def generate_heatmap():
         """Generate heatmap from database incidents"""
         try:
-            incidents = Incident.query.filter_by(status='active').all()
+            incidents = Incident.with_coordinates(Incident.query.filter_by(status='active'))
 
             heatmap_data = []
             for inc in incidents:
@@ -399,21 +725,119 @@ def register_routes(app):
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
-    @app.route('/api/analytics/summary', methods=['GET'])
-    def get_analytics_summary():
-        """Get summary statistics from database"""
+    @app.route('/api/heatmap/grid', methods=['GET'])
+    @etag_cached(lambda: table_versions(Incident))
+    def generate_heatmap_grid():
+        """
+        Active incidents aggregated server-side into a weighted grid for one
+        zoom level and bbox. The payload is bounded by the grid size
+        (at most 256 x 256 cells), not by the number of incidents.
+        """
         try:
-            total_incidents = Incident.query.count()
-            active_incidents = Incident.query.filter_by(status='active').count()
-            critical_incidents = Incident.query.filter(Incident.severity_score >= 8).count() if hasattr(Incident, 'severity_score') else 0
+            bbox = parse_bbox(request.args.get('bbox'))
+            if not bbox:
+                raise ValueError('bbox is required')
+            zoom = max(0, min(int(request.args.get('zoom', 12)), 22))
+            smooth = max(0.0, min(float(request.args.get('smooth', 0)), 5.0))
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        cell_lng, cell_lat, cols, rows = heatmap_service.grid_for_zoom(
+            bbox, zoom, app.config['HEATMAP_CELL_PIXELS']
+        )
 
-            total_resources = Resource.query.count()
-            available_resources = Resource.query.filter_by(status='available').count()
+        try:
+            col = cast(func.floor((func.ST_X(Incident.location) - bbox[0]) / cell_lng), Integer).label('cell_col')
+            row = cast(func.floor((func.ST_Y(Incident.location) - bbox[1]) / cell_lat), Integer).label('cell_row')
+            cells = db.session.query(
+                col,
+                row,
+                func.sum(func.coalesce(Incident.severity_score / 10.0, 0.5)),
+                func.count(Incident.id)
+            ).filter(
+                Incident.status == 'active',
+                Incident.within_bbox(bbox)
+            ).group_by(col.name, row.name).all()
+
+            col_idx, row_idx, weights, counts = zip(*cells) if cells else ((), (), (), ())
+            grid = heatmap_service.fill_grid(col_idx, row_idx, weights, cols, rows)
+            grid = heatmap_service.smooth_grid(grid, smooth)
+            heatmap_data = heatmap_service.grid_to_heatmap(grid, bbox, cell_lng, cell_lat)
 
+            return jsonify({
+                'type': 'heatmap_grid',
+                'data': heatmap_data,
+                'count': len(heatmap_data),
+                'incidents': sum(counts),
+                'zoom': zoom,
+                'bbox': bbox,
+                'cell_size': {'lng': cell_lng, 'lat': cell_lat},
+                'shape': [rows, cols],
+                'smooth': smooth
+            })
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/heatmap/tiles/<layer>/<int:z>/<int:x>/<int:y>', methods=['GET'])
+    def get_heatmap_tile(layer, z, x, y):
+        """
+        One precomputed heatmap tile straight from memory: tile_size x tile_size
+        row-major bytes, uint8 scaled to the zoom level's peak (default) or
+        little-endian float16 weights with ?format=float16. 204 when empty.
+        """
+        if layer not in HEATMAP_LAYERS:
+            return jsonify({'error': f'Unknown layer: {layer}'}), 404
+        dtype = request.args.get('format', 'uint8')
+        if dtype not in ('uint8', 'float16'):
+            return jsonify({'error': 'format must be uint8 or float16'}), 400
+
+        try:
+            raster = heatmap_pyramid.tile(layer, z, x, y, dtype)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if raster is None:
+            return Response(status=204)
+
+        response = Response(raster.tobytes(), mimetype='application/octet-stream')
+        response.headers['X-Tile-Size'] = str(heatmap_pyramid.tile_size)
+        response.headers['X-Tile-Format'] = dtype
+        response.headers['X-Heatmap-Peak'] = str(heatmap_pyramid.peak(layer, z))
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    @app.route('/api/heatmap/pyramid', methods=['GET'])
+    def get_heatmap_pyramid():
+        """Zoom range, tile size and per-layer tile counts of the heatmap pyramid"""
+        return jsonify(heatmap_pyramid.stats())
+
+    @app.route('/api/analytics/summary', methods=['GET'])
+    def get_analytics_summary():
+        """Get summary statistics from the trigger-maintained incident counters"""
+        try:
+            total_incidents = active_incidents = critical_incidents = 0
             incident_by_type = {}
-            for inc in Incident.query.all():
-                inc_type = inc.incident_type or 'unknown'
-                incident_by_type[inc_type] = incident_by_type.get(inc_type, 0) + 1
+            counters = db.session.query(
+                IncidentCounter.incident_type,
+                IncidentCounter.status,
+                IncidentCounter.is_critical,
+                IncidentCounter.count
+            ).filter(IncidentCounter.count != 0)
+            # A key's count is spread over slot rows; adding them all up sums it
+            for inc_type, status, is_critical, count in counters:
+                total_incidents += count
+                if status == 'active':
+                    active_incidents += count
+                if is_critical:
+                    critical_incidents += count
+                inc_type = inc_type or 'unknown'
+                incident_by_type[inc_type] = incident_by_type.get(inc_type, 0) + count
+
+            resources_by_status = dict(db.session.query(
+                Resource.status, func.count(Resource.id)
+            ).group_by(Resource.status).all())
+            total_resources = sum(resources_by_status.values())
+            available_resources = resources_by_status.get('available', 0)
 
             return jsonify({
                 'timestamp': datetime.now().isoformat(),
@@ -432,128 +856,414 @@ def register_routes(app):
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    # ==================== LIVE STREAM ====================
+
+    @app.route('/api/stream', methods=['GET'])
+    def live_stream():
+        """Server-Sent Events feed of new incidents, dispatches and crowd anomalies"""
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+        return Response(
+            stream_with_context(event_hub.stream(last_event_id)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    @app.route('/api/stream/stats', methods=['GET'])
+    def live_stream_stats():
+        """Connected stream clients and event counters"""
+        return jsonify(event_hub.stats())
+
+    # ==================== VECTOR TILES ====================
+
+    @app.route('/tiles/<layer>/<int:z>/<int:x>/<int:y>.mvt', methods=['GET'])
+    def get_vector_tile(layer, z, x, y):
+        """Mapbox Vector Tile of one layer, rendered by PostGIS and cached until a feature in it changes"""
+        if layer not in TILE_LAYERS:
+            return jsonify({'error': f'Unknown layer: {layer}'}), 404
+        if z > MAX_TILE_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            return jsonify({'error': 'Tile out of range'}), 404
+
+        try:
+            tile_cache.sync(lambda: dict(zip(TILE_LAYER_MODELS, table_versions(*TILE_LAYER_MODELS.values()))))
+        except Exception as e:
+            db.session.rollback()
+            print(f"Could not check tile layer versions: {e}")
+
+        tile = tile_cache.get(layer, z, x, y)
+        if tile is None:
+            try:
+                generation = tile_cache.generation
+                tile = db.session.execute(
+                    text(tile_query(layer)), {'z': z, 'x': x, 'y': y}
+                ).scalar()
+                tile = bytes(tile) if tile is not None else b''
+                tile_cache.put(layer, z, x, y, tile, generation)
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+
+        response = Response(tile, mimetype='application/vnd.mapbox-vector-tile')
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    @app.route('/tiles/stats', methods=['GET'])
+    def vector_tile_stats():
+        """Tile cache size and hit rate"""
+        return jsonify(tile_cache.stats())
+
     # ==================== CROWD DETECTION ENDPOINTS ====================
 
     @app.route('/api/crowd/locations', methods=['GET'])
     def get_crowd_locations():
         """Get all crowd monitoring locations"""
         try:
-            locations = CrowdLocation.query.filter_by(is_active=True).all()
             return jsonify([{
-                'id': loc.id,
-                'location_id': loc.location_id,
-                'name': loc.name,
+                'id': loc['id'],
+                'location_id': loc['location_id'],
+                'name': loc['name'],
                 'coordinates': {
-                    'lat': db.session.scalar(loc.location.ST_Y()),
-                    'lng': db.session.scalar(loc.location.ST_X())
+                    'lat': loc['lat'],
+                    'lng': loc['lng']
                 },
-                'camera_source': loc.camera_source,
-                'is_active': loc.is_active,
-                'created_at': loc.created_at.isoformat()
-            } for loc in locations])
+                'camera_source': loc['camera_source'],
+                'is_active': loc['is_active'],
+                'created_at': loc['created_at'].isoformat() if loc['created_at'] else None
+            } for loc in crowd_locations.active()])
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/api/crowd/locations/<location_id>/deactivate', methods=['POST'])
+    def deactivate_crowd_location(location_id):
+        """Stop monitoring a camera location"""
+        result = crowd_monitor.deactivate_camera_source(location_id)
+        if 'error' in result:
+            return jsonify(result), 404 if result['error'] == 'Location not found' else 500
+        return jsonify(result)
+
     @app.route('/api/crowd/geojson', methods=['GET'])
+    @etag_cached(lambda: table_versions(CrowdData, CrowdLocation))
     def get_crowd_geojson():
-        """Get crowd detection data in GeoJSON format"""
+        """Get crowd detection data in GeoJSON format (only changes when ?since=<version> is given)"""
         try:
-            subquery = db.session.query(
-                CrowdData.crowd_location_id,
-                func.max(CrowdData.timestamp).label('max_timestamp')
-            ).group_by(CrowdData.crowd_location_id).subquery()
+            since = parse_since(request.args.get('since'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-            latest_data = db.session.query(CrowdData).join(
-                subquery,
-                (CrowdData.crowd_location_id == subquery.c.crowd_location_id) &
-                (CrowdData.timestamp == subquery.c.max_timestamp)
-            ).all()
+        try:
+            version = current_version()
+            since = resumable_since(since, version)
+
+            # Newest reading per location in one pass
+            latest = db.session.query(
+                CrowdData.id,
+                CrowdData.crowd_location_id,
+                CrowdData.estimated_count,
+                CrowdData.crowd_level,
+                CrowdData.is_anomaly,
+                CrowdData.timestamp,
+                CrowdData.version
+            ).distinct(CrowdData.crowd_location_id).order_by(
+                CrowdData.crowd_location_id,
+                CrowdData.timestamp.desc()
+            ).subquery()
+
+            query = db.session.query(
+                latest,
+                CrowdLocation.location_id,
+                CrowdLocation.name,
+                func.ST_X(CrowdLocation.location).label('lng'),
+                func.ST_Y(CrowdLocation.location).label('lat')
+            ).join(
+                CrowdLocation, CrowdLocation.id == latest.c.crowd_location_id
+            ).filter(
+                CrowdLocation.is_active == True,
+                CrowdLocation.location.isnot(None)
+            )
+            if since is not None:
+                query = query.filter(
+                    changed_since(latest.c.version, since) | changed_since(CrowdLocation.version, since)
+                )
 
             features = []
-            for data in latest_data:
-                location = CrowdLocation.query.get(data.crowd_location_id)
-                if location and location.is_active:
-                    coords = db.session.execute(
-                        text(
-                            "SELECT ST_X(location) as lng, ST_Y(location) as lat "
-                            "FROM crowd_locations WHERE id = :id"
-                        ),
-                        {"id": location.id}
-                    ).first()
-
-                    if coords:
-                        features.append({
-                            'type': 'Feature',
-                            'geometry': {
-                                'type': 'Point',
-                                'coordinates': [coords[0], coords[1]]
-                            },
-                            'properties': {
-                                'id': data.id,
-                                'location_id': location.location_id,
-                                'address': location.name,
-                                'place_type': 'monitored_area',
-                                'estimated_crowd_size': data.estimated_count,
-                                'crowd_density': data.crowd_level.lower(),
-                                'density_score': data.estimated_count / 500,
-                                'detection_source': 'camera',
-                                'detection_confidence': 0.85 + (random.random() * 0.1),
-                                'is_anomalous': data.is_anomaly,
-                                'risk_level': 'critical' if data.crowd_level == 'CRITICAL' else
-                                              'high' if data.crowd_level == 'HIGH' else
-                                              'moderate' if data.crowd_level == 'MODERATE' else 'safe',
-                                'detected_at': data.timestamp.isoformat(),
-                                'event': 'crowd_gathering'
-                            }
-                        })
+            for data in query:
+                crowd_level = data.crowd_level or 'LOW'
+                features.append({
+                    'type': 'Feature',
+                    'geometry': {
+                        'type': 'Point',
+                        'coordinates': [data.lng, data.lat]
+                    },
+                    'properties': {
+                        'id': data.id,
+                        'location_id': data.location_id,
+                        'address': data.name,
+                        'place_type': 'monitored_area',
+                        'estimated_crowd_size': data.estimated_count,
+                        'crowd_density': crowd_level.lower(),
+                        'density_score': (data.estimated_count or 0) / 500,
+                        'detection_source': 'camera',
+                        'detection_confidence': 0.85 + (random.random() * 0.1),
+                        'is_anomalous': data.is_anomaly,
+                        'risk_level': 'critical' if crowd_level == 'CRITICAL' else
+                                      'high' if crowd_level == 'HIGH' else
+                                      'moderate' if crowd_level == 'MODERATE' else 'safe',
+                        'detected_at': data.timestamp.isoformat(),
+                        'event': 'crowd_gathering'
+                    }
+                })
 
-            return jsonify({
-                'type': 'FeatureCollection',
-                'features': features
-            })
+            removed = []
+            if since is not None:
+                removed = [location_id for location_id, in db.session.query(CrowdLocation.location_id).filter(
+                    changed_since(CrowdLocation.version, since),
+                    CrowdLocation.is_active == False
+                )]
+
+            return jsonify(feature_collection(features, version, since, removed))
         except Exception as e:
             print(f"Error in crowd geojson: {e}")
             return jsonify(get_mock_crowd_geojson())
 
     @app.route('/api/crowd/detect', methods=['POST'])
     def detect_crowd():
-        """Process crowd detection from image/video"""
-        data = request.get_json()
-
-        if not data or 'image' not in data:
-            return jsonify({'error': 'No image provided'}), 400
+        """
+        Process crowd detection from an image. The frame can be sent as a raw
+        image/jpeg (or other image/*) body, as the 'image' file of a
+        multipart/form-data upload, or as base64 in a JSON 'image' field.
+        Binary bodies are read straight into a reusable buffer and decoded
+        from there; every frame, base64 ones included, is held to
+        CROWD_FRAME_MAX_BYTES (413). When every upload slot is busy the
+        request gets 503 before its body is read.
+        Optional location_id (query/form) checks the count against that
+        camera's history, area_sq_meters gives a density and
+        include_density=true adds the encoded density map.
+        """
+        try:
+            with frame_uploads.slot() as buffer:
+                content_type = request.mimetype
+                data = None
+                if content_type.startswith('image/'):
+                    frame = frame_uploads.read(request.stream, buffer, request.content_length)
+                elif content_type == 'multipart/form-data':
+                    upload = request.files.get('image')
+                    if upload is None:
+                        return jsonify({'error': 'No image provided'}), 400
+                    frame = frame_uploads.read(upload.stream, buffer)
+                else:
+                    data = request.get_json(silent=True)
+                    if not data or 'image' not in data:
+                        return jsonify({'error': 'No image provided'}), 400
+                    source = data['image']
+                    if isinstance(source, str) and source.startswith('data:image'):
+                        frame = memoryview(frame_uploads.decode_base64(source))
+                    else:
+                        frame = None
+
+                if frame is not None and not len(frame):
+                    return jsonify({'error': 'No image provided'}), 400
+
+                values = request.values
+                area = values.get('area_sq_meters', type=float)
+                camera_id = values.get('location_id') or (data or {}).get('location_id')
+                if frame is not None:
+                    with frame:
+                        image = crowd_detector.open_frame(frame)
+                        try:
+                            estimate = crowd_detector.estimate_density(image, area, camera_id=camera_id)
+                        finally:
+                            # The image reads the slot buffer in place
+                            image.close()
+                else:
+                    image = crowd_detector.process_image(data['image'])
+                    estimate = crowd_detector.estimate_density(image, area, camera_id=camera_id)
+        except UploadsBusy:
+            response = jsonify({'error': 'Too many frames being processed, retry shortly'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        except FrameTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
 
+        if camera_id in crowd_monitor.locations:
+            anomaly = crowd_detector.detect_anomalies(
+                estimate['estimated_count'], crowd_monitor.history.recent(camera_id)
+            )
+        else:
+            anomaly = {'anomaly': False}
+
+        result = {
+            'estimated_count': estimate['estimated_count'],
+            'crowd_level': estimate['crowd_level'],
+            'density': estimate['density'],
+            'density_score': min(1.0, estimate['density_map']['max_density']),
+            'is_anomalous': anomaly['anomaly'],
+            'anomaly': anomaly,
+            'confidence': estimate['confidence'],
+            'cached': estimate['cached']
+        }
+        if request.args.get('include_density', 'false').lower() == 'true':
+            result['density_map'] = estimate['density_map']
+        return jsonify(result)
+
+    @app.route('/api/crowd/detect/batch', methods=['POST'])
+    def detect_crowd_batch():
+        """
+        Crowd detection for several frames at once, spread over the worker
+        processes. Send the frames as repeated 'image' files of a
+        multipart/form-data upload, or as base64 strings in a JSON 'images'
+        list. Results are returned in the order the frames were sent; a
+        frame that cannot be decoded gets an error entry of its own.
+        """
+        max_frames = app.config['MAX_BATCH_FRAMES']
         try:
-            result = {
-                'estimated_count': random.randint(50, 500),
-                'crowd_level': random.choice(['LOW', 'MODERATE', 'HIGH', 'CRITICAL']),
-                'density_score': random.uniform(0.1, 0.9),
-                'is_anomalous': random.random() > 0.8,
-                'confidence': random.uniform(0.7, 0.95)
-            }
-            return jsonify(result)
+            with frame_uploads.slot():
+                if request.mimetype == 'multipart/form-data':
+                    frames = [upload.stream for upload in request.files.getlist('image')]
+                    area = request.form.get('area_sq_meters', type=float)
+                else:
+                    data = request.get_json(silent=True) or {}
+                    images = data.get('images') or []
+                    if len(images) > max_frames:
+                        return jsonify({'error': f'Too many frames in one batch (max {max_frames})'}), 413
+                    frames = [frame_uploads.decode_base64(image) for image in images]
+                    area = data.get('area_sq_meters')
+
+                if not frames:
+                    return jsonify({'error': 'No images provided'}), 400
+                if len(frames) > max_frames:
+                    return jsonify({'error': f'Too many frames in one batch (max {max_frames})'}), 413
+
+                results = detection_pool.estimate(frames, area, max_bytes=frame_uploads.max_bytes)
+        except UploadsBusy:
+            response = jsonify({'error': 'Too many frames being processed, retry shortly'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        except FrameTooLarge as e:
+            return jsonify({'error': str(e)}), 413
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+        output = []
+        for index, result in enumerate(results):
+            if 'error' in result:
+                output.append({'index': index, 'error': result['error']})
+                continue
+            output.append({
+                'index': index,
+                'estimated_count': result['estimated_count'],
+                'crowd_level': result['crowd_level'],
+                'density': result['density'],
+                'density_score': min(1.0, result['density_map']['max_density']),
+                'confidence': result['confidence'],
+                'image_size': result['image_size']
+            })
+        return jsonify({'count': len(output), 'results': output})
+
+    @app.route('/api/crowd/detect/stats', methods=['GET'])
+    def get_crowd_detect_stats():
+        """Upload slot usage and rejections"""
+        return jsonify(frame_uploads.stats())
+
+    @app.route('/api/crowd/detect/model', methods=['GET'])
+    def get_counting_model_stats():
+        """Counting model in use and how requests are being batched for it"""
+        if crowd_detector.counting_model is None:
+            return jsonify({'name': 'heuristic'})
+        return jsonify(dict(crowd_detector.counting_model.info(), batching=crowd_detector.batcher.stats()))
+
+    @app.route('/api/crowd/detect/cache', methods=['GET'])
+    def get_frame_cache_stats():
+        """Perceptual-hash frame cache hits, misses and evictions"""
+        if frame_cache is None:
+            return jsonify({'enabled': False})
+        return jsonify(dict(frame_cache.stats(), enabled=True))
+
     @app.route('/api/crowd/history/<location_id>', methods=['GET'])
     def get_crowd_history(location_id):
-        """Get historical crowd data for a location"""
+        """
+        Get historical crowd data for a location.
+        resolution=raw|minute|hour picks raw readings or a rollup table;
+        the default (auto) reads raw rows for up to an hour, minute buckets
+        for up to 12 hours and hour buckets beyond that. max_points caps the
+        number of points returned (LTTB downsampling); anomalies are always kept.
+        include_density=true adds each raw reading's encoded density map.
+        """
         try:
             hours = int(request.args.get('hours', 24))
-            cutoff = datetime.now() - timedelta(hours=hours)
-
-            data = CrowdData.query.join(CrowdLocation).filter(
-                CrowdLocation.location_id == location_id,
-                CrowdData.timestamp >= cutoff
-            ).order_by(CrowdData.timestamp).all()
-
-            return jsonify([{
-                'timestamp': d.timestamp.isoformat(),
-                'count': d.estimated_count,
-                'level': d.crowd_level,
-                'is_anomaly': d.is_anomaly,
-                'anomaly_type': d.anomaly_type
-            } for d in data])
+            resolution = request.args.get('resolution', 'auto')
+            max_points = request.args.get('max_points')
+            max_points = max(3, int(max_points)) if max_points else None
+            include_density = request.args.get('include_density', 'false').lower() == 'true'
+            if resolution == 'auto':
+                if hours <= 1:
+                    resolution = 'raw'
+                elif hours <= 12:
+                    resolution = 'minute'
+                else:
+                    resolution = 'hour'
+            if resolution not in ('raw', 'minute', 'hour'):
+                return jsonify({'error': 'resolution must be auto, raw, minute or hour'}), 400
+
+            # Timestamps are stored in UTC
+            cutoff = datetime.utcnow() - timedelta(hours=hours)
+
+            if resolution == 'raw':
+                query = CrowdData.query.join(CrowdLocation).filter(
+                    CrowdLocation.location_id == location_id,
+                    CrowdData.timestamp >= cutoff
+                ).order_by(CrowdData.timestamp)
+                if not include_density:
+                    query = query.options(defer(CrowdData.density_map))
+                data = query.all()
+
+                history = []
+                for d in data:
+                    point = {
+                        'timestamp': d.timestamp.isoformat(),
+                        'count': d.estimated_count,
+                        'level': d.crowd_level,
+                        'is_anomaly': d.is_anomaly,
+                        'anomaly_type': d.anomaly_type
+                    }
+                    if include_density:
+                        point['density_map'] = d.density_map
+                    history.append(point)
+            else:
+                rollup = CrowdRollupMinute if resolution == 'minute' else CrowdRollupHour
+                data = rollup.query.join(CrowdLocation).filter(
+                    CrowdLocation.location_id == location_id,
+                    rollup.bucket >= rollup.truncate(cutoff)
+                ).order_by(rollup.bucket).all()
+
+                history = []
+                for d in data:
+                    count = round(d.count_sum / d.samples)
+                    history.append({
+                        'timestamp': d.bucket.isoformat(),
+                        'count': count,
+                        'min': d.count_min,
+                        'max': d.count_max,
+                        'samples': d.samples,
+                        'level': crowd_detector.get_crowd_level(count),
+                        'is_anomaly': d.anomaly_count > 0,
+                        'anomaly_count': d.anomaly_count
+                    })
+
+            total_points = len(history)
+            if max_points and total_points > max_points:
+                seconds = np.array([
+                    datetime.fromisoformat(point['timestamp']).timestamp() for point in history
+                ])
+                counts = np.array([point['count'] for point in history], dtype=float)
+                anomalies = np.array([point['is_anomaly'] for point in history], dtype=bool)
+                history = [history[i] for i in downsample_indices(seconds, counts, max_points, keep=anomalies)]
+
+            response = jsonify(history)
+            response.headers['X-History-Resolution'] = resolution
+            response.headers['X-History-Total-Points'] = str(total_points)
+            return response
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
@@ -564,39 +1274,38 @@ def register_routes(app):
             hours = int(request.args.get('hours', 6))
             cutoff = datetime.now() - timedelta(hours=hours)
 
-            anomalies = CrowdData.query.filter(
+            anomalies = db.session.query(
+                CrowdData.id,
+                CrowdData.crowd_location_id,
+                CrowdData.estimated_count,
+                CrowdData.crowd_level,
+                CrowdData.anomaly_type,
+                CrowdData.timestamp
+            ).filter(
                 CrowdData.is_anomaly == True,
                 CrowdData.timestamp >= cutoff
             ).all()
+            locations = crowd_locations.get_many({anomaly.crowd_location_id for anomaly in anomalies})
 
             features = []
             for anomaly in anomalies:
-                location = CrowdLocation.query.get(anomaly.crowd_location_id)
-                if location:
-                    coords = db.session.execute(
-                        text(
-                            "SELECT ST_X(location) as lng, ST_Y(location) as lat "
-                            "FROM crowd_locations WHERE id = :id"
-                        ),
-                        {"id": location.id}
-                    ).first()
-
-                    if coords:
-                        features.append({
-                            'type': 'Feature',
-                            'geometry': {
-                                'type': 'Point',
-                                'coordinates': [coords[0], coords[1]]
-                            },
-                            'properties': {
-                                'id': anomaly.id,
-                                'location': location.name,
-                                'count': anomaly.estimated_count,
-                                'level': anomaly.crowd_level,
-                                'anomaly_type': anomaly.anomaly_type,
-                                'timestamp': anomaly.timestamp.isoformat()
-                            }
-                        })
+                location = locations.get(anomaly.crowd_location_id)
+                if location and location['has_location']:
+                    features.append({
+                        'type': 'Feature',
+                        'geometry': {
+                            'type': 'Point',
+                            'coordinates': [location['lng'], location['lat']]
+                        },
+                        'properties': {
+                            'id': anomaly.id,
+                            'location': location['name'],
+                            'count': anomaly.estimated_count,
+                            'level': anomaly.crowd_level,
+                            'anomaly_type': anomaly.anomaly_type,
+                            'timestamp': anomaly.timestamp.isoformat()
+                        }
+                    })
 
             return jsonify({
                 'type': 'FeatureCollection',
@@ -683,44 +1392,309 @@ def register_routes(app):
         except Exception:
             return 0.3
 
+    def calculate_severity_scores(incident_types, call_counts, location_types, time_factor, historical_risks, caller_types):
+        """Vectorized calculate_severity_score over a batch of reports"""
+        incident_score = lookup_scores(incident_types, INCIDENT_TYPE_SCORES) / 10.0
+        call_score = np.minimum(np.asarray(call_counts, dtype=float) * 0.1, 1.0)
+        location_score = lookup_scores(location_types, LOCATION_RISK_SCORES) / 10.0
+
+        time_factor = np.asarray(time_factor)
+        is_peak = ((7 <= time_factor) & (time_factor <= 10)) | ((16 <= time_factor) & (time_factor <= 20))
+        time_score = np.where(is_peak, 0.8, 0.5)
+
+        historical_score = np.asarray(historical_risks, dtype=float) / 10.0
+        caller_credibility = lookup_scores(caller_types, CALLER_CREDIBILITY_SCORES) / 10.0
+
+        severity = (
+            0.25 * incident_score +
+            0.15 * call_score +
+            0.20 * location_score +
+            0.15 * time_score +
+            0.10 * historical_score +
+            0.15 * caller_credibility
+        )
+
+        return np.clip(severity * 10, 1, 10).tolist()
+
+    def calculate_prank_confidences(caller_types, time_of_day):
+        """Vectorized calculate_prank_confidence over a batch of reports"""
+        caller_types = np.asarray(caller_types, dtype=str)
+        time_of_day = np.asarray(time_of_day)
+
+        confidence = np.full(len(caller_types), 0.5)
+        confidence -= np.where(caller_types == 'emergency_services', 0.3, 0.0)
+        confidence -= np.where(caller_types == 'verified', 0.2, 0.0)
+        confidence += np.where(caller_types == 'anonymous', 0.2, 0.0)
+        confidence += np.where((1 <= time_of_day) & (time_of_day <= 5), 0.1, 0.0)
+
+        return np.clip(confidence, 0, 1).tolist()
+
+    def lookup_scores(values, scores, default=5):
+        """Map each value to its score, looking every distinct value up only once"""
+        keys, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        return np.array([scores.get(key, default) for key in keys], dtype=float)[inverse]
+
     def get_caller_credibility(caller_type):
         """Get caller credibility score"""
-        scores = {
-            'emergency_services': 9,
-            'verified': 8,
-            'first_time': 5,
-            'anonymous': 3
-        }
-        return scores.get(caller_type, 5)
+        return CALLER_CREDIBILITY_SCORES.get(caller_type, 5)
 
     def get_historical_risk(lat, lng):
         """Get historical risk for location"""
         return random.uniform(3, 7)
 
-    def update_caller_history(caller_id, caller_type, was_false_report):
-        """Update caller history in database"""
-        try:
-            history = CallerHistory.query.filter_by(caller_id=caller_id).first()
+    def get_historical_risks(lats, lngs):
+        """Get historical risk for a batch of locations"""
+        return np.random.uniform(3, 7, len(lats))
+
+    def publish_incident(incident_id, lng, lat, row):
+        """Push a newly reported incident to live stream clients"""
+        event_hub.publish('incident', {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lng, lat]},
+            'properties': {
+                'id': incident_id,
+                'type': row['incident_type'],
+                'severity': row['severity'],
+                'severity_score': row['severity_score'],
+                'address': row['address'],
+                'reported_at': row['reported_at'].isoformat(),
+                'status': 'active'
+            }
+        })
 
-            if not history:
-                history = CallerHistory(
-                    caller_id=caller_id,
-                    caller_type=caller_type,
-                    total_reports=0,
-                    false_reports=0
-                )
+    def parse_since(value):
+        """Change version a client already has, or None for a full fetch"""
+        if value in (None, ''):
+            return None
+        since = int(value)
+        if since < 0:
+            raise ValueError('since must be a non-negative change version')
+        return since
+
+    def resumable_since(since, version):
+        """
+        since, or None (a full fetch) when it is ahead of the current version -
+        a token from before a restore or a versioning migration, which cannot
+        be compared with the versions handed out now
+        """
+        if since is not None and since > version:
+            return None
+        return since
+
+    def feature_collection(features, version, since=None, removed=None):
+        """FeatureCollection stamped with its change version; a delta when since is given"""
+        collection = {'type': 'FeatureCollection', 'features': features, 'version': version}
+        if since is not None:
+            collection['since'] = since
+            collection['removed'] = removed or []
+        return collection
+
+    def page_response(rows, limit, cursor_of, serialize):
+        """JSON list of one page; X-Next-Cursor and Link headers point at the next one"""
+        response = jsonify([serialize(row) for row in rows[:limit]])
+        if len(rows) > limit:
+            next_cursor = encode_cursor(*cursor_of(rows[limit - 1]))
+            args = request.args.to_dict()
+            args['cursor'] = next_cursor
+            response.headers['X-Next-Cursor'] = next_cursor
+            response.headers['Link'] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+        return response
+
+    def parse_report(data):
+        """Normalize one incident report payload; ValueError if its location is invalid"""
+        location = data.get('location', [77.2090, 28.6139])
+        if isinstance(location, list) and len(location) >= 2:
+            lng, lat = location[0], location[1]
+        else:
+            lng, lat = 77.2090, 28.6139
 
-            history.total_reports += 1
-            if was_false_report:
-                history.false_reports += 1
+        try:
+            # bool is an int subclass; "true" is not a coordinate
+            if isinstance(lng, bool) or isinstance(lat, bool):
+                raise TypeError
+            lng, lat = float(lng), float(lat)
+        except (TypeError, ValueError):
+            raise ValueError('Location must be [longitude, latitude] numbers')
+        if not (math.isfinite(lng) and math.isfinite(lat)) or not (-180 <= lng <= 180 and -90 <= lat <= 90):
+            raise ValueError('Location out of range (longitude -180..180, latitude -90..90)')
 
-            history.last_report = datetime.now()
-            history.update_reputation()
+        return {
+            'incident_type': data.get('type', 'unknown'),
+            'lng': lng,
+            'lat': lat,
+            'caller_id': data.get('caller_id', f"caller_{random.randint(1000, 9999)}"),
+            'caller_type': data.get('caller_type', 'first_time'),
+            'description': data.get('description', ''),
+            'location_type': data.get('location_type', 'residential'),
+            'address': data.get('address', 'Unknown location'),
+            'severity': data.get('severity', 3),
+            'affected_people': data.get('affected_people', 0)
+        }
 
-            db.session.add(history)
-            db.session.commit()
-        except Exception:
-            pass
+    def read_batch_reports():
+        """
+        Read a batch of reports from a JSON array, {'reports': [...]} or an
+        NDJSON stream. An NDJSON stream is read only up to one report past
+        MAX_BATCH_REPORTS, so an oversized batch is refused without
+        buffering the rest of the body.
+        """
+        if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            reports = []
+            for line in request.stream:
+                line = line.strip()
+                if not line:
+                    continue
+                if len(reports) >= app.config['MAX_BATCH_REPORTS']:
+                    reports.append(None)
+                    break
+                try:
+                    reports.append(json.loads(line))
+                except ValueError:
+                    reports.append(None)
+            return reports
+
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('reports')
+        return data if isinstance(data, list) else None
+
+    def find_batch_duplicates(lngs, lats):
+        """
+        Nearby recent incidents for each report in a batch. Earlier reports in
+        the same batch count too; they are returned as ('batch', position)
+        until they have an incident id.
+        """
+        radius = app.config['DUPLICATE_RADIUS_METERS']
+        batch_index = IncidentIndex(cell_size_m=radius, window_minutes=app.config['DUPLICATE_WINDOW_MINUTES'])
+
+        duplicates = []
+        for position, (lng, lat) in enumerate(zip(lngs, lats)):
+            dups = incident_index.nearby(lat, lng, radius)
+            dups += batch_index.nearby(lat, lng, radius)
+            duplicates.append(dups)
+            batch_index.insert(('batch', position), lat, lng)
+        return duplicates
+
+    def rebuild_incident_index():
+        """Load incidents inside the duplicate window into the in-memory index"""
+        cutoff = datetime.utcnow() - timedelta(minutes=app.config['DUPLICATE_WINDOW_MINUTES'])
+        rows = db.session.query(
+            Incident.id,
+            func.ST_Y(Incident.location),
+            func.ST_X(Incident.location),
+            Incident.reported_at
+        ).filter(Incident.reported_at >= cutoff).all()
+        incident_index.rebuild(rows)
+        print(f"Indexed {len(incident_index)} recent incidents for duplicate detection")
+
+    def upsert_caller_histories(reports):
+        """
+        Record (caller_id, caller_type, was_false_report) tuples with one
+        INSERT ... ON CONFLICT. It runs in a savepoint of the caller's
+        transaction: a failure is logged and rolled back on its own, so the
+        incidents being reported are still committed.
+        """
+        now = datetime.now()
+        totals = {}
+        for caller_id, caller_type, was_false_report in reports:
+            row = totals.setdefault(caller_id, {
+                'caller_id': caller_id,
+                'caller_type': caller_type,
+                'total_reports': 0,
+                'false_reports': 0,
+                'last_report': now
+            })
+            row['total_reports'] += 1
+            row['false_reports'] += int(was_false_report)
+
+        rows = list(totals.values())
+        for row in rows:
+            row['reputation_score'] = 1.0 - row['false_reports'] / row['total_reports']
+
+        stmt = pg_insert(CallerHistory).values(rows)
+        total_reports = CallerHistory.total_reports + stmt.excluded.total_reports
+        false_reports = CallerHistory.false_reports + stmt.excluded.false_reports
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CallerHistory.caller_id],
+            set_={
+                'total_reports': total_reports,
+                'false_reports': false_reports,
+                'last_report': stmt.excluded.last_report,
+                'reputation_score': 1.0 - cast(false_reports, Float) / total_reports
+            }
+        )
+        try:
+            with db.session.begin_nested():
+                db.session.execute(stmt)
+        except Exception as e:
+            print(f"Error updating caller history: {e}")
+
+    def invalidate_tiles(event_type, data):
+        """Drop cached vector tiles around a feature that just changed"""
+        if event_type == 'incident':
+            lng, lat = data['geometry']['coordinates']
+            tile_cache.invalidate_point('incidents', lng, lat)
+        elif event_type == 'dispatch' and data.get('resource_lat') is not None:
+            tile_cache.invalidate_point('resources', data['resource_lng'], data['resource_lat'])
+        elif event_type == 'crowd_location':
+            tile_cache.invalidate_point('crowd_locations', data['lng'], data['lat'])
+
+    def update_heatmap_pyramid(event_type, data):
+        """Fold incident changes into the heatmap pyramid as they arrive
+
+        The crowd layer is kept current by the crowd monitor itself, which
+        upserts every recorded reading rather than only anomalies.
+        """
+        if event_type == 'incident':
+            properties = data['properties']
+            if properties.get('status', 'active') != 'active':
+                heatmap_pyramid.remove('incidents', properties['id'])
+                return
+            lng, lat = data['geometry']['coordinates']
+            score = properties.get('severity_score')
+            heatmap_pyramid.upsert('incidents', properties['id'], lng, lat, score / 10 if score else 0.5)
+
+    def refresh_heatmap_pyramid():
+        """Rebuild the pyramid from active incidents and current camera counts"""
+        heatmap_pyramid.begin_replace('incidents')
+        with app.app_context():
+            rows = db.session.query(
+                Incident.id,
+                func.ST_X(Incident.location),
+                func.ST_Y(Incident.location),
+                Incident.severity_score
+            ).filter(Incident.status == 'active').all()
+        heatmap_pyramid.replace('incidents', [
+            (incident_id, lng, lat, score / 10 if score else 0.5)
+            for incident_id, lng, lat, score in rows if lng is not None
+        ])
+
+        heatmap_pyramid.begin_replace('crowd')
+        heatmap_pyramid.replace('crowd', [
+            (location_id, location['lng'], location['lat'], location['current_count'])
+            for location_id, location in list(crowd_monitor.locations.items())
+            if location.get('is_active', True) and location['current_count']
+        ])
+
+    event_hub.add_listener(invalidate_tiles)
+    event_hub.add_listener(update_heatmap_pyramid)
+    if app.config['HEATMAP_PYRAMID_REFRESH_SECONDS'] > 0:
+        heatmap_pyramid.start(refresh_heatmap_pyramid, app.config['HEATMAP_PYRAMID_REFRESH_SECONDS'])
+    if app.config['CAMERA_POLL_INTERVAL_SECONDS'] > 0:
+        crowd_monitor.start_polling(app.config['CAMERA_POLL_INTERVAL_SECONDS'], app)
+
+    # Warm the duplicate-call index from the database
+    with app.app_context():
+        try:
+            rebuild_incident_index()
+        except Exception as e:
+            print(f"Could not build incident index: {e}")
+        try:
+            ensure_crowd_data_partitions()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Could not create crowd_data partitions (an unpartitioned crowd_data needs "
+                  f"database/migrations/005_partition_crowd_data.sql): {e}")
 
 
 # Create app instance
@@ -4,7 +4,8 @@ from .incidents import Incident
 from .resource import Resource, ResourceAllocation
 from .user import User, CallerHistory
 from .zone import RiskZone, FloodZone
-from .crowd import CrowdLocation, CrowdData
+from .crowd import CrowdLocation, CrowdData, CrowdRollupMinute, CrowdRollupHour
+from .analytics import IncidentCounter
 
 
 
@@ -14,5 +15,6 @@ __all__ = [
     'Resource', 'ResourceAllocation',
     'User', 'CallerHistory',
     'RiskZone', 'FloodZone',
-    'CrowdLocation', 'CrowdData'
+    'CrowdLocation', 'CrowdData', 'CrowdRollupMinute', 'CrowdRollupHour',
+    'IncidentCounter'
 ]
@@ -0,0 +1,19 @@
+# backend/app/models/analytics.py
+from .database import db
+
+
+class IncidentCounter(db.Model):
+    """
+    Running incident counts per (type, status, critical), kept current by
+    the triggers on incidents from database/migrations/004_incident_counters.sql.
+    Each key is split over slot rows so concurrent writers rarely share one;
+    a key's count is the sum of its slots.
+    """
+    __tablename__ = 'incident_counters'
+
+    incident_type = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    is_critical = db.Column(db.Boolean, primary_key=True)
+    slot = db.Column(db.SmallInteger, primary_key=True, default=0)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
@@ -1,7 +1,10 @@
 # backend/app/models/crowd.py
 from .database import db
+from .versioning import version_column
 from geoalchemy2 import Geometry
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import DDL, event, func, insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 class CrowdLocation(db.Model):
     __tablename__ = 'crowd_locations'
@@ -13,18 +16,151 @@ class CrowdLocation(db.Model):
     camera_source = db.Column(db.String(500))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = version_column()
     
     # Relationships
     readings = db.relationship('CrowdData', backref='location', lazy=True)
 
 class CrowdData(db.Model):
+    """One camera reading. Range partitioned by day on timestamp (see CROWD_DATA_PARTITIONS_DDL)"""
     __tablename__ = 'crowd_data'
+    __table_args__ = (
+        db.Index('idx_crowd_data_location_timestamp', 'crowd_location_id', 'timestamp'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'}
+    )
     
-    id = db.Column(db.Integer, primary_key=True)
+    # The partition key has to be part of the primary key
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    timestamp = db.Column(db.DateTime, primary_key=True, default=datetime.utcnow)
     crowd_location_id = db.Column(db.Integer, db.ForeignKey('crowd_locations.id'))
     estimated_count = db.Column(db.Integer)
     crowd_level = db.Column(db.String(20))
     density_map = db.Column(db.JSON)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     is_anomaly = db.Column(db.Boolean, default=False)
     anomaly_type = db.Column(db.String(50))
+    version = version_column()
+
+
+class CrowdRollupMixin:
+    """Per-location aggregate of the readings in one time bucket"""
+    crowd_location_id = db.Column(db.Integer, db.ForeignKey('crowd_locations.id'), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)
+    samples = db.Column(db.Integer, nullable=False)
+    count_sum = db.Column(db.BigInteger, nullable=False)
+    count_min = db.Column(db.Integer, nullable=False)
+    count_max = db.Column(db.Integer, nullable=False)
+    anomaly_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def truncate(cls, timestamp):
+        """Start of the bucket a timestamp falls in"""
+        return timestamp.replace(microsecond=0, second=0, **cls.truncate_fields)
+
+    @classmethod
+    def upsert_readings(cls, rows):
+        """Fold crowd_data rows into the buckets with one INSERT ... ON CONFLICT"""
+        buckets = {}
+        for row in rows:
+            key = (row['crowd_location_id'], cls.truncate(row['timestamp']))
+            count = row['estimated_count']
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = {
+                    'crowd_location_id': key[0],
+                    'bucket': key[1],
+                    'samples': 1,
+                    'count_sum': count,
+                    'count_min': count,
+                    'count_max': count,
+                    'anomaly_count': int(bool(row['is_anomaly']))
+                }
+            else:
+                bucket['samples'] += 1
+                bucket['count_sum'] += count
+                bucket['count_min'] = min(bucket['count_min'], count)
+                bucket['count_max'] = max(bucket['count_max'], count)
+                bucket['anomaly_count'] += int(bool(row['is_anomaly']))
+        if not buckets:
+            return
+
+        table = cls.__table__
+        stmt = pg_insert(table).values(list(buckets.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.crowd_location_id, table.c.bucket],
+            set_={
+                'samples': table.c.samples + stmt.excluded.samples,
+                'count_sum': table.c.count_sum + stmt.excluded.count_sum,
+                'count_min': func.least(table.c.count_min, stmt.excluded.count_min),
+                'count_max': func.greatest(table.c.count_max, stmt.excluded.count_max),
+                'anomaly_count': table.c.anomaly_count + stmt.excluded.anomaly_count
+            }
+        )
+        db.session.execute(stmt)
+
+
+class CrowdRollupMinute(CrowdRollupMixin, db.Model):
+    __tablename__ = 'crowd_rollup_minute'
+    bucket_size = timedelta(minutes=1)
+    truncate_fields = {}
+
+
+class CrowdRollupHour(CrowdRollupMixin, db.Model):
+    __tablename__ = 'crowd_rollup_hour'
+    bucket_size = timedelta(hours=1)
+    truncate_fields = {'minute': 0}
+
+
+# Daily partitions are created ahead of time by crowd_data_ensure_partitions();
+# the default partition only catches readings outside them. DDL() %-formats its
+# statement, so plpgsql's own % placeholders are written %%. Runs only when
+# create_all creates crowd_data; an older, unpartitioned table is converted by
+# database/migrations/005_partition_crowd_data.sql.
+CROWD_DATA_PARTITIONS_DDL = """
+CREATE TABLE IF NOT EXISTS crowd_data_default PARTITION OF crowd_data DEFAULT;
+
+CREATE OR REPLACE FUNCTION crowd_data_ensure_partitions(days_ahead integer) RETURNS void AS $$
+DECLARE
+    day date;
+BEGIN
+    FOR day IN SELECT generate_series(current_date - 1, current_date + days_ahead, interval '1 day')::date LOOP
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %%I PARTITION OF crowd_data FOR VALUES FROM (%%L) TO (%%L)',
+                'crowd_data_' || to_char(day, 'YYYYMMDD'), day, day + 1
+            );
+        EXCEPTION WHEN others THEN
+            -- e.g. the default partition already holds rows for that day
+            RAISE NOTICE 'crowd_data partition for %% not created: %%', day, SQLERRM;
+        END;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT crowd_data_ensure_partitions(7);
+"""
+
+event.listen(
+    CrowdData.__table__,
+    'after_create',
+    DDL(CROWD_DATA_PARTITIONS_DDL).execute_if(dialect='postgresql')
+)
+
+
+def ensure_crowd_data_partitions(days_ahead=7):
+    """Create the daily crowd_data partitions from yesterday through days_ahead"""
+    db.session.execute(text('SELECT crowd_data_ensure_partitions(:days)'), {'days': days_ahead})
+    db.session.commit()
+
+
+def record_crowd_readings(rows):
+    """
+    Insert crowd_data rows in one statement and fold them into the minute
+    and hour rollups in the same transaction. Caller commits.
+    """
+    if not rows:
+        return
+    for row in rows:
+        row.setdefault('timestamp', datetime.utcnow())
+    db.session.execute(insert(CrowdData), rows)
+    CrowdRollupMinute.upsert_readings(rows)
+    CrowdRollupHour.upsert_readings(rows)
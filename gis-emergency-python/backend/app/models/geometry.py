@@ -0,0 +1,57 @@
+# backend/app/models/geometry.py
+from geoalchemy2.shape import to_shape
+from sqlalchemy import func
+from sqlalchemy.orm import defer
+
+DEFAULT_COORDINATES = {'lat': 28.6139, 'lng': 77.2090}  # Delhi
+
+
+class PointCoordinatesMixin:
+    """Coordinate helpers for models with a single POINT geometry column"""
+
+    # Name of the geometry column holding the point
+    point_column_name = 'location'
+
+    # Filled in by with_coordinates() so serialization needs no per-row parsing
+    _coordinates = None
+
+    @classmethod
+    def point_column(cls):
+        return getattr(cls, cls.point_column_name)
+
+    @classmethod
+    def with_coordinates(cls, query=None):
+        """
+        Run query with ST_X/ST_Y selected as columns and attach the
+        coordinates to each row - one round trip, no WKB decoding.
+        """
+        column = cls.point_column()
+        query = query if query is not None else cls.query
+        rows = query.options(defer(column)).add_columns(
+            func.ST_X(column), func.ST_Y(column)
+        ).all()
+
+        items = []
+        for item, lng, lat in rows:
+            item._coordinates = {'lat': lat, 'lng': lng} if lat is not None else dict(DEFAULT_COORDINATES)
+            items.append(item)
+        return items
+
+    @classmethod
+    def within_bbox(cls, bbox):
+        """Filter for points inside (min_lng, min_lat, max_lng, max_lat) - served by the GIST index"""
+        return func.ST_Intersects(cls.point_column(), func.ST_MakeEnvelope(*bbox, 4326))
+
+    def get_coordinates(self):
+        """Extract coordinates from PostGIS point"""
+        if self._coordinates is not None:
+            return self._coordinates
+
+        geometry = getattr(self, self.point_column_name)
+        if geometry is not None:
+            try:
+                point = to_shape(geometry)
+                return {'lat': point.y, 'lng': point.x}
+            except Exception:
+                pass
+        return dict(DEFAULT_COORDINATES)
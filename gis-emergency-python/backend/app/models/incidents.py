@@ -5,9 +5,14 @@ from sqlalchemy.dialects.postgresql import JSON
 
 # Import db from the same directory
 from .database import db
+from .geometry import PointCoordinatesMixin
+from .versioning import version_column
 
-class Incident(db.Model):
+class Incident(PointCoordinatesMixin, db.Model):
     __tablename__ = 'incidents'
+    __table_args__ = (
+        db.Index('idx_incidents_reported_at_id', 'reported_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     incident_type = db.Column(db.String(50), nullable=False)
@@ -18,6 +23,13 @@ class Incident(db.Model):
     status = db.Column(db.String(20), default='active')
     description = db.Column(db.Text)
     affected_people = db.Column(db.Integer)
+    severity_score = db.Column(db.Float)
+    prank_confidence = db.Column(db.Float)
+    caller_id = db.Column(db.String(100))
+    caller_type = db.Column(db.String(50))
+    location_type = db.Column(db.String(50))
+    call_count = db.Column(db.Integer, default=1)
+    version = version_column()
     
     # Relationships
     resources = db.relationship('ResourceAllocation', backref='incident', lazy=True)
@@ -55,13 +67,3 @@ class Incident(db.Model):
                 'status': self.status
             }
         }
-    
-    def get_coordinates(self):
-        """Extract coordinates from PostGIS point"""
-        if self.location:
-            try:
-                if hasattr(self.location, 'x') and hasattr(self.location, 'y'):
-                    return {'lat': self.location.y, 'lng': self.location.x}
-            except:
-                pass
-        return {'lat': 28.6139, 'lng': 77.2090}
\ No newline at end of file
@@ -5,9 +5,12 @@ from sqlalchemy.dialects.postgresql import JSON
 
 # Import db from the same directory
 from .database import db
+from .geometry import PointCoordinatesMixin
+from .versioning import version_column
 
-class Resource(db.Model):
+class Resource(PointCoordinatesMixin, db.Model):
     __tablename__ = 'resources'
+    point_column_name = 'current_location'
     
     id = db.Column(db.Integer, primary_key=True)
     resource_type = db.Column(db.String(50), nullable=False)
@@ -16,6 +19,7 @@ class Resource(db.Model):
     capacity = db.Column(db.Integer)
     details = db.Column(JSON)
     last_update = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = version_column()
     
     def to_dict(self):
         """Convert to dictionary"""
@@ -46,16 +50,7 @@ class Resource(db.Model):
                 'capacity': self.capacity
             }
         }
-    
-    def get_coordinates(self):
-        """Extract coordinates from PostGIS point"""
-        if self.current_location:
-            try:
-                if hasattr(self.current_location, 'x') and hasattr(self.current_location, 'y'):
-                    return {'lat': self.current_location.y, 'lng': self.current_location.x}
-            except:
-                pass
-        return {'lat': 28.6139, 'lng': 77.2090}
+
 
 class ResourceAllocation(db.Model):
     __tablename__ = 'resource_allocations'
@@ -29,7 +29,7 @@ class CallerHistory(db.Model):
     __tablename__ = 'caller_history'
     
     id = db.Column(db.Integer, primary_key=True)
-    caller_id = db.Column(db.String(100), nullable=False, index=True)
+    caller_id = db.Column(db.String(100), nullable=False, unique=True, index=True)
     caller_type = db.Column(db.String(50))
     total_reports = db.Column(db.Integer, default=0)
     false_reports = db.Column(db.Integer, default=0)
@@ -40,5 +40,4 @@ class CallerHistory(db.Model):
         """Calculate reputation score"""
         if self.total_reports > 0:
             accuracy = 1.0 - (self.false_reports / self.total_reports)
-            self.reputation_score = accuracy
-        db.session.commit()
\ No newline at end of file
+            self.reputation_score = accuracy
\ No newline at end of file
@@ -0,0 +1,63 @@
+# backend/app/models/versioning.py
+from sqlalchemy import text
+
+from .database import db
+
+# Change version of a row: id of the transaction that last wrote it (PostgreSQL 13+).
+# Transaction ids only grow, but they are handed out when a transaction starts,
+# not when it commits - current_version() is what turns them into a commit order.
+WRITER_TRANSACTION_ID = '(pg_current_xact_id()::text)::bigint'
+
+
+def version_column():
+    """BigInteger column stamped with the writing transaction's id on every insert and update"""
+    return db.Column(
+        db.BigInteger,
+        server_default=text(WRITER_TRANSACTION_ID),
+        onupdate=text(WRITER_TRANSACTION_ID),
+        index=True
+    )
+
+
+def current_version():
+    """
+    Change version a client can resume from: the oldest transaction still in
+    flight (xmin of the current snapshot). Every transaction below it has
+    finished, so its rows are visible now or never will be; rows from
+    transactions still running get a version at or above it and show up in
+    the next delta whatever order they commit in. Read it before the rows
+    it stamps.
+    """
+    return db.session.execute(
+        text('SELECT (pg_snapshot_xmin(pg_current_snapshot())::text)::bigint')
+    ).scalar()
+
+
+def changed_since(version, since):
+    """
+    Filter for rows changed since a client's current_version(). Inclusive:
+    a transaction that was in flight at since may have committed after it.
+    """
+    return version >= since
+
+
+def table_versions(*models):
+    """
+    Change counter of each model's table, in one round trip. It moves once
+    for every committed transaction that wrote the table, deletes included,
+    so it suits ETags; it is not a ?since= version. The counters are the
+    <table>_changes sequences from database/migrations/003_table_change_counters.sql.
+    """
+    names = [f'{model.__tablename__}_changes' for model in models]
+    rows = db.session.execute(
+        text(
+            'SELECT to_regclass(name) IS NOT NULL, COALESCE(pg_sequence_last_value(to_regclass(name)), 0) '
+            'FROM unnest(CAST(:names AS text[])) WITH ORDINALITY AS t(name, position) ORDER BY position'
+        ),
+        {'names': names}
+    ).all()
+    missing = [name for name, (found, _) in zip(names, rows) if not found]
+    if missing:
+        # Without the triggers a counter would never move and ETags would go stale
+        raise RuntimeError(f"Change counters {', '.join(missing)} missing - run database/migrations/003_table_change_counters.sql")
+    return tuple(changes for _, changes in rows)
@@ -0,0 +1,96 @@
+# backend/app/services/counting_models.py
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+from PIL import Image
+
+try:
+    import onnxruntime as ort
+except ImportError:  # optional - only needed for the 'onnx' backend
+    ort = None
+
+# Small test model (fixed random weights, not trained) built by
+# benchmarks/build_test_model.py
+BUNDLED_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'assets', 'crowd_counter_test.onnx')
+
+
+class CountingModel(ABC):
+    """
+    Interface for crowd counting models. A model takes a batch of
+    preprocessed frames and returns one density map per frame whose sum
+    is the estimated head count (the MCNN / CSRNet formulation).
+    """
+    name = 'base'
+    input_size = (128, 128)     # (height, width) frames are resized to
+    # Density models give no per-frame score; this is reported with every count
+    confidence = 0.85
+
+    def preprocess(self, gray):
+        """float32 (1, height, width) tensor in 0..1 from a grayscale PIL image"""
+        height, width = self.input_size
+        resized = gray.resize((width, height), Image.BILINEAR)
+        return (np.asarray(resized, dtype=np.float32) * np.float32(1 / 255.0))[None]
+
+    @abstractmethod
+    def predict(self, batch):
+        """(N, 1, height, width) float32 -> (N, map_height, map_width) density maps"""
+
+    def info(self):
+        return {'name': self.name, 'input_size': list(self.input_size), 'confidence': self.confidence}
+
+
+class OnnxCountingModel(CountingModel):
+    """
+    Counting model run with ONNX Runtime on the CPU. The model needs one
+    input of shape (N, 1, H, W) with a dynamic batch axis and one output of
+    shape (N, 1, h, w) or (N, h, w).
+
+    intra_op_threads is how many cores one inference may use; the default
+    is every core, which suits a single process feeding it micro-batches.
+    Several processes sharing a machine should split the cores between
+    them. Inter-op parallelism is left at 1: these graphs are a straight
+    chain of ops with nothing to run side by side.
+    """
+    name = 'onnx'
+
+    def __init__(self, path=None, intra_op_threads=None):
+        if ort is None:
+            raise RuntimeError('onnxruntime is not installed (pip install onnxruntime)')
+        self.path = path or BUNDLED_MODEL_PATH
+        self.intra_op_threads = intra_op_threads or os.cpu_count() or 1
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.path, sess_options=options, providers=['CPUExecutionProvider'])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        height, width = model_input.shape[2:4]
+        if isinstance(height, int) and isinstance(width, int):
+            self.input_size = (height, width)
+
+    def predict(self, batch):
+        output = self.session.run(None, {self.input_name: np.ascontiguousarray(batch, dtype=np.float32)})[0]
+        return output.reshape(output.shape[0], output.shape[-2], output.shape[-1])
+
+    def info(self):
+        return dict(super().info(), path=self.path, intra_op_threads=self.intra_op_threads)
+
+
+COUNTING_BACKENDS = {
+    'onnx': OnnxCountingModel
+}
+
+
+def create_counting_model(backend, **options):
+    """Counting model for a backend name, or None for the built-in brightness heuristic"""
+    if not backend or backend == 'heuristic':
+        return None
+    if backend not in COUNTING_BACKENDS:
+        raise ValueError(f"Unknown counting backend '{backend}' (choose from heuristic, {', '.join(COUNTING_BACKENDS)})")
+    return COUNTING_BACKENDS[backend](**options)
@@ -4,16 +4,43 @@ from datetime import datetime, timedelta
 import random
 import base64
 import json
-from PIL import Image
-from io import BytesIO
+from PIL import Image, ImageStat
 import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.request import urlopen
 
 # Import database models
 from app.models.database import db
-from app.models.crowd import CrowdLocation, CrowdData
+from app.models.crowd import CrowdLocation, CrowdData, record_crowd_readings, ensure_crowd_data_partitions
+from app.services.crowd_registry import CrowdLocationRegistry
+from app.services.history_buffer import CameraHistory
+from app.services.frame_cache import dhash
+from app.services.frame_upload import FrameReader
+from app.services.micro_batcher import MicroBatcher
+from app.utils.density_codec import encode_density_map, MAX_DENSITY_RESOLUTION
+from geoalchemy2.elements import WKTElement
 
 class CrowdDetector:
-    def __init__(self):
+    # Longest side of the view brightness statistics are computed on
+    ANALYSIS_MAX_SIDE = 256
+
+    def __init__(self, frame_cache=None, density_resolution=32, counting_model=None, max_batch_size=8, max_wait_ms=5,
+                 counting_timeout=10.0):
+        # Optional FrameCache: near-identical frames from a camera reuse the last analysis
+        self.frame_cache = frame_cache
+        # Density maps are density_resolution x density_resolution cells
+        self.density_resolution = max(1, min(density_resolution, MAX_DENSITY_RESOLUTION))
+        
+        # Optional CountingModel (see counting_models.py) replacing the brightness
+        # heuristic; concurrent calls are grouped into batches for it
+        self.counting_model = counting_model
+        # Longest a frame waits for its batch before estimate_density gives up
+        self.counting_timeout = counting_timeout
+        self.batcher = None
+        if counting_model is not None:
+            self.batcher = MicroBatcher(self._predict_batch, max_batch_size, max_wait_ms, name='crowd-counting')
         self.thresholds = {
             'LOW': 50,
             'MODERATE': 100,
@@ -36,14 +63,16 @@ class CrowdDetector:
                 if image_source.startswith('data:image'):
                     # Base64 encoded image
                     img_data = base64.b64decode(image_source.split(',')[1])
-                    img = Image.open(BytesIO(img_data))
-                    return img
+                    return self.open_frame(img_data)
                 elif image_source.startswith('http'):
                     # URL - would need to download in production
                     return Image.new('RGB', (640, 480), color='gray')
                 else:
                     # Local file path
-                    return Image.open(image_source)
+                    return self.open_frame(image_source)
+            
+            if isinstance(image_source, (bytes, bytearray, memoryview)):
+                return self.open_frame(image_source)
             
             return image_source if isinstance(image_source, Image.Image) else Image.new('RGB', (640, 480), color='white')
             
@@ -51,32 +80,72 @@ class CrowdDetector:
             print(f"Error processing image: {e}")
             return Image.new('RGB', (640, 480), color='white')
     
-    def estimate_density(self, image, area_sq_meters=None):
+    def open_frame(self, data):
+        """
+        Open encoded image bytes (or a file path) without decoding them yet. Pixels are only
+        decoded by estimate_density, which for JPEG asks the decoder for a
+        reduced-scale grayscale image (DCT scaling) instead of full resolution.
+        Bytes are parsed in place and stay referenced until the image is
+        closed, so close it before releasing or reusing their buffer.
+        """
+        if isinstance(data, str):
+            img = Image.open(data)
+        else:
+            reader = FrameReader(data)
+            try:
+                img = Image.open(reader)
+            except Exception:
+                reader.close()
+                raise
+        # Keep the camera resolution around, draft decoding shrinks img.size
+        img.info['original_size'] = img.size
+        return img
+    
+    def analysis_view(self, image, max_side=None):
+        """
+        Grayscale copy of image no larger than about max_side on its longest
+        side. Undecoded JPEGs are decoded straight to grayscale at 1/2, 1/4
+        or 1/8 scale; anything still too large is box-reduced in C. The
+        full-resolution frame is never converted or copied into NumPy.
+        """
+        max_side = max_side or self.ANALYSIS_MAX_SIDE
+        width, height = image.size
+        if max(width, height) > max_side:
+            scale = max_side / max(width, height)
+            # No-op unless this is a JPEG whose pixels are not loaded yet
+            image.draft('L', (max(1, int(width * scale)), max(1, int(height * scale))))
+        
+        gray = image if image.mode == 'L' else image.convert('L')
+        factor = max(gray.size) // max_side
+        if factor >= 2:
+            gray = gray.reduce(factor)
+        return gray
+    
+    def estimate_density(self, image, area_sq_meters=None, camera_id=None):
         """
         Estimate crowd density from image
         In production, this would use a proper ML model like YOLO, MCNN, etc.
+        With a frame cache and camera_id, a frame perceptually identical to
+        one this camera sent recently reuses that frame's analysis.
         """
-        # Mock density estimation with some intelligence
-        # Simulate different crowd densities based on image "complexity"
+        gray = self.analysis_view(image)
+        
+        frame_hash = None
+        if self.frame_cache is not None and camera_id is not None:
+            frame_hash = dhash(gray)
+            cached = self.frame_cache.get(camera_id, frame_hash)
+            if cached is not None:
+                return dict(
+                    cached,
+                    density=cached['estimated_count'] / area_sq_meters if area_sq_meters else None,
+                    cached=True,
+                    timestamp=datetime.now().isoformat()
+                )
         
-        # Convert image to grayscale and get basic stats for pseudo-randomness
-        if image.mode != 'L':
-            gray_img = image.convert('L')
+        if self.batcher is not None:
+            estimated_count, density_map, confidence = self._count_with_model(gray)
         else:
-            gray_img = image
-        
-        # Get image statistics for seed
-        img_array = np.array(gray_img)
-        mean_brightness = np.mean(img_array)
-        std_brightness = np.std(img_array)
-        
-        # Use image stats to seed random but make it deterministic per image
-        random.seed(int(mean_brightness * 100 + std_brightness))
-        
-        # Generate estimated count based on "image complexity"
-        # Brighter images with higher std might indicate more complex scenes
-        base_count = int(mean_brightness / 2 + std_brightness * 3)
-        estimated_count = max(10, min(1000, base_count + random.randint(-50, 50)))
+            estimated_count, density_map, confidence = self._count_with_heuristic(gray, image)
         
         # Calculate density if area provided
         density = estimated_count / area_sq_meters if area_sq_meters else None
@@ -84,42 +153,69 @@ class CrowdDetector:
         # Determine crowd level
         crowd_level = self.get_crowd_level(estimated_count)
         
-        # Create density map (simplified - in production would be actual heatmap)
-        density_map = self._create_density_map(estimated_count, image.size)
-        
-        # Reset random seed
-        random.seed()
-        
-        return {
+        result = {
             'estimated_count': estimated_count,
             'crowd_level': crowd_level,
             'density': density,
             'density_map': density_map,
-            'confidence': random.uniform(0.75, 0.95),
+            'confidence': confidence,
+            'model': self.counting_model.name if self.counting_model is not None else 'heuristic',
+            'cached': False,
             'timestamp': datetime.now().isoformat()
         }
+        if frame_hash is not None:
+            self.frame_cache.put(camera_id, frame_hash, dict(result))
+        return result
     
-    def _create_density_map(self, count, image_size):
-        """Create a simplified density map (mock)"""
-        height, width = image_size[1], image_size[0]
-        
-        # Create a grid of density values (simplified)
-        grid_size = 10
-        density_grid = []
-        
-        for i in range(grid_size):
-            row = []
-            for j in range(grid_size):
-                # Density proportional to count, with some spatial variation
-                cell_density = (count / 500) * (0.5 + 0.5 * math.sin(i * j))
-                row.append(min(1.0, cell_density))
-            density_grid.append(row)
+    def _count_with_heuristic(self, gray, image):
+        """Count, density map and confidence from brightness statistics"""
+        # Mock density estimation with some intelligence
+        # Simulate different crowd densities based on image "complexity"
         
-        return {
-            'grid': density_grid,
-            'resolution': grid_size,
-            'max_density': count / 500
-        }
+        # Get basic stats for pseudo-randomness from a downscaled grayscale
+        # view (a histogram in C - no full-resolution arrays)
+        stat = ImageStat.Stat(gray)
+        mean_brightness = stat.mean[0]
+        std_brightness = stat.stddev[0]
+        
+        # Use image stats to seed random but make it deterministic per image
+        # (a private generator, so concurrent camera polls don't reseed each other)
+        rng = random.Random(int(mean_brightness * 100 + std_brightness))
+        
+        # Generate estimated count based on "image complexity"
+        # Brighter images with higher std might indicate more complex scenes
+        base_count = int(mean_brightness / 2 + std_brightness * 3)
+        estimated_count = max(10, min(1000, base_count + rng.randint(-50, 50)))
+        
+        # Create density map (simplified - in production would be actual heatmap)
+        density_map = self._create_density_map(estimated_count, image.info.get('original_size', image.size))
+        return estimated_count, density_map, random.uniform(0.75, 0.95)
+    
+    def _count_with_model(self, gray):
+        """Count and density map from the counting model, via the micro-batcher"""
+        density_grid = self.batcher(self.counting_model.preprocess(gray), timeout=self.counting_timeout)
+        estimated_count = int(round(float(density_grid.sum())))
+        # Same max_density scale as the heuristic, so density scores stay comparable
+        density_map = encode_density_map(density_grid, max_density=estimated_count / 500)
+        return estimated_count, density_map, self.counting_model.confidence
+    
+    def _predict_batch(self, tensors):
+        return list(self.counting_model.predict(np.stack(tensors)))
+    
+    def _create_density_map(self, count, image_size=None, resolution=None):
+        """
+        Create a simplified density map (mock), encoded with encode_density_map.
+        Cell coordinates are scaled so every resolution samples the same
+        surface; at resolution 10 the cells are the original 10x10 grid.
+        """
+        grid_size = resolution or self.density_resolution
+        
+        # Density proportional to count, with some spatial variation
+        coords = np.arange(grid_size, dtype=np.float32) * np.float32(10 / grid_size)
+        density_grid = (count / 500) * (0.5 + 0.5 * np.sin(np.outer(coords, coords)))
+        np.minimum(density_grid, 1.0, out=density_grid)
+        
+        return encode_density_map(density_grid, max_density=count / 500)
     
     def get_crowd_level(self, count):
         """Determine crowd level based on count"""
@@ -182,6 +278,79 @@ class CrowdDetector:
         
         return {'anomaly': False}
     
+    def detect_anomalies_batch(self, current, mean, std, valid=None):
+        """
+        detect_anomalies for many locations at once from each one's current
+        reading and baseline mean/std. Same rules and precedence: surge
+        (RAPID_INCREASE, then MODERATE_INCREASE) before dispersal
+        (RAPID_DECREASE). Returns parallel arrays; rows where valid is False
+        (not enough history) are never flagged.
+        """
+        current = np.asarray(current, dtype=np.float64)
+        mean = np.asarray(mean, dtype=np.float64)
+        std = np.asarray(std, dtype=np.float64)
+        size = len(current)
+
+        anomaly_type = np.full(size, None, dtype=object)
+        severity = np.full(size, None, dtype=object)
+        threshold = np.full(size, np.nan)
+        undecided = np.ones(size, dtype=bool) if valid is None else np.array(valid, dtype=bool)
+        valid = undecided.copy()
+
+        for name, level, limit, hit in (
+            ('RAPID_INCREASE', 'HIGH', mean + 2.5 * std, current > mean + 2.5 * std),
+            ('MODERATE_INCREASE', 'MEDIUM', mean + 1.5 * std, current > mean + 1.5 * std),
+            ('RAPID_DECREASE', 'HIGH', mean - 2.5 * std, current < mean - 2.5 * std),
+        ):
+            hit &= undecided
+            anomaly_type[hit] = name
+            severity[hit] = level
+            threshold[hit] = limit[hit]
+            undecided &= ~hit
+
+        return {
+            'anomaly': ~undecided & valid,
+            'type': anomaly_type,
+            'severity': severity,
+            'threshold': threshold,
+            'valid': valid,
+            'current': current,
+            'mean': mean
+        }
+
+    def detect_anomalies_windows(self, windows, filled=None):
+        """
+        Batch detect_anomalies over a (locations, window) matrix of recent
+        readings whose last column is the current one - the same window the
+        scalar version takes from the history tail.
+        """
+        windows = np.asarray(windows, dtype=np.float64)
+        valid = None if filled is None else np.asarray(filled) >= windows.shape[1]
+        return self.detect_anomalies_batch(windows[:, -1], windows.mean(axis=1), windows.std(axis=1), valid)
+
+    def describe_anomaly(self, batch, i):
+        """Row i of a batch result in the dict shape detect_anomalies returns"""
+        if not batch['valid'][i]:
+            return {'anomaly': False, 'message': 'Insufficient data'}
+        if not batch['anomaly'][i]:
+            return {'anomaly': False}
+
+        anomaly_type = batch['type'][i]
+        current, mean = batch['current'][i], batch['mean'][i]
+        if anomaly_type == 'RAPID_INCREASE':
+            message = f'Critical crowd surge: +{(current/mean - 1)*100:.0f}% increase'
+        elif anomaly_type == 'MODERATE_INCREASE':
+            message = f'Unusual crowd increase: +{(current/mean - 1)*100:.0f}%'
+        else:
+            message = f'Sudden crowd dispersal: -{(1 - current/mean)*100:.0f}%'
+        return {
+            'anomaly': True,
+            'type': anomaly_type,
+            'severity': batch['severity'][i],
+            'message': message,
+            'threshold': float(batch['threshold'][i])
+        }
+    
     def estimate_risk_level(self, crowd_level, is_anomalous, time_of_day=None):
         """Estimate overall risk based on crowd factors"""
         risk_scores = {
@@ -217,41 +386,53 @@ class CrowdDetector:
 
 
 class CrowdMonitor:
-    def __init__(self):
+    HISTORY_LENGTH = 50  # readings kept per camera
+    ANOMALY_WINDOW = 5   # readings (current included) the anomaly baseline is taken over
+
+    def __init__(self, event_hub=None, registry=None, poll_workers=16, poll_timeout=5.0, detector=None,
+                 heatmap_pyramid=None):
         self.locations = {}
-        self.detector = CrowdDetector()
-        
-        # Try to load existing locations from database
+        self.history = CameraHistory(window=self.HISTORY_LENGTH)
+        self.detector = detector or CrowdDetector()
+        self.event_hub = event_hub
+        # Optional HeatmapPyramid whose 'crowd' layer follows every reading
+        self.heatmap_pyramid = heatmap_pyramid
+        self.registry = registry or CrowdLocationRegistry()
+        
+        # Camera polling: bounded worker pool, per-camera timeout
+        self.poll_workers = poll_workers
+        self.poll_timeout = poll_timeout
+        self.executor = None
+        self.in_flight = set()      # cameras whose last fetch has not returned yet
+        self.poll_lock = threading.Lock()
+        self.poller = None
+        
+        # Try to load existing locations from database; sweeps retry until it works
+        self.locations_loaded = False
         self._load_locations_from_db()
     
     def _load_locations_from_db(self):
-        """Load crowd locations from database"""
+        """Load crowd locations from database (cameras added since are kept)"""
         try:
-            locations = CrowdLocation.query.filter_by(is_active=True).all()
+            self.registry.refresh()
+            locations = self.registry.active()
             for loc in locations:
-                # Get coordinates
-                coords = None
-                if loc.location:
-                    from sqlalchemy import text
-                    result = db.session.execute(
-                        text(f"SELECT ST_X(location) as lng, ST_Y(location) as lat FROM crowd_locations WHERE id = {loc.id}")
-                    ).first()
-                    if result:
-                        coords = {'lat': result[1], 'lng': result[0]}
-                
-                self.locations[loc.location_id] = {
-                    'id': loc.id,
-                    'source': loc.camera_source,
-                    'history': [],
+                if loc['location_id'] in self.locations:
+                    continue
+                self.locations[loc['location_id']] = {
+                    'id': loc['id'],
+                    'source': loc['camera_source'],
                     'alerts': [],
                     'last_update': None,
                     'current_count': 0,
-                    'name': loc.name,
-                    'lat': coords['lat'] if coords else 28.6139,
-                    'lng': coords['lng'] if coords else 77.2090,
-                    'is_active': loc.is_active,
-                    'db_id': loc.id
+                    'name': loc['name'],
+                    'lat': loc['lat'],
+                    'lng': loc['lng'],
+                    'is_active': loc['is_active'],
+                    'db_id': loc['id']
                 }
+                self.history.add(loc['location_id'])
+            self.locations_loaded = True
             print(f"Loaded {len(locations)} crowd locations from database")
         except Exception as e:
             print(f"Could not load locations from database: {e}")
@@ -262,7 +443,6 @@ class CrowdMonitor:
         # Create location in memory
         self.locations[location_id] = {
             'source': source_url,
-            'history': [],
             'alerts': [],
             'last_update': None,
             'current_count': 0,
@@ -272,17 +452,14 @@ class CrowdMonitor:
             'is_active': True,
             'db_id': None
         }
+        self.history.add(location_id)
         
         # Save to database if requested
         if save_to_db:
             try:
-                from sqlalchemy import text
-                
                 # Create PostGIS point
                 wkt = f'POINT({self.locations[location_id]["lng"]} {self.locations[location_id]["lat"]})'
-                point = db.session.execute(
-                    text(f"SELECT ST_GeomFromText('{wkt}', 4326)")
-                ).scalar()
+                point = WKTElement(wkt, srid=4326)
                 
                 crowd_loc = CrowdLocation(
                     location_id=location_id,
@@ -292,10 +469,23 @@ class CrowdMonitor:
                     is_active=True
                 )
                 db.session.add(crowd_loc)
+                db.session.flush()
+                db_id = crowd_loc.id
                 db.session.commit()
                 
-                self.locations[location_id]['db_id'] = crowd_loc.id
+                self.locations[location_id]['id'] = db_id
+                self.locations[location_id]['db_id'] = db_id
+                self.registry.refresh()
                 print(f"Saved crowd location {location_id} to database")
+
+                if self.event_hub:
+                    self.event_hub.publish('crowd_location', {
+                        'location_id': location_id,
+                        'name': name,
+                        'lat': self.locations[location_id]['lat'],
+                        'lng': self.locations[location_id]['lng'],
+                        'is_active': True
+                    })
                 
             except Exception as e:
                 print(f"Error saving to database: {e}")
@@ -303,33 +493,226 @@ class CrowdMonitor:
         
         return {'status': 'success', 'location_id': location_id}
     
+    def deactivate_camera_source(self, location_id):
+        """Stop monitoring a camera and mark its location inactive in the database"""
+        location = self.locations.get(location_id)
+        if location is None:
+            registered = self.registry.find(location_id)
+            if registered is None:
+                return {'error': 'Location not found'}
+            location = {
+                'name': registered['name'],
+                'lat': registered['lat'],
+                'lng': registered['lng']
+            }
+        location['is_active'] = False
+        self.history.remove(location_id)
+        if self.heatmap_pyramid is not None:
+            self.heatmap_pyramid.remove('crowd', location_id)
+        if self.detector.frame_cache is not None:
+            self.detector.frame_cache.clear(location_id)
+
+        try:
+            CrowdLocation.query.filter_by(location_id=location_id).update({'is_active': False})
+            db.session.commit()
+            self.registry.refresh()
+        except Exception as e:
+            print(f"Error deactivating crowd location: {e}")
+            db.session.rollback()
+            return {'error': str(e)}
+
+        if self.event_hub:
+            self.event_hub.publish('crowd_location', {
+                'location_id': location_id,
+                'name': location['name'],
+                'lat': location['lat'],
+                'lng': location['lng'],
+                'is_active': False
+            })
+
+        return {'status': 'success', 'location_id': location_id}
+    
     def monitor_camera(self, location_id, area_sq_meters=None):
         """Monitor a single camera feed and save to database"""
         if location_id not in self.locations:
             return {'error': 'Location not found'}
         
-        location = self.locations[location_id]
+        count, density_map = self._read_camera(location_id)
+        self.history.append(location_id, count)
+        anomaly = self.detector.detect_anomalies(count, self.history.recent(location_id))
+        return self._record_reading(location_id, count, anomaly, area_sq_meters, density_map=density_map)
+    
+    def monitor_all_cameras(self, baseline='window'):
+        """
+        Monitor all active cameras, checking every one for anomalies in one
+        vectorized pass. baseline='window' compares against the last
+        ANOMALY_WINDOW readings like monitor_camera; 'ewma' uses the O(1)
+        exponentially weighted mean/std kept by the history buffer.
+        """
+        if not self.locations_loaded:
+            self._load_locations_from_db()
+        polled = self._poll_cameras(
+            [loc_id for loc_id, location in self.locations.items() if location['is_active']]
+        )
+        if not polled:
+            return []
+        
+        active = list(polled)
+        counts = [polled[loc_id][0] for loc_id in active]
+        for loc_id, count in zip(active, counts):
+            self.history.append(loc_id, count)
+        
+        if baseline == 'ewma':
+            mean, std, filled = self.history.ewma_stats(active)
+            batch = self.detector.detect_anomalies_batch(counts, mean, std, filled >= self.ANOMALY_WINDOW)
+        else:
+            windows, filled = self.history.window_matrix(active, self.ANOMALY_WINDOW)
+            batch = self.detector.detect_anomalies_windows(windows, filled)
+        
+        rows = []
+        results = [
+            self._record_reading(loc_id, count, self.detector.describe_anomaly(batch, i), rows=rows,
+                                 density_map=polled[loc_id][1])
+            for i, (loc_id, count) in enumerate(zip(active, counts))
+        ]
+        
+        # One bulk insert (plus rollups) for the whole sweep
+        self._save_readings(rows)
+        return results
+    
+    def _save_readings(self, rows):
+        """Insert crowd_data rows and update the minute/hour rollups in one transaction"""
+        if not rows:
+            return
+        try:
+            record_crowd_readings(rows)
+            db.session.commit()
+        except Exception as e:
+            print(f"Error saving crowd data: {e}")
+            db.session.rollback()
+    
+    def _poll_cameras(self, location_ids):
+        """
+        Read the given cameras on the worker pool. Returns {location_id:
+        (count, density_map)} (see _read_camera) for the cameras that answered; one that times out or fails is left out
+        of this sweep without holding up the rest, and is not polled again
+        until its outstanding fetch returns.
+        """
+        with self.poll_lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.poll_workers, thread_name_prefix='camera-poll')
+            to_poll = [loc_id for loc_id in location_ids if loc_id not in self.in_flight]
+            self.in_flight.update(to_poll)
+        if not to_poll:
+            return {}
+        
+        started = {}
+        futures = {self.executor.submit(self._poll_camera, loc_id, started): loc_id for loc_id in to_poll}
+        # Backstop for cameras still queued behind busy workers
+        deadline = time.monotonic() + self.poll_timeout * math.ceil(len(futures) / self.poll_workers)
+        
+        # Check in on the sweep a few times per timeout; each check is one pass over what is left
+        tick = min(self.poll_timeout / 4, 0.25)
+        pending, done = set(futures), set()
+        while pending:
+            finished, pending = wait(pending, timeout=tick)
+            done |= finished
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            # Stop waiting for any camera that has been running longer than its timeout
+            pending = {
+                future for future in pending
+                if now - started.get(futures[future], now) < self.poll_timeout
+            }
+        
+        for future in pending:
+            if future.cancel():
+                with self.poll_lock:
+                    self.in_flight.discard(futures[future])
+        
+        counts = {}
+        for future in done:
+            loc_id = futures[future]
+            try:
+                counts[loc_id] = future.result()
+            except Exception as e:
+                print(f"Camera {loc_id} poll failed: {e}")
+        
+        skipped = len(location_ids) - len(counts)
+        if skipped:
+            print(f"⚠️ {skipped} camera(s) skipped this sweep (slow, failed or still busy)")
+        # Keep the sweep's original camera order
+        return {loc_id: counts[loc_id] for loc_id in location_ids if loc_id in counts}
+    
+    def _poll_camera(self, location_id, started):
+        started[location_id] = time.monotonic()
+        try:
+            return self._read_camera(location_id, self.poll_timeout)
+        finally:
+            with self.poll_lock:
+                self.in_flight.discard(location_id)
+    
+    def start_polling(self, interval_seconds, app):
+        """Sweep all active cameras every interval_seconds on a daemon thread"""
+        if self.poller is not None:
+            return
+        
+        def run():
+            partitions_day = None
+            while True:
+                started = time.monotonic()
+                try:
+                    with app.app_context():
+                        # Keep a week of crowd_data partitions ahead of the clock
+                        if partitions_day != datetime.utcnow().date():
+                            ensure_crowd_data_partitions()
+                            partitions_day = datetime.utcnow().date()
+                        self.monitor_all_cameras()
+                except Exception as e:
+                    print(f"Camera sweep failed: {e}")
+                time.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
+        
+        self.poller = threading.Thread(target=run, name='camera-sweep', daemon=True)
+        self.poller.start()
+    
+    def _read_camera(self, location_id, timeout=None):
+        """
+        Current people count for a camera and the density map estimated from
+        its frame - None when no frame was analysed
+        """
+        source = self.locations[location_id].get('source') or ''
+        if source.startswith(('http://', 'https://')):
+            # Snapshot URL: download a frame and count it
+            with urlopen(source, timeout=timeout) as response:
+                image = self.detector.open_frame(response.read())
+            estimate = self.detector.estimate_density(image, camera_id=location_id)
+            return estimate['estimated_count'], estimate['density_map']
         
         # Mock monitoring with realistic variation
-        base_count = 100
-        if location['history']:
+        prev = self.history.last(location_id)
+        if prev is not None:
             # Gradual change from previous value
-            prev = location['history'][-1]
             change = random.randint(-20, 20)
-            count = max(10, prev + change)
-        else:
-            # Random initial value
-            count = random.randint(50, 300)
-        
-        location['history'].append(count)
-        if len(location['history']) > 50:  # Keep last 50 readings
-            location['history'] = location['history'][-50:]
-        
+            return max(10, int(prev) + change), None
+        # Random initial value
+        return random.randint(50, 300), None
+    
+    def _record_reading(self, location_id, count, anomaly, area_sq_meters=None, rows=None, density_map=None):
+        """
+        Store a reading that is already in the history: alerts, live event,
+        database row. With rows given the row is appended there for the
+        caller to bulk insert instead of being committed on its own.
+        density_map is the map estimated from the camera's frame; without
+        one (no frame analysed) a synthetic map for the count is stored.
+        """
+        location = self.locations[location_id]
         location['current_count'] = count
         location['last_update'] = datetime.now()
         
         crowd_level = self.detector.get_crowd_level(count)
-        anomaly = self.detector.detect_anomalies(count, location['history'])
+        if self.heatmap_pyramid is not None:
+            self.heatmap_pyramid.upsert('crowd', location_id, location['lng'], location['lat'], count)
         
         if anomaly['anomaly']:
             location['alerts'].append({
@@ -338,26 +721,39 @@ class CrowdMonitor:
                 'severity': anomaly['severity'],
                 'count': count
             })
+            
+            if self.event_hub:
+                self.event_hub.publish('crowd_anomaly', {
+                    'location_id': location_id,
+                    'name': location['name'],
+                    'lat': location['lat'],
+                    'lng': location['lng'],
+                    'count': count,
+                    'crowd_level': crowd_level,
+                    'anomaly_type': anomaly['type'],
+                    'severity': anomaly['severity'],
+                    'message': anomaly['message'],
+                    'timestamp': location['last_update'].isoformat()
+                })
         
         # Calculate density if area provided
         density = count / area_sq_meters if area_sq_meters else count / 100  # Assume 100 sq m default
         
         # Save to database if location has DB ID
         if location.get('db_id'):
-            try:
-                crowd_data = CrowdData(
-                    crowd_location_id=location['db_id'],
-                    estimated_count=count,
-                    crowd_level=crowd_level,
-                    density_map={'grid': []},  # Simplified
-                    is_anomaly=anomaly['anomaly'],
-                    anomaly_type=anomaly.get('type') if anomaly['anomaly'] else None
-                )
-                db.session.add(crowd_data)
-                db.session.commit()
-            except Exception as e:
-                print(f"Error saving crowd data: {e}")
-                db.session.rollback()
+            row = {
+                'crowd_location_id': location['db_id'],
+                'estimated_count': count,
+                'crowd_level': crowd_level,
+                'density_map': density_map if density_map is not None else self.detector._create_density_map(count),
+                'is_anomaly': anomaly['anomaly'],
+                'anomaly_type': anomaly.get('type') if anomaly['anomaly'] else None,
+                'timestamp': datetime.utcnow()
+            }
+            if rows is not None:
+                rows.append(row)
+            else:
+                self._save_readings([row])
         
         return {
             'location_id': location_id,
@@ -366,20 +762,10 @@ class CrowdMonitor:
             'crowd_level': crowd_level,
             'density': round(density, 2),
             'anomaly': anomaly,
-            'history': location['history'][-10:],
+            'history': self.history.recent(location_id, 10).astype(int).tolist(),
             'timestamp': datetime.now().isoformat()
         }
     
-    def monitor_all_cameras(self):
-        """Monitor all active cameras"""
-        results = []
-        for loc_id in self.locations:
-            if self.locations[loc_id]['is_active']:
-                result = self.monitor_camera(loc_id)
-                if 'error' not in result:
-                    results.append(result)
-        return results
-    
     def get_heatmap_data(self):
         """Get crowd density heatmap data"""
         heatmap_data = []
@@ -478,7 +864,7 @@ class CrowdMonitor:
         # If we have DB ID, try to get from database
         if location.get('db_id'):
             try:
-                cutoff = datetime.now() - timedelta(hours=hours)
+                cutoff = datetime.utcnow() - timedelta(hours=hours)
                 data = CrowdData.query.filter_by(
                     crowd_location_id=location['db_id']
                 ).filter(
@@ -497,9 +883,10 @@ class CrowdMonitor:
         
         # Fallback to in-memory history
         timestamps = []
-        for i, count in enumerate(location['history'][-hours:]):
+        recent = self.history.recent(location_id, hours).astype(int).tolist()
+        for i, count in enumerate(recent):
             timestamps.append({
-                'timestamp': (datetime.now() - timedelta(minutes=len(location['history'])-i)).isoformat(),
+                'timestamp': (datetime.now() - timedelta(minutes=len(recent)-i)).isoformat(),
                 'count': count,
                 'level': self.detector.get_crowd_level(count),
                 'is_anomaly': False
@@ -0,0 +1,113 @@
+# backend/app/services/crowd_registry.py
+import threading
+import time
+
+from flask import has_app_context
+from sqlalchemy import func
+
+from app.models.database import db
+from app.models.crowd import CrowdLocation
+
+DEFAULT_LAT, DEFAULT_LNG = 28.6139, 77.2090  # Delhi
+
+
+class CrowdLocationRegistry:
+    """
+    Process-local cache of every crowd location row with its coordinates,
+    loaded in a single statement. Call refresh() after adding or deactivating
+    a location; it also reloads itself after max_age_seconds so rows written
+    by other processes show up, and when asked for an id it has not seen.
+
+    Reloading needs an application context; given app, the registry pushes
+    one itself when called outside it (background threads, startup).
+    """
+
+    def __init__(self, app=None, max_age_seconds=60):
+        self.app = app
+        self.max_age_seconds = max_age_seconds
+        self.by_id = {}
+        self.by_location_id = {}
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Reload all locations (active or not) with ST_X/ST_Y selected inline"""
+        if not has_app_context():
+            if self.app is None:
+                raise RuntimeError('CrowdLocationRegistry.refresh() needs an application context '
+                                   '(or construct the registry with app=)')
+            with self.app.app_context():
+                return self.refresh()
+
+        rows = db.session.query(
+            CrowdLocation.id,
+            CrowdLocation.location_id,
+            CrowdLocation.name,
+            CrowdLocation.camera_source,
+            CrowdLocation.is_active,
+            CrowdLocation.created_at,
+            func.ST_X(CrowdLocation.location).label('lng'),
+            func.ST_Y(CrowdLocation.location).label('lat')
+        ).all()
+
+        by_id = {}
+        for row in rows:
+            by_id[row.id] = {
+                'id': row.id,
+                'location_id': row.location_id,
+                'name': row.name,
+                'camera_source': row.camera_source,
+                'is_active': row.is_active,
+                'created_at': row.created_at,
+                'lat': row.lat if row.lat is not None else DEFAULT_LAT,
+                'lng': row.lng if row.lng is not None else DEFAULT_LNG,
+                'has_location': row.lat is not None
+            }
+
+        with self.lock:
+            self.by_id = by_id
+            self.by_location_id = {loc['location_id']: loc for loc in by_id.values()}
+            self.loaded_at = time.time()
+        return len(by_id)
+
+    def _ensure_fresh(self):
+        if self.loaded_at is None or time.time() - self.loaded_at > self.max_age_seconds:
+            self.refresh()
+
+    def _refresh_on_miss(self):
+        # At most once a second, so lookups of bogus ids can't hammer the database
+        if time.time() - self.loaded_at >= 1:
+            self.refresh()
+
+    def all(self):
+        self._ensure_fresh()
+        with self.lock:
+            return list(self.by_id.values())
+
+    def active(self):
+        return [loc for loc in self.all() if loc['is_active']]
+
+    def get(self, db_id):
+        return self.get_many([db_id]).get(db_id)
+
+    def get_many(self, db_ids):
+        """Locations for a set of database ids; reloads once if any are unknown"""
+        self._ensure_fresh()
+        db_ids = set(db_ids)
+        with self.lock:
+            missing = db_ids - self.by_id.keys()
+        if missing:
+            self._refresh_on_miss()
+        with self.lock:
+            return {db_id: self.by_id[db_id] for db_id in db_ids if db_id in self.by_id}
+
+    def find(self, location_id):
+        """Location by its external location_id"""
+        self._ensure_fresh()
+        with self.lock:
+            location = self.by_location_id.get(location_id)
+        if location is None:
+            self._refresh_on_miss()
+            with self.lock:
+                location = self.by_location_id.get(location_id)
+        return location
@@ -0,0 +1,189 @@
+# backend/app/services/detection_pool.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from app.services.counting_models import create_counting_model
+from app.services.crowd_detection import CrowdDetector
+from app.services.frame_upload import FrameTooLarge
+
+# Workers are forked where possible: spawned workers re-import the entry
+# script, which builds a whole app in each of them
+START_METHOD = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# One detector per worker process, built by _init_worker
+_detector = None
+
+
+def _init_worker(density_resolution, counting_options):
+    global _detector
+    counting_model = None
+    if counting_options:
+        try:
+            counting_model = create_counting_model(**counting_options)
+        except Exception as e:
+            print(f"Detection worker {os.getpid()} could not load counting model: {e}")
+    # One frame at a time per worker - nothing to batch with
+    _detector = CrowdDetector(density_resolution=density_resolution, counting_model=counting_model,
+                              max_batch_size=1, max_wait_ms=0)
+
+
+def _estimate(detector, frame, area_sq_meters):
+    """Decode and analyse one encoded frame; the image is closed before returning"""
+    image = detector.open_frame(frame)
+    try:
+        result = detector.estimate_density(image, area_sq_meters)
+    finally:
+        image.close()
+    result['image_size'] = list(image.info.get('original_size', image.size))
+    return result
+
+
+def _estimate_frame(shm_name, offset, length, area_sq_meters):
+    """Decode and analyse one frame read from the batch's shared memory block"""
+    # Attaching registers the block again with the resource tracker shared
+    # with the parent, which is a no-op; only the parent, which owns the
+    # block, unregisters it when it unlinks
+    shm = SharedMemory(name=shm_name)
+    try:
+        frame = shm.buf[offset:offset + length]
+        try:
+            # The image reads the block in place and is closed by _estimate,
+            # so no view of it is left when the block is closed
+            return _estimate(_detector, frame, area_sq_meters)
+        finally:
+            frame.release()
+    except Exception as e:
+        return {'error': str(e)}
+    finally:
+        shm.close()
+
+
+class DetectionPool:
+    """
+    Crowd density estimation for many frames across a process pool.
+
+    A batch's encoded frames are copied back to back into one shared memory
+    block (uploads are read straight into it), and workers get only the
+    block name plus each frame's offset and length - no frame bytes are
+    pickled. Each worker decodes its frames at reduced scale from the block
+    and returns the small result dict. Results come back in input order.
+
+    With processes=0 there is no pool: frames are analysed one after another
+    in the calling thread with the given detector.
+    """
+
+    def __init__(self, processes=0, density_resolution=32, counting_options=None, detector=None):
+        self.processes = processes
+        self.density_resolution = density_resolution
+        # create_counting_model() arguments; each worker loads its own model
+        self.counting_options = counting_options
+        # Used in-process when processes is 0
+        self.detector = detector
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Fork the workers now, before the app starts background threads -
+        forking later copies a process whose other threads may hold locks.
+        Without fork the pool is left to start on the first batch.
+        """
+        if self.processes and START_METHOD == 'fork':
+            self._pool().submit(os.getpid).result()
+
+    def _pool(self):
+        with self.lock:
+            if self.executor is None:
+                # Started here, forked workers inherit the parent's tracker
+                # instead of each starting one that would unlink the blocks
+                resource_tracker.ensure_running()
+                # With fork, all workers are started on the first submit
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                    initializer=_init_worker,
+                    initargs=(self.density_resolution, self.counting_options)
+                )
+            return self.executor
+
+    def _reset(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+    def estimate(self, frames, area_sq_meters=None, max_bytes=None):
+        """
+        Results of estimate_density for each frame, in order. Frames are
+        bytes-like objects or seekable binary files (e.g. uploaded files);
+        a frame that fails to decode gets {'error': ...} in its place.
+        Raises FrameTooLarge if any frame is over max_bytes.
+        """
+        sizes = [_frame_size(frame) for frame in frames]
+        if not frames:
+            return []
+        if max_bytes is not None and max(sizes) > max_bytes:
+            raise FrameTooLarge(f'Frame larger than {max_bytes} bytes')
+        if not self.processes:
+            return [self._estimate_in_process(frame, area_sq_meters) for frame in frames]
+
+        shm = SharedMemory(create=True, size=max(1, sum(sizes)))
+        try:
+            offsets = []
+            offset = 0
+            for frame, size in zip(frames, sizes):
+                _copy_frame(frame, shm.buf[offset:offset + size])
+                offsets.append(offset)
+                offset += size
+
+            try:
+                return list(self._pool().map(
+                    _estimate_frame,
+                    [shm.name] * len(frames), offsets, sizes, [area_sq_meters] * len(frames)
+                ))
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory) - a fresh pool is forked next time
+                self._reset()
+                raise
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _estimate_in_process(self, frame, area_sq_meters):
+        if self.detector is None:
+            self.detector = CrowdDetector(density_resolution=self.density_resolution)
+        try:
+            return _estimate(self.detector, frame.read() if hasattr(frame, 'read') else frame, area_sq_meters)
+        except Exception as e:
+            return {'error': str(e)}
+
+    def shutdown(self):
+        self._reset()
+
+
+def _frame_size(frame):
+    if hasattr(frame, 'seek'):
+        size = frame.seek(0, os.SEEK_END)
+        frame.seek(0)
+        return size
+    return len(frame)
+
+
+def _copy_frame(frame, target):
+    try:
+        if hasattr(frame, 'readinto'):
+            filled = 0
+            while filled < len(target):
+                n = frame.readinto(target[filled:])
+                if not n:
+                    break
+                filled += n
+        else:
+            target[:] = frame
+    finally:
+        target.release()
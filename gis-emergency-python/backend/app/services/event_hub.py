@@ -0,0 +1,147 @@
+# backend/app/services/event_hub.py
+import json
+import queue
+import secrets
+import threading
+from collections import deque
+
+
+class Subscription:
+    """One connected stream client with a bounded buffer of pending events"""
+
+    def __init__(self, buffer_size):
+        self.queue = queue.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+
+class EventHub:
+    """
+    In-process publish/subscribe hub behind /api/stream.
+    Each event is serialized to its Server-Sent Events frame once and the
+    same bytes are fanned out to every subscriber. Recent frames are kept so
+    a reconnecting client can resume from its Last-Event-ID.
+
+    Event ids are "<epoch>-<n>" with an epoch picked when the hub is created,
+    so an id from before a restart or from another worker process is never
+    mistaken for one of ours - that client gets a resync instead.
+    In-process listeners run in order on one dispatcher thread, off the
+    publishing request.
+    """
+
+    def __init__(self, history_size=1000, client_buffer=100, heartbeat_seconds=15):
+        self.history = deque(maxlen=history_size)  # (sequence number, frame)
+        self.client_buffer = client_buffer
+        self.heartbeat_seconds = heartbeat_seconds
+        self.subscribers = set()
+        self.listeners = []
+        self.epoch = secrets.token_hex(4)
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.pending_events = queue.Queue()     # (event_type, data) for the listeners
+        self.dispatcher = None
+
+    def publish(self, event_type, data):
+        """Serialize an event once and queue it for every subscriber and listener"""
+        with self.lock:
+            sequence = self.next_id
+            self.next_id += 1
+            event_id = f"{self.epoch}-{sequence}"
+            frame = (
+                f"id: {event_id}\n"
+                f"event: {event_type}\n"
+                f"data: {json.dumps(data, default=str)}\n\n"
+            ).encode()
+            self.history.append((sequence, frame))
+
+            for subscription in list(self.subscribers):
+                try:
+                    subscription.queue.put_nowait(frame)
+                except queue.Full:
+                    # Slow consumer: drop it, it will reconnect and resume from history
+                    subscription.overflowed = True
+                    self.subscribers.discard(subscription)
+
+            if self.listeners:
+                if self.dispatcher is None:
+                    self.dispatcher = threading.Thread(target=self._dispatch, name='event-listeners', daemon=True)
+                    self.dispatcher.start()
+                self.pending_events.put((event_type, data))
+        return event_id
+
+    def add_listener(self, listener):
+        """Call listener(event_type, data) in-process, on the dispatcher thread, for every published event"""
+        self.listeners.append(listener)
+
+    def _dispatch(self):
+        while True:
+            event_type, data = self.pending_events.get()
+            try:
+                for listener in self.listeners:
+                    try:
+                        listener(event_type, data)
+                    except Exception as e:
+                        print(f"Event listener failed for {event_type}: {e}")
+            finally:
+                self.pending_events.task_done()
+
+    def wait_for_listeners(self):
+        """Block until the listeners have handled every event published so far"""
+        self.pending_events.join()
+
+    def _sequence_of(self, last_event_id):
+        """Our sequence number in a client's Last-Event-ID, or None if it is not one of ours"""
+        epoch, _, sequence = str(last_event_id).partition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        return sequence if sequence < self.next_id else None
+
+    def subscribe(self, last_event_id=None):
+        """Register a client; returns the subscription and the frames it missed"""
+        subscription = Subscription(self.client_buffer)
+        with self.lock:
+            backlog = []
+            if last_event_id:
+                last_sequence = self._sequence_of(last_event_id)
+                oldest = self.history[0][0] if self.history else self.next_id
+                if last_sequence is None or last_sequence + 1 < oldest:
+                    # From before a restart, another process, or evicted before the client came back
+                    backlog.append(b"event: resync\ndata: {}\n\n")
+                else:
+                    backlog.extend(frame for sequence, frame in self.history if sequence > last_sequence)
+            self.subscribers.add(subscription)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def stream(self, last_event_id=None):
+        """Generator of SSE frames for one client"""
+        subscription, backlog = self.subscribe(last_event_id)
+        try:
+            yield b"retry: 3000\n\n"
+            for frame in backlog:
+                yield frame
+
+            while True:
+                if subscription.overflowed and subscription.queue.empty():
+                    # Closing makes EventSource reconnect with Last-Event-ID and resume
+                    return
+                try:
+                    frame = subscription.queue.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'subscribers': len(self.subscribers),
+                'last_event_id': f"{self.epoch}-{self.next_id - 1}" if self.next_id > 1 else None,
+                'history': len(self.history),
+                'pending_listener_events': self.pending_events.qsize()
+            }
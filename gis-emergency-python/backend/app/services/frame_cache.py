@@ -0,0 +1,96 @@
+# backend/app/services/frame_cache.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+
+def dhash(gray, hash_size=8):
+    """
+    Difference hash of a grayscale image as a hash_size^2-bit int: shrink
+    to (hash_size + 1) x hash_size and record whether each pixel is
+    brighter than its right neighbour. Small changes (noise, compression,
+    a passer-by) flip few bits; a different scene flips about half.
+    """
+    small = np.asarray(gray.resize((hash_size + 1, hash_size), Image.BOX), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class FrameCache:
+    """
+    Bounded LRU of analysis results keyed by camera id and the perceptual
+    hash of the frame. A lookup hits when the camera has a cached frame
+    whose hash is within max_distance bits (Hamming distance) of the new
+    one, so a static camera sending near-identical frames is analysed once.
+    Each camera keeps at most per_camera hashes, which bounds the scan.
+    """
+
+    def __init__(self, max_entries=1024, max_distance=4, per_camera=8):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.per_camera = per_camera
+        self.entries = OrderedDict()    # (camera_id, hash) -> result
+        self.by_camera = {}             # camera_id -> [hash, ...]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, camera_id, frame_hash):
+        """Cached result for a near-identical frame from this camera, or None"""
+        with self.lock:
+            for cached_hash in self.by_camera.get(camera_id, ()):
+                if (cached_hash ^ frame_hash).bit_count() <= self.max_distance:
+                    key = (camera_id, cached_hash)
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, camera_id, frame_hash, result):
+        with self.lock:
+            key = (camera_id, frame_hash)
+            if key not in self.entries:
+                hashes = self.by_camera.setdefault(camera_id, [])
+                if len(hashes) >= self.per_camera:
+                    self._evict((camera_id, hashes[0]))
+                hashes.append(frame_hash)
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self._evict(next(iter(self.entries)))
+
+    def _evict(self, key):
+        camera_id, frame_hash = key
+        del self.entries[key]
+        hashes = self.by_camera[camera_id]
+        hashes.remove(frame_hash)
+        if not hashes:
+            del self.by_camera[camera_id]
+        self.evictions += 1
+
+    def clear(self, camera_id=None):
+        with self.lock:
+            if camera_id is None:
+                self.entries.clear()
+                self.by_camera.clear()
+                return
+            for frame_hash in self.by_camera.pop(camera_id, []):
+                del self.entries[(camera_id, frame_hash)]
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'cameras': len(self.by_camera),
+                'max_entries': self.max_entries,
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
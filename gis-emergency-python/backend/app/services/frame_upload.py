@@ -0,0 +1,167 @@
+# backend/app/services/frame_upload.py
+import base64
+import io
+import threading
+
+
+class FrameTooLarge(Exception):
+    """Upload is bigger than the per-frame limit"""
+
+
+class UploadsBusy(Exception):
+    """Every upload slot stayed taken for the whole wait"""
+
+
+class FrameUploads:
+    """
+    Bounded intake for uploaded camera frames.
+
+    At most max_concurrent uploads are read and analysed at once; a request
+    that cannot get a slot within wait_seconds is turned away (503) before
+    any of its body is read, so a burst of uploads queues in the clients
+    rather than in worker memory. Each slot owns a bytearray that bodies are
+    read into with readinto() in chunk_size steps and that is reused by the
+    next request, so memory stays at max_concurrent * max_bytes at worst.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, max_concurrent=4, wait_seconds=0.5, chunk_size=64 * 1024):
+        self.max_bytes = max_bytes
+        self.wait_seconds = wait_seconds
+        self.chunk_size = chunk_size
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.buffers = [bytearray(chunk_size) for _ in range(max_concurrent)]
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self.rejected_busy = 0
+        self.rejected_size = 0
+
+    def slot(self):
+        """Context manager holding an upload slot; yields its reusable buffer"""
+        return _UploadSlot(self)
+
+    def _acquire(self):
+        if not self.slots.acquire(timeout=self.wait_seconds):
+            with self.lock:
+                self.rejected_busy += 1
+            raise UploadsBusy()
+        with self.lock:
+            self.accepted += 1
+            return self.buffers.pop()
+
+    def _release(self, buffer):
+        with self.lock:
+            self.buffers.append(buffer)
+        self.slots.release()
+
+    def read(self, stream, buffer, content_length=None):
+        """
+        Read stream into buffer (growing it up to max_bytes) and return a
+        memoryview of the bytes read. The view is only valid until the slot
+        is released.
+        """
+        if content_length is not None and content_length > self.max_bytes:
+            self._too_large()
+        if content_length and len(buffer) < content_length:
+            buffer.extend(bytes(content_length - len(buffer)))
+
+        view = memoryview(buffer)
+        size = 0
+        while True:
+            if size == len(buffer):
+                if size >= self.max_bytes:
+                    # Full at the limit - anything more means the frame is too big
+                    if stream.read(1):
+                        view.release()
+                        self._too_large()
+                    break
+                view.release()
+                buffer.extend(bytes(min(max(size, self.chunk_size), self.max_bytes - size)))
+                view = memoryview(buffer)
+            n = stream.readinto(view[size:size + self.chunk_size])
+            if not n:
+                break
+            size += n
+        return view[:size]
+
+    def decode_base64(self, value):
+        """
+        Decode a base64 frame, optionally wrapped in a data: URL. The decoded
+        size is worked out from the encoded length first, so a frame over
+        max_bytes is turned away before anything is decoded.
+        """
+        encoded = value.split(',')[-1]
+        padding = len(encoded) - len(encoded.rstrip('='))
+        if len(encoded) * 3 // 4 - padding > self.max_bytes:
+            self._too_large()
+        return base64.b64decode(encoded)
+
+    def _too_large(self):
+        with self.lock:
+            self.rejected_size += 1
+        raise FrameTooLarge(f'Frame larger than {self.max_bytes} bytes')
+
+    def stats(self):
+        with self.lock:
+            return {
+                'accepted': self.accepted,
+                'rejected_busy': self.rejected_busy,
+                'rejected_size': self.rejected_size,
+                'idle_slots': len(self.buffers),
+                'buffer_bytes': sum(len(buffer) for buffer in self.buffers)
+            }
+
+
+class FrameReader(io.RawIOBase):
+    """
+    Read-only, seekable file over a bytes-like object. Lets PIL parse a
+    frame where it lies (slot buffer, shared memory) - BytesIO would copy
+    the whole buffer first. Holds a view of the buffer until closed.
+    """
+
+    def __init__(self, data):
+        self.view = memoryview(data).cast('B')
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        chunk = self.view[self.position:self.position + len(target)]
+        memoryview(target).cast('B')[:len(chunk)] = chunk
+        self.position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        if offset < 0:
+            raise ValueError('negative seek position')
+        self.position = offset
+        return offset
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        if not self.closed:
+            self.view.release()
+        super().close()
+
+
+class _UploadSlot:
+    def __init__(self, uploads):
+        self.uploads = uploads
+        self.buffer = None
+
+    def __enter__(self):
+        self.buffer = self.uploads._acquire()
+        return self.buffer
+
+    def __exit__(self, *exc):
+        self.uploads._release(self.buffer)
+        return False
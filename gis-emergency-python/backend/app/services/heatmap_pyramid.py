@@ -0,0 +1,216 @@
+# backend/app/services/heatmap_pyramid.py
+import math
+import threading
+import time
+
+import numpy as np
+
+# Don't import from models here - points are fed in by the caller
+
+
+def mercator_fraction(lng, lat):
+    """Web-mercator position of lng/lat (scalars or arrays) as fractions 0..1 of the world"""
+    lat = np.clip(lat, -85.05112878, 85.05112878)
+    fx = (np.asarray(lng, dtype=float) + 180.0) / 360.0
+    fy = (1.0 - np.arcsinh(np.tan(np.radians(lat))) / math.pi) / 2.0
+    return fx, fy
+
+
+class HeatmapPyramid:
+    """
+    Precomputed heatmap rasters per layer for zooms min_zoom..max_zoom.
+
+    Each web-map tile that holds any weight gets a tile_size x tile_size
+    float32 raster of summed point weights; empty tiles are not stored.
+    Points are added and removed incrementally by key, and a background
+    job can replace a whole layer from the database now and then to pick
+    up changes nobody announced. Tiles are read back as uint8 (scaled to
+    the zoom level's peak) or float16.
+
+    Memory is tile_size^2 * 4 bytes per non-empty tile (4 KB at 32 x 32);
+    a point touches one tile per zoom level, so the cost is dominated by
+    max_zoom, where nearly every isolated point has a tile of its own.
+    """
+
+    def __init__(self, min_zoom=8, max_zoom=16, tile_size=32):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.tile_size = tile_size
+        # layer -> {'points': {key: (lng, lat, w)}, 'tiles': {(z, x, y): [raster, count, raster max]},
+        #           'peaks': {z: largest raster max at z, or None until recomputed}}
+        self.layers = {}
+        self.refreshed_at = {}
+        self.journals = {}      # layer -> updates made while a replace() is being prepared
+        self.lock = threading.Lock()
+        self.worker = None
+
+    def _empty_layer(self):
+        return {'points': {}, 'tiles': {}, 'peaks': {z: 0.0 for z in range(self.min_zoom, self.max_zoom + 1)}}
+
+    def _layer(self, layer):
+        if layer not in self.layers:
+            self.layers[layer] = self._empty_layer()
+        return self.layers[layer]
+
+    def _bins(self, lngs, lats, z):
+        """Tile and in-tile bin of each point at zoom z"""
+        fx, fy = mercator_fraction(lngs, lats)
+        scale = (2 ** z) * self.tile_size
+        px = np.minimum((fx * scale).astype(np.int64), scale - 1)
+        py = np.minimum((fy * scale).astype(np.int64), scale - 1)
+        return px // self.tile_size, py // self.tile_size, px % self.tile_size, py % self.tile_size
+
+    def _apply(self, data, lngs, lats, weights, sign):
+        """
+        Add (sign=1) or subtract (sign=-1) points at every zoom level; caller
+        holds the lock. Each touched tile's max is refreshed and the zoom
+        level's peak follows it: raised in place when a tile grows, marked
+        for recomputation (from the per-tile maxima) only when the tile
+        holding the peak shrinks.
+        """
+        lngs = np.asarray(lngs, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        weights = np.asarray(weights, dtype=np.float32) * sign
+        tiles = data['tiles']
+        peaks = data['peaks']
+
+        for z in range(self.min_zoom, self.max_zoom + 1):
+            tx, ty, bx, by = self._bins(lngs, lats, z)
+            tile_keys, inverse = np.unique(np.stack([tx, ty], axis=1), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+
+            for i, (x, y) in enumerate(tile_keys.tolist()):
+                members = inverse == i
+                key = (z, x, y)
+                entry = tiles.get(key)
+                if entry is None:
+                    entry = tiles[key] = [np.zeros((self.tile_size, self.tile_size), dtype=np.float32), 0, 0.0]
+                old_max = entry[2]
+                np.add.at(entry[0], (by[members], bx[members]), weights[members])
+                entry[1] += sign * int(members.sum())
+                if entry[1] <= 0:
+                    # Last point gone - drop the tile rather than keep rounding residue
+                    del tiles[key]
+                    new_max = 0.0
+                else:
+                    new_max = entry[2] = float(entry[0].max())
+
+                peak = peaks.get(z)
+                if peak is None:
+                    continue
+                if new_max >= old_max:
+                    peaks[z] = max(peak, new_max)
+                elif old_max >= peak:
+                    peaks[z] = None
+
+    def _set_point(self, data, layer, key, point):
+        """Store point under key (None removes it), adjusting the rasters; caller holds the lock"""
+        old = data['points'].pop(key, None)
+        if old is not None:
+            self._apply(data, [old[0]], [old[1]], [old[2]], -1)
+        if point is not None:
+            data['points'][key] = point
+            self._apply(data, [point[0]], [point[1]], [point[2]], 1)
+
+    def upsert(self, layer, key, lng, lat, weight):
+        """Add a point, or move/reweight the point already stored under key"""
+        with self.lock:
+            self._set_point(self._layer(layer), layer, key, (lng, lat, weight))
+            if layer in self.journals:
+                self.journals[layer].append((key, (lng, lat, weight)))
+
+    def remove(self, layer, key):
+        """Take a point out (e.g. an incident that was resolved)"""
+        with self.lock:
+            self._set_point(self._layer(layer), layer, key, None)
+            if layer in self.journals:
+                self.journals[layer].append((key, None))
+
+    def begin_replace(self, layer):
+        """Call before reading the rows for replace() so changes made meanwhile are not lost"""
+        with self.lock:
+            self.journals[layer] = []
+
+    def replace(self, layer, points):
+        """Rebuild a layer from (key, lng, lat, weight) rows in one vectorized pass"""
+        points = list(points)
+        data = self._empty_layer()
+        data['points'] = {key: (lng, lat, weight) for key, lng, lat, weight in points}
+        if points:
+            _, lngs, lats, weights = zip(*points)
+            # Built off to the side so readers are never blocked for long
+            self._apply(data, lngs, lats, weights, 1)
+        with self.lock:
+            # Replay updates that arrived after the rows were read
+            for key, point in self.journals.pop(layer, []):
+                self._set_point(data, layer, key, point)
+            self.layers[layer] = data
+            self.refreshed_at[layer] = time.time()
+
+    def peak(self, layer, z):
+        """Largest cell weight at a zoom level - the scale for uint8 tiles"""
+        with self.lock:
+            data = self.layers.get(layer)
+            if data is None:
+                return 0.0
+            peak = data['peaks'].get(z)
+            if peak is None:
+                peak = max((tile_max for (tz, _, _), (_, _, tile_max) in data['tiles'].items() if tz == z),
+                           default=0.0)
+                data['peaks'][z] = peak
+            return peak
+
+    def tile(self, layer, z, x, y, dtype='uint8'):
+        """Raster for one tile as a uint8 or float16 array, or None when it is empty"""
+        if not self.min_zoom <= z <= self.max_zoom:
+            raise ValueError(f'zoom must be between {self.min_zoom} and {self.max_zoom}')
+        with self.lock:
+            entry = self.layers.get(layer, {}).get('tiles', {}).get((z, x, y))
+            raster = entry[0].copy() if entry is not None else None
+        if raster is None:
+            return None
+
+        np.maximum(raster, 0, out=raster)
+        if dtype == 'float16':
+            return raster.astype('<f2')
+        peak = self.peak(layer, z)
+        if peak <= 0:
+            return np.zeros(raster.shape, dtype=np.uint8)
+        return np.round(raster * (255.0 / peak)).astype(np.uint8)
+
+    def start(self, refresh, interval_seconds):
+        """Run refresh() now and then every interval_seconds on a daemon thread"""
+        if self.worker is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    refresh()
+                except Exception as e:
+                    print(f"Heatmap pyramid refresh failed: {e}")
+                time.sleep(interval_seconds)
+
+        self.worker = threading.Thread(target=run, name='heatmap-pyramid', daemon=True)
+        self.worker.start()
+
+    def stats(self):
+        with self.lock:
+            layers = {}
+            for layer, data in self.layers.items():
+                per_zoom = {}
+                for z, _, _ in data['tiles']:
+                    per_zoom[z] = per_zoom.get(z, 0) + 1
+                layers[layer] = {
+                    'points': len(data['points']),
+                    'tiles': len(data['tiles']),
+                    'tiles_per_zoom': per_zoom,
+                    'bytes': len(data['tiles']) * self.tile_size * self.tile_size * 4,
+                    'refreshed_at': self.refreshed_at.get(layer)
+                }
+            return {
+                'min_zoom': self.min_zoom,
+                'max_zoom': self.max_zoom,
+                'tile_size': self.tile_size,
+                'layers': layers
+            }
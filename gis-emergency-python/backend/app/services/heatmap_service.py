@@ -1,8 +1,12 @@
 # backend/app/services/heatmap_service.py
+import math
 import numpy as np
 from datetime import datetime
 import random
 
+TILE_SIZE = 256          # Web-map tile width in pixels
+MAX_GRID_CELLS = 256     # Upper bound on grid columns and rows
+
 # Don't import from models here - keep services independent
 class HeatmapService:
     @staticmethod
@@ -51,4 +55,69 @@ class HeatmapService:
                 'count': int(density * 500)
             })
         
-        return heatmap_data
\ No newline at end of file
+        return heatmap_data
+
+    @staticmethod
+    def grid_for_zoom(bbox, zoom, cell_pixels=16, max_cells=MAX_GRID_CELLS):
+        """
+        Grid layout for a bbox at a web-map zoom level: cells are about
+        cell_pixels screen pixels wide, widened if the bbox would need more
+        than max_cells columns or rows. Returns (cell_lng, cell_lat, cols, rows).
+        """
+        min_lng, min_lat, max_lng, max_lat = bbox
+        width = max(max_lng - min_lng, 1e-9)
+        height = max(max_lat - min_lat, 1e-9)
+
+        cell_lng = cell_pixels * 360.0 / (TILE_SIZE * 2 ** zoom)
+        # Mercator stretches latitude; keep cells roughly square on screen
+        lat_scale = math.cos(math.radians((min_lat + max_lat) / 2))
+        cell_lng = max(cell_lng, width / max_cells, height / (max_cells * lat_scale))
+        cell_lat = cell_lng * lat_scale
+
+        cols = min(max_cells, math.ceil(width / cell_lng))
+        rows = min(max_cells, math.ceil(height / cell_lat))
+        return cell_lng, cell_lat, cols, rows
+
+    @staticmethod
+    def fill_grid(col_idx, row_idx, weights, cols, rows):
+        """Add weights at (col, row) cell indices into a rows x cols grid; indices outside it are ignored"""
+        col_idx = np.asarray(col_idx, dtype=float)
+        row_idx = np.asarray(row_idx, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        inside = (col_idx >= 0) & (col_idx < cols) & (row_idx >= 0) & (row_idx < rows)
+
+        grid = np.zeros((rows, cols))
+        np.add.at(grid, (row_idx[inside].astype(int), col_idx[inside].astype(int)), weights[inside])
+        return grid
+
+    @staticmethod
+    def smooth_grid(grid, sigma):
+        """Separable Gaussian blur; sigma is in grid cells"""
+        if sigma <= 0:
+            return grid
+        radius = max(1, int(math.ceil(3 * sigma)))
+        offsets = np.arange(-radius, radius + 1)
+        kernel = np.exp(-offsets ** 2 / (2 * sigma ** 2))
+        kernel /= kernel.sum()
+
+        smoothed = np.apply_along_axis(np.convolve, 0, grid, kernel, mode='same')
+        return np.apply_along_axis(np.convolve, 1, smoothed, kernel, mode='same')
+
+    @staticmethod
+    def grid_to_heatmap(grid, bbox, cell_lng, cell_lat, threshold=0.01):
+        """
+        Sparse [lat, lng, weight] triples at the centres of non-empty cells,
+        weights normalized to 0..1. Cells under threshold * max are dropped.
+        """
+        peak = float(grid.max()) if grid.size else 0.0
+        if peak <= 0:
+            return []
+        min_lng, min_lat = bbox[0], bbox[1]
+        rows, cols = np.nonzero(grid >= peak * threshold)
+        lats = min_lat + (rows + 0.5) * cell_lat
+        lngs = min_lng + (cols + 0.5) * cell_lng
+        weights = grid[rows, cols] / peak
+        return [
+            [round(lat, 6), round(lng, 6), round(weight, 4)]
+            for lat, lng, weight in zip(lats.tolist(), lngs.tolist(), weights.tolist())
+        ]
@@ -0,0 +1,135 @@
+# backend/app/services/history_buffer.py
+import threading
+
+import numpy as np
+
+
+class CameraHistory:
+    """
+    Fixed-length reading history for many cameras in one preallocated array.
+
+    Each camera owns a row of 2 * window float64 slots and every reading is
+    written twice (at pos and pos + window), so the latest `window` readings
+    are always the contiguous slice row[pos:pos + window]. Appends are O(1)
+    and recent() returns a view - no list slicing, no array rebuilds.
+
+    Alongside the raw readings each row keeps an exponentially weighted
+    mean and variance, updated in O(1) per reading (Welford-style
+    incremental form), for baselines that need no window at all.
+
+    Memory is fixed per camera: 2 * window * 8 bytes of readings plus two
+    int64 counters and two float64 EWMA moments, i.e. 832 bytes at the
+    default window of 50 (about 8 MB for 10,000 cameras). Rows are
+    allocated in blocks that double as cameras are added; removed cameras'
+    rows are reused.
+    """
+
+    def __init__(self, window=50, capacity=64, ewma_alpha=0.3):
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.values = np.zeros((capacity, 2 * window), dtype=np.float64)
+        self.pos = np.zeros(capacity, dtype=np.int64)      # next write slot per row
+        self.filled = np.zeros(capacity, dtype=np.int64)   # readings stored, up to window
+        self.ewma_mean = np.zeros(capacity, dtype=np.float64)
+        self.ewma_var = np.zeros(capacity, dtype=np.float64)
+        self.rows = {}          # camera key -> row
+        self.free_rows = list(range(capacity - 1, -1, -1))
+        self.lock = threading.Lock()
+
+    @property
+    def bytes_per_camera(self):
+        return (self.values.itemsize * 2 * self.window + self.pos.itemsize + self.filled.itemsize
+                + self.ewma_mean.itemsize + self.ewma_var.itemsize)
+
+    def _grow(self):
+        capacity = len(self.pos)
+        self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+        self.pos = np.concatenate([self.pos, np.zeros(capacity, dtype=np.int64)])
+        self.filled = np.concatenate([self.filled, np.zeros(capacity, dtype=np.int64)])
+        self.ewma_mean = np.concatenate([self.ewma_mean, np.zeros(capacity)])
+        self.ewma_var = np.concatenate([self.ewma_var, np.zeros(capacity)])
+        self.free_rows.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def add(self, key):
+        """Give a camera an empty row (no-op if it already has one)"""
+        with self.lock:
+            if key not in self.rows:
+                if not self.free_rows:
+                    self._grow()
+                row = self.free_rows.pop()
+                self.pos[row] = 0
+                self.filled[row] = 0
+                self.rows[key] = row
+            return self.rows[key]
+
+    def remove(self, key):
+        with self.lock:
+            row = self.rows.pop(key, None)
+            if row is not None:
+                self.free_rows.append(row)
+
+    def append(self, key, value):
+        if key not in self.rows:
+            self.add(key)
+        with self.lock:
+            row = self.rows[key]
+            pos = self.pos[row]
+            self.values[row, pos] = value
+            self.values[row, pos + self.window] = value
+            self.pos[row] = (pos + 1) % self.window
+            if self.filled[row] == 0:
+                self.ewma_mean[row] = value
+                self.ewma_var[row] = 0.0
+            else:
+                delta = value - self.ewma_mean[row]
+                self.ewma_mean[row] += self.ewma_alpha * delta
+                self.ewma_var[row] = (1 - self.ewma_alpha) * (self.ewma_var[row] + self.ewma_alpha * delta * delta)
+            if self.filled[row] < self.window:
+                self.filled[row] += 1
+
+    def recent(self, key, n=None):
+        """
+        View of the camera's last n readings, oldest first (fewer if it has
+        fewer). The view is overwritten by later appends - copy it to keep it.
+        """
+        row = self.rows.get(key)
+        if row is None:
+            return self.values[0, :0]
+        filled = int(self.filled[row])
+        n = filled if n is None else min(n, filled)
+        end = self.pos[row] + self.window
+        return self.values[row, end - n:end]
+
+    def last(self, key):
+        """Most recent reading, or None before the first one"""
+        row = self.rows.get(key)
+        if row is None or not self.filled[row]:
+            return None
+        return self.values[row, self.pos[row] + self.window - 1]
+
+    def window_matrix(self, keys, n):
+        """
+        Last n readings of every camera in keys as one (len(keys), n) array,
+        oldest first, plus how many readings each camera really has (rows
+        with fewer than n are padded at the front with stale slots).
+        """
+        with self.lock:
+            rows = np.fromiter((self.rows[key] for key in keys), dtype=np.int64, count=len(keys))
+            columns = self.pos[rows, None] + (self.window - n) + np.arange(n)
+            return self.values[rows[:, None], columns], np.minimum(self.filled[rows], n)
+
+    def ewma_stats(self, keys):
+        """EWMA mean, standard deviation and reading count for every camera in keys"""
+        with self.lock:
+            rows = np.fromiter((self.rows[key] for key in keys), dtype=np.int64, count=len(keys))
+            return self.ewma_mean[rows], np.sqrt(self.ewma_var[rows]), self.filled[rows].copy()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def length(self, key):
+        row = self.rows.get(key)
+        return 0 if row is None else int(self.filled[row])
@@ -0,0 +1,111 @@
+# backend/app/services/incident_index.py
+import math
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class IncidentIndex:
+    """
+    Process-local spatio-temporal index of recent incidents.
+    Points are bucketed into roughly square grid cells (cell_size_m wide) and kept
+    for window_minutes, so "how many reports within R meters in the last
+    T minutes" only looks at a handful of cells instead of the whole table.
+    """
+
+    def __init__(self, cell_size_m=1000, window_minutes=30):
+        self.cell_size_m = cell_size_m
+        self.window = timedelta(minutes=window_minutes)
+        self.cells = defaultdict(dict)  # (row, col) -> {incident_id: (lat, lng, reported_at)}
+        self.entries = deque()          # (reported_at, incident_id, cell) in insertion order
+        self.lock = threading.Lock()
+
+    def _row(self, lat):
+        """Latitude band of a point"""
+        return int(math.radians(lat) * EARTH_RADIUS_M // self.cell_size_m)
+
+    def _row_scale(self, row):
+        """Meters per radian of longitude along the middle of a latitude band"""
+        mid_lat = (row + 0.5) * self.cell_size_m / EARTH_RADIUS_M
+        return EARTH_RADIUS_M * math.cos(mid_lat)
+
+    def _col(self, lng, row):
+        return int(math.radians(lng) * self._row_scale(row) // self.cell_size_m)
+
+    def _cell(self, lat, lng):
+        """Grid cell of a point: latitude bands, each cut into cell_size_m wide columns"""
+        row = self._row(lat)
+        return row, self._col(lng, row)
+
+    @staticmethod
+    def distance_m(lat1, lng1, lat2, lng2):
+        """Haversine distance in meters"""
+        phi1, phi2 = math.radians(lat1), math.radians(lat2)
+        dphi = phi2 - phi1
+        dlmb = math.radians(lng2 - lng1)
+        a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+        return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+    def insert(self, incident_id, lat, lng, reported_at=None):
+        """Add an incident to the index"""
+        reported_at = reported_at or datetime.utcnow()
+        cell = self._cell(lat, lng)
+        with self.lock:
+            self.cells[cell][incident_id] = (lat, lng, reported_at)
+            self.entries.append((reported_at, incident_id, cell))
+            self._evict(datetime.utcnow())
+
+    def _evict(self, now):
+        """Drop incidents older than the index window (lock must be held)"""
+        cutoff = now - self.window
+        while self.entries and self.entries[0][0] < cutoff:
+            _, incident_id, cell = self.entries.popleft()
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.pop(incident_id, None)
+                if not bucket:
+                    del self.cells[cell]
+
+    def nearby(self, lat, lng, radius_m, window_minutes=None, now=None):
+        """Ids of incidents within radius_m meters reported in the last window_minutes"""
+        now = now or datetime.utcnow()
+        window = timedelta(minutes=window_minutes) if window_minutes is not None else self.window
+        cutoff = now - min(window, self.window)
+
+        y = math.radians(lat) * EARTH_RADIUS_M
+        first_row = int((y - radius_m) // self.cell_size_m)
+        last_row = int((y + radius_m) // self.cell_size_m)
+
+        matches = []
+        with self.lock:
+            self._evict(now)
+            for row in range(first_row, last_row + 1):
+                x = math.radians(lng) * self._row_scale(row)
+                # Longitude spans more meters at the band edge nearest the equator
+                reach = radius_m * 1.05
+                for col in range(int((x - reach) // self.cell_size_m), int((x + reach) // self.cell_size_m) + 1):
+                    bucket = self.cells.get((row, col))
+                    if not bucket:
+                        continue
+                    for incident_id, (p_lat, p_lng, reported_at) in bucket.items():
+                        if reported_at >= cutoff and self.distance_m(lat, lng, p_lat, p_lng) <= radius_m:
+                            matches.append(incident_id)
+        return matches
+
+    def count(self, lat, lng, radius_m, window_minutes=None, now=None):
+        """Number of incidents within radius_m meters in the last window_minutes"""
+        return len(self.nearby(lat, lng, radius_m, window_minutes, now))
+
+    def rebuild(self, rows):
+        """Replace the index contents with (incident_id, lat, lng, reported_at) rows"""
+        with self.lock:
+            self.cells.clear()
+            self.entries.clear()
+        for incident_id, lat, lng, reported_at in sorted(rows, key=lambda row: row[3] or datetime.min):
+            if lat is not None and lng is not None:
+                self.insert(incident_id, lat, lng, reported_at)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,86 @@
+# backend/app/services/micro_batcher.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Groups single-item calls from many threads into batches for a function
+    that is cheaper per item on a batch (e.g. model inference).
+
+    A worker thread takes the first waiting item, then keeps collecting
+    until it has max_batch_size items or max_wait_ms have passed since that
+    first item, and calls batch_fn(items) once; batch_fn must return one
+    result per item, in order. Under light load an item waits at most
+    max_wait_ms; under heavy load batches fill up and the wait disappears.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=5, name='micro-batcher'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = {}       # batch size -> how many batches had it
+        self.worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self.worker.start()
+
+    def submit(self, item):
+        """Queue an item; the Future resolves to its result"""
+        future = Future()
+        self.pending.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Run one item through the next batch and wait for its result"""
+        return self.submit(item).result(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self.pending.get(timeout=remaining))
+                    else:
+                        batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = list(self.batch_fn(items))
+            if len(results) != len(batch):
+                # zip() would leave the futures past the end waiting forever
+                raise RuntimeError(f'batch_fn returned {len(results)} results for {len(batch)} items')
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        with self.lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': round(self.items / self.batches, 2) if self.batches else None,
+                'batch_sizes': dict(sorted(self.batch_sizes.items())),
+                'queued': self.pending.qsize()
+            }
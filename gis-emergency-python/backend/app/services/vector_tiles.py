@@ -0,0 +1,307 @@
+# backend/app/services/vector_tiles.py
+import math
+import os
+import shutil
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MAX_TILE_ZOOM = 22
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# Layers served as Mapbox Vector Tiles: source table, point column,
+# attribute columns and row filter
+TILE_LAYERS = {
+    'incidents': {
+        'table': 'incidents',
+        'geometry': 'location',
+        'columns': 't.id, t.incident_type AS type, t.severity, t.severity_score, t.status, t.reported_at::text AS reported_at',
+        'where': "t.status = 'active'"
+    },
+    'resources': {
+        'table': 'resources',
+        'geometry': 'current_location',
+        'columns': 't.id, t.resource_type AS type, t.status, t.capacity',
+        'where': 'TRUE'
+    },
+    'crowd_locations': {
+        'table': 'crowd_locations',
+        'geometry': 'location',
+        'columns': 't.id, t.location_id, t.name',
+        'where': 't.is_active'
+    }
+}
+
+
+def tile_query(layer):
+    """
+    SQL that renders one layer's features inside tile (:z, :x, :y) as an MVT.
+    Rows are picked with the 4326 bbox of the tile so the GIST index is used.
+    """
+    spec = TILE_LAYERS[layer]
+    return f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS merc
+        ),
+        features AS (
+            SELECT ST_AsMVTGeom(ST_Transform(t.{spec['geometry']}, 3857), bounds.merc,
+                                {TILE_EXTENT}, {TILE_BUFFER}, true) AS geom,
+                   {spec['columns']}
+            FROM {spec['table']} t, bounds
+            WHERE t.{spec['geometry']} && ST_Transform(bounds.merc, 4326)
+              AND {spec['where']}
+        )
+        SELECT ST_AsMVT(features, '{layer}', {TILE_EXTENT}, 'geom') FROM features
+    """
+
+
+def tiles_for_point(lng, lat, min_zoom=0, max_zoom=MAX_TILE_ZOOM):
+    """(z, x, y) of every tile containing a point - two tiles when it sits on an edge"""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    fx = (lng + 180.0) / 360.0
+    fy = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+
+    tiles = []
+    for z in range(min_zoom, max_zoom + 1):
+        n = 2 ** z
+        x = min(int(fx * n), n - 1)
+        y = min(int(fy * n), n - 1)
+        tiles.append((z, x, y))
+        # A point exactly on a tile border is in both tiles' envelopes
+        if x > 0 and fx * n == x:
+            tiles.append((z, x - 1, y))
+        if y > 0 and fy * n == y:
+            tiles.append((z, x, y - 1))
+    return tiles
+
+
+class TileCache:
+    """
+    Rendered tiles kept in an in-memory LRU, spilling to an optional disk
+    directory. Entries are dropped per tile when a feature inside them changes
+    in this process (invalidate_point), and per layer when sync() sees the
+    layer's table written by anyone else. Commits made inside own_write() are
+    this process's and do not count as anyone else's.
+
+    Processes sharing a directory each spill into their own
+    <hostname>-<pid> subdirectory, so none wipes or serves another's tiles.
+    """
+
+    def __init__(self, max_tiles=2048, directory=None, check_seconds=2.0):
+        self.max_tiles = max_tiles
+        self.base_directory = directory
+        self.directory = None         # this process's subdirectory, made on first put
+        self.check_seconds = check_seconds
+        self.memory = OrderedDict()   # (layer, z, x, y) -> bytes
+        self.on_disk = set()
+        self.layer_versions = {}      # layer -> table change counter its tiles were rendered at
+        self.own_writes = {}          # layer -> own commits since the last sync
+        self.writing = 0              # own commits in progress
+        self.write_starts = 0
+        self.checked_at = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = 0           # bumped on every invalidation
+        self.lock = threading.Lock()
+        self.directory_lock = threading.Lock()
+        if directory:
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A forked worker keeps the tiles in memory but spills to a directory of its own
+        self.lock = threading.Lock()
+        self.directory_lock = threading.Lock()
+        self.directory = None
+        self.on_disk = set()
+        self.writing = 0
+
+    def _disk_directory(self):
+        with self.directory_lock:
+            if self.directory is None:
+                host = socket.gethostname()
+                directory = os.path.join(self.base_directory, f"{host}-{os.getpid()}")
+                # Left by an earlier process with this pid - may predate edits made since
+                shutil.rmtree(directory, ignore_errors=True)
+                os.makedirs(directory, exist_ok=True)
+                _remove_exited_process_directories(self.base_directory, host)
+                self.directory = directory
+            return self.directory
+
+    def sync(self, layer_versions):
+        """
+        At most every check_seconds, call layer_versions() -> {layer: change
+        counter of its table} and drop every cached tile of the layers whose
+        counter moved by more than this process's own_write() commits since
+        the last check. This catches writes that publish no event here: other
+        processes, scripts, manual edits.
+        """
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < self.check_seconds:
+            return
+        with self.lock:
+            # A commit in progress may already have moved its counter
+            # without being counted as ours yet - check on a later request
+            if self.writing:
+                return
+            write_starts = self.write_starts
+        self.checked_at = now
+        versions = layer_versions()
+
+        with self.lock:
+            if self.writing or self.write_starts != write_starts:
+                self.checked_at = None
+                return
+            stale = []
+            for layer, version in versions.items():
+                own = self.own_writes.pop(layer, 0)
+                if version - self.layer_versions.get(layer, version) > own:
+                    stale.append(layer)
+                self.layer_versions[layer] = version
+        for layer in stale:
+            self.clear(layer)
+
+    @contextmanager
+    def own_write(self, layer):
+        """
+        Wrap the commit of a write to layer's table whose changed features
+        this process invalidates itself (invalidate_point). The counter move
+        it causes then does not make sync() clear the whole layer.
+        """
+        with self.lock:
+            self.writing += 1
+            self.write_starts += 1
+        committed = False
+        try:
+            yield
+            committed = True
+        finally:
+            with self.lock:
+                self.writing -= 1
+                if committed:
+                    self.own_writes[layer] = self.own_writes.get(layer, 0) + 1
+
+    def _path(self, key):
+        layer, z, x, y = key
+        return os.path.join(self.directory, layer, str(z), str(x), f"{y}.mvt")
+
+    def get(self, layer, z, x, y):
+        key = (layer, z, x, y)
+        with self.lock:
+            tile = self.memory.get(key)
+            if tile is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return tile
+            on_disk = key in self.on_disk
+
+        if on_disk:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    tile = f.read()
+            except OSError:
+                tile = None
+            if tile is not None:
+                with self.lock:
+                    self.hits += 1
+                    self._remember(key, tile)
+                return tile
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, layer, z, x, y, tile, generation=None):
+        """
+        Store a rendered tile. Pass the generation read before rendering: if
+        anything was invalidated since, the tile may be stale and is not kept.
+        """
+        key = (layer, z, x, y)
+        if generation is not None and generation != self.generation:
+            return
+        if self.base_directory:
+            self._disk_directory()
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(tile)
+            os.replace(temp_path, path)
+
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            if self.base_directory:
+                self.on_disk.add(key)
+            self._remember(key, tile)
+
+    def _remember(self, key, tile):
+        self.memory[key] = tile
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_tiles:
+            self.memory.popitem(last=False)
+
+    def invalidate_point(self, layer, lng, lat):
+        """Drop the cached tiles of a layer that contain a changed feature"""
+        stale_files = []
+        with self.lock:
+            self.generation += 1
+            for z, x, y in tiles_for_point(lng, lat):
+                key = (layer, z, x, y)
+                if self.memory.pop(key, None) is not None:
+                    self.invalidations += 1
+                if key in self.on_disk:
+                    self.on_disk.discard(key)
+                    stale_files.append(self._path(key))
+
+        for path in stale_files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self, layer=None):
+        with self.lock:
+            self.generation += 1
+            keys = [key for key in self.memory if layer is None or key[0] == layer]
+            for key in keys:
+                del self.memory[key]
+            disk_keys = {key for key in self.on_disk if layer is None or key[0] == layer}
+            self.on_disk -= disk_keys
+
+        for key in disk_keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            return {
+                'memory_tiles': len(self.memory),
+                'disk_tiles': len(self.on_disk),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations
+            }
+
+
+def _remove_exited_process_directories(base_directory, host):
+    """Drop the tile directories of this host's processes that are no longer running"""
+    try:
+        names = os.listdir(base_directory)
+    except OSError:
+        return
+    for name in names:
+        name_host, _, pid = name.rpartition('-')
+        if name_host != host or not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            shutil.rmtree(os.path.join(base_directory, name), ignore_errors=True)
+        except OSError:
+            pass  # running, under another user
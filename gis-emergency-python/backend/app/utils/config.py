@@ -17,4 +17,71 @@ class Config:
     USGS_API_KEY = os.getenv('USGS_API_KEY')
     
     # SRID for spatial data
-    SRID = 4326
\ No newline at end of file
+    SRID = 4326
+
+    # Incident ingestion
+    MAX_BATCH_REPORTS = int(os.getenv('MAX_BATCH_REPORTS', 5000))
+
+    # Duplicate-call detection (reports this close in space and time count as the same incident)
+    DUPLICATE_RADIUS_METERS = float(os.getenv('DUPLICATE_RADIUS_METERS', 1000))
+    DUPLICATE_WINDOW_MINUTES = int(os.getenv('DUPLICATE_WINDOW_MINUTES', 30))
+
+    # Live event stream (/api/stream)
+    STREAM_HISTORY_SIZE = int(os.getenv('STREAM_HISTORY_SIZE', 1000))
+    STREAM_CLIENT_BUFFER = int(os.getenv('STREAM_CLIENT_BUFFER', 100))
+    STREAM_HEARTBEAT_SECONDS = int(os.getenv('STREAM_HEARTBEAT_SECONDS', 15))
+
+    # Server-side heatmap grid: target cell width in screen pixels
+    HEATMAP_CELL_PIXELS = int(os.getenv('HEATMAP_CELL_PIXELS', 16))
+
+    # Camera polling (0 interval disables the background sweep)
+    CAMERA_POLL_INTERVAL_SECONDS = int(os.getenv('CAMERA_POLL_INTERVAL_SECONDS', 0))
+    CAMERA_POLL_WORKERS = int(os.getenv('CAMERA_POLL_WORKERS', 16))
+    CAMERA_POLL_TIMEOUT_SECONDS = float(os.getenv('CAMERA_POLL_TIMEOUT_SECONDS', 5))
+
+    # Precomputed heatmap pyramid (0 disables the background refresh)
+    HEATMAP_PYRAMID_MIN_ZOOM = int(os.getenv('HEATMAP_PYRAMID_MIN_ZOOM', 8))
+    HEATMAP_PYRAMID_MAX_ZOOM = int(os.getenv('HEATMAP_PYRAMID_MAX_ZOOM', 16))
+    HEATMAP_PYRAMID_TILE_SIZE = int(os.getenv('HEATMAP_PYRAMID_TILE_SIZE', 32))
+    HEATMAP_PYRAMID_REFRESH_SECONDS = int(os.getenv('HEATMAP_PYRAMID_REFRESH_SECONDS', 300))
+
+    # Vector tile cache: tiles kept in memory, plus an optional spill directory
+    TILE_CACHE_SIZE = int(os.getenv('TILE_CACHE_SIZE', 2048))
+    TILE_CACHE_DIR = os.getenv('TILE_CACHE_DIR')
+    # How often cached tiles are checked against every write to their tables (other processes, scripts)
+    TILE_CACHE_CHECK_SECONDS = float(os.getenv('TILE_CACHE_CHECK_SECONDS', 2))
+
+    # Request bodies (Flask rejects anything larger with 413)
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 32 * 1024 * 1024))
+
+    # Frame uploads to /api/crowd/detect: per-frame size limit, frames read
+    # and analysed at once, and how long a request waits for a slot before 503
+    CROWD_FRAME_MAX_BYTES = int(os.getenv('CROWD_FRAME_MAX_BYTES', 8 * 1024 * 1024))
+    CROWD_DETECT_MAX_CONCURRENT = int(os.getenv('CROWD_DETECT_MAX_CONCURRENT', 4))
+    CROWD_DETECT_WAIT_SECONDS = float(os.getenv('CROWD_DETECT_WAIT_SECONDS', 0.5))
+
+    # Per-camera cache of frame analyses keyed by perceptual hash (0 size disables);
+    # frames within FRAME_CACHE_MAX_DISTANCE differing hash bits count as the same
+    FRAME_CACHE_SIZE = int(os.getenv('FRAME_CACHE_SIZE', 1024))
+    FRAME_CACHE_MAX_DISTANCE = int(os.getenv('FRAME_CACHE_MAX_DISTANCE', 4))
+
+    # Cells per side of crowd density maps (at most 256)
+    DENSITY_MAP_RESOLUTION = int(os.getenv('DENSITY_MAP_RESOLUTION', 32))
+
+    # Crowd counting: 'heuristic' (brightness statistics) or 'onnx' (ONNX Runtime
+    # on the CPU; the bundled test model unless COUNTING_MODEL_PATH is set).
+    # Requests are grouped into batches of up to COUNTING_MAX_BATCH frames,
+    # waiting at most COUNTING_MAX_WAIT_MS; 0 threads means one per core. A frame
+    # whose batch has not finished after COUNTING_TIMEOUT_SECONDS fails
+    COUNTING_BACKEND = os.getenv('COUNTING_BACKEND', 'heuristic')
+    COUNTING_MODEL_PATH = os.getenv('COUNTING_MODEL_PATH')
+    COUNTING_THREADS = int(os.getenv('COUNTING_THREADS', 0))
+    COUNTING_MAX_BATCH = int(os.getenv('COUNTING_MAX_BATCH', 8))
+    COUNTING_MAX_WAIT_MS = float(os.getenv('COUNTING_MAX_WAIT_MS', 5))
+    COUNTING_TIMEOUT_SECONDS = float(os.getenv('COUNTING_TIMEOUT_SECONDS', 10))
+
+    # Batch detection: worker processes and frames per request. 0 analyses
+    # batches in the request thread; set it (e.g. to the core count) to fork
+    # a pool of that many workers when the app is created
+    CROWD_DETECT_PROCESSES = int(os.getenv('CROWD_DETECT_PROCESSES', 0))
+    MAX_BATCH_FRAMES = int(os.getenv('MAX_BATCH_FRAMES', 32))
\ No newline at end of file
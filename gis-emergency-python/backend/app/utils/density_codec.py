@@ -0,0 +1,46 @@
+# backend/app/utils/density_codec.py
+import base64
+import zlib
+
+import numpy as np
+
+MAX_DENSITY_RESOLUTION = 256
+
+
+def encode_density_map(grid, max_density=None, compress=True):
+    """
+    Compact JSON-safe form of a square density grid: values quantized to
+    uint8 against the grid's peak (kept as 'scale'), optionally zlib
+    compressed, then base64. A smooth 256 x 256 map is a few KB instead of
+    the ~1 MB a nested list of floats takes.
+    """
+    grid = np.asarray(grid, dtype=np.float32)
+    scale = float(grid.max()) if grid.size else 0.0
+    if scale > 0:
+        quantized = np.round(grid * (255.0 / scale)).astype(np.uint8)
+    else:
+        quantized = np.zeros(grid.shape, dtype=np.uint8)
+
+    data = quantized.tobytes()
+    if compress:
+        data = zlib.compress(data, 6)
+    return {
+        'resolution': grid.shape[0],
+        'max_density': scale if max_density is None else max_density,
+        'scale': scale,
+        'encoding': 'uint8+zlib' if compress else 'uint8',
+        'data': base64.b64encode(data).decode('ascii')
+    }
+
+
+def decode_density_map(encoded):
+    """float32 grid back from encode_density_map output (or a legacy {'grid': [...]} map)"""
+    if 'data' not in encoded:
+        return np.asarray(encoded.get('grid') or [], dtype=np.float32)
+
+    data = base64.b64decode(encoded['data'])
+    if encoded.get('encoding') == 'uint8+zlib':
+        data = zlib.decompress(data)
+    resolution = encoded['resolution']
+    quantized = np.frombuffer(data, dtype=np.uint8).reshape(resolution, resolution)
+    return quantized.astype(np.float32) * np.float32(encoded['scale'] / 255.0)
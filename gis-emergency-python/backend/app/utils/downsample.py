@@ -0,0 +1,54 @@
+# backend/app/utils/downsample.py
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points of the series
+    (x ascending) that best preserve its visual shape. The first and last
+    points are always kept; every bucket in between contributes the point
+    forming the largest triangle with the previous pick and the mean of the
+    next bucket. Areas are computed per bucket in NumPy, so the Python loop
+    runs n_out times regardless of the series length.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    bounds = np.append((np.arange(n_out - 1) * every).astype(np.int64) + 1, n)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = bounds[i], bounds[i + 1]
+        next_end = bounds[i + 2]
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_indices(x, y, max_points, keep=None):
+    """
+    Sorted indices of at most max_points points chosen by LTTB, plus every
+    point flagged in keep (e.g. anomalies), which are never dropped - if
+    there are more of those than max_points all of them are still returned.
+    """
+    n = len(x)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool) if keep is None else np.asarray(keep, dtype=bool)
+
+    budget = max_points - int(keep.sum())
+    if budget >= 3:
+        chosen = lttb_indices(x, y, budget)
+    else:
+        chosen = np.array([0, n - 1]) if budget >= 2 else np.empty(0, dtype=np.int64)
+    return np.union1d(chosen, np.flatnonzero(keep))
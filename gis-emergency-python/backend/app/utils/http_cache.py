@@ -0,0 +1,40 @@
+# backend/app/utils/http_cache.py
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+
+
+def make_etag(*parts):
+    """Strong ETag for a response identified by parts"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def etag_cached(versions):
+    """
+    Answer conditional GETs with 304 Not Modified while the data behind a
+    view is unchanged. versions() returns something cheap that changes
+    whenever the data does (e.g. per-table change counters); the view itself
+    - its queries and JSON encoding - only runs when the client's copy is stale.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                etag = make_etag(request.full_path, versions())
+            except Exception:
+                return view(*args, **kwargs)
+
+            if etag in request.if_none_match:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # Let browsers keep the body but revalidate it on every poll
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
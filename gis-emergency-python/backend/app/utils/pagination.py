@@ -0,0 +1,60 @@
+# backend/app/utils/pagination.py
+import base64
+import json
+from datetime import datetime
+
+
+def parse_limit(value, default=500, maximum=5000):
+    """Page size from a query-string value, clamped to 1..maximum"""
+    if value in (None, ''):
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def parse_bbox(value):
+    """Parse 'min_lng,min_lat,max_lng,max_lat' into a tuple of floats"""
+    if not value:
+        return None
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be min_lng,min_lat,max_lng,max_lat')
+    min_lng, min_lat, max_lng, max_lat = parts
+    if min_lng > max_lng or min_lat > max_lat:
+        raise ValueError('bbox minimums must not exceed maximums')
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def parse_fields(value):
+    """Comma separated field names to keep, or None for everything"""
+    if not value:
+        return None
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+def project(data, fields):
+    """Keep only the requested keys of a serialized row"""
+    if not fields:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
+
+
+def encode_cursor(*values):
+    """Opaque cursor for the last row of a page"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Values stored by encode_cursor (datetimes come back as ISO strings)"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise ValueError('Invalid cursor')
+
+
+def project_feature(feature, fields):
+    """Keep only the requested properties of a GeoJSON feature"""
+    if fields:
+        feature['properties'] = project(feature['properties'], fields)
+    return feature
@@ -0,0 +1,31 @@
+# backend/app/utils/query_counter.py
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Counts SQL statements sent to the database by the current thread"""
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self.thread_id:
+            self.count += 1
+            self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    """Count every statement executed on engine inside the with block"""
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
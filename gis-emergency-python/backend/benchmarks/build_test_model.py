@@ -0,0 +1,72 @@
+# backend/benchmarks/build_test_model.py
+"""
+Build the small ONNX crowd counting model bundled for tests and benchmarks
+(app/assets/crowd_counter_test.onnx).
+
+It is NOT a trained model: two convolutions with fixed random weights, so
+counts follow the amount of texture/edges in a frame. It has the shape of
+a real density-map counter - (N, 1, 128, 128) grayscale in, (N, 1, 16, 16)
+density out, dynamic batch axis - so the inference path, micro-batching
+and thread settings can be exercised without shipping a real model.
+
+    pip install onnx
+    python benchmarks/build_test_model.py
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.counting_models import BUNDLED_MODEL_PATH
+
+INPUT_SIZE = 128
+FILTERS = 8
+POOL = 8
+# About one count per person-sized blob in the benchmark's synthetic scenes
+OUTPUT_SCALE = 4.0
+
+
+def build(path=BUNDLED_MODEL_PATH):
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    # Zero-mean 3x3 kernels respond to edges, not to flat brightness
+    edge_kernels = rng.normal(0, 1, (FILTERS, 1, 3, 3)).astype(np.float32)
+    edge_kernels -= edge_kernels.mean(axis=(2, 3), keepdims=True)
+    mix = (np.abs(rng.normal(0, 1, (1, FILTERS, 1, 1))) * OUTPUT_SCALE).astype(np.float32)
+
+    nodes = [
+        # Edge padding, so the frame border does not read as an edge
+        helper.make_node('Pad', ['frames', 'pads'], ['padded'], mode='edge'),
+        helper.make_node('Conv', ['padded', 'edge_kernels'], ['edges']),
+        helper.make_node('Relu', ['edges'], ['edges_relu']),
+        helper.make_node('AveragePool', ['edges_relu'], ['pooled'], kernel_shape=[POOL, POOL], strides=[POOL, POOL]),
+        helper.make_node('Conv', ['pooled', 'mix'], ['mixed']),
+        helper.make_node('Relu', ['mixed'], ['density'])
+    ]
+    out_size = INPUT_SIZE // POOL
+    graph = helper.make_graph(
+        nodes,
+        'crowd_counter_test',
+        [helper.make_tensor_value_info('frames', TensorProto.FLOAT, ['N', 1, INPUT_SIZE, INPUT_SIZE])],
+        [helper.make_tensor_value_info('density', TensorProto.FLOAT, ['N', 1, out_size, out_size])],
+        initializer=[
+            numpy_helper.from_array(np.array([0, 0, 1, 1, 0, 0, 1, 1], dtype=np.int64), 'pads'),
+            numpy_helper.from_array(edge_kernels, 'edge_kernels'),
+            numpy_helper.from_array(mix, 'mix')
+        ]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)], producer_name='gis-emergency')
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    onnx.save(model, path)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == '__main__':
+    build(sys.argv[1] if len(sys.argv) > 1 else BUNDLED_MODEL_PATH)
@@ -0,0 +1,118 @@
+# backend/benchmarks/counting_benchmark.py
+"""
+Throughput and latency of the ONNX crowd counting backend at different
+micro-batch sizes.
+
+    pip install onnxruntime
+    python benchmarks/counting_benchmark.py --clients 16 --frames 400 --batch-sizes 1,2,4,8,16
+
+For every max batch size, --clients threads each push frames through one
+CrowdDetector (as concurrent uploads and camera polls do) until --frames
+frames are done. Reports frames/s, per-frame latency percentiles and the
+batch sizes the micro-batcher actually formed (end to end, so decoding and
+preprocessing are included). A second table times model.predict alone on
+ready-made batches. Uses the bundled test model unless --model is given.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+# Add backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.counting_models import create_counting_model
+from app.services.crowd_detection import CrowdDetector
+
+
+def make_frames(count, width=1280, height=720):
+    """Synthetic grayscale street scenes with a varying number of person-sized blobs"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        image = Image.new('L', (width, height), 110)
+        draw = ImageDraw.Draw(image)
+        for _ in range(int(rng.integers(10, 400))):
+            x, y = rng.integers(0, width - 20), rng.integers(0, height - 30)
+            draw.ellipse([x, y, x + 18, y + 30], fill=int(rng.integers(20, 240)))
+        frames.append(image)
+    return frames
+
+
+def run(model, frames, total, clients, max_batch_size, max_wait_ms):
+    detector = CrowdDetector(counting_model=model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    latencies = []
+    lock = threading.Lock()
+    next_frame = [0]
+
+    def client():
+        while True:
+            with lock:
+                i = next_frame[0]
+                if i >= total:
+                    return
+                next_frame[0] += 1
+            started = time.perf_counter()
+            detector.estimate_density(frames[i % len(frames)])
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    stats = detector.batcher.stats()
+    print(f"{max_batch_size:>9} {total / wall:10.1f} {p50:9.1f} {p95:9.1f} {p99:9.1f} {stats['mean_batch_size']:11}")
+
+
+def run_model_only(model, frames, batch_size, rounds=50):
+    tensors = np.stack([model.preprocess(frame) for frame in (frames * batch_size)[:batch_size]])
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        model.predict(tensors)
+        timings.append((time.perf_counter() - started) * 1000)
+    p50, p95 = np.percentile(timings, [50, 95])
+    print(f"{batch_size:>9} {batch_size * 1000 / p50:10.1f} {p50:9.2f} {p95:9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', help='ONNX model path (default: bundled test model)')
+    parser.add_argument('--threads', type=int, default=0, help='intra-op threads (default: one per core)')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--frames', type=int, default=400)
+    parser.add_argument('--batch-sizes', default='1,2,4,8,16')
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    model = create_counting_model('onnx', path=args.model, intra_op_threads=args.threads or None)
+    print(model.info())
+    frames = make_frames(32)
+    # Warm up the session (first runs allocate and pick kernels)
+    CrowdDetector(counting_model=model, max_wait_ms=0).estimate_density(frames[0])
+
+    print(f"{args.clients} clients, {args.frames} frames, max wait {args.max_wait_ms} ms")
+    print(f"{'max batch':>9} {'frames/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean batch':>11}")
+    batch_sizes = [int(value) for value in args.batch_sizes.split(',')]
+    for size in batch_sizes:
+        run(model, frames, args.frames, args.clients, size, args.max_wait_ms)
+
+    print("\nmodel.predict only")
+    print(f"{'batch':>9} {'frames/s':>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for size in batch_sizes:
+        run_model_only(model, frames, size)
+
+
+if __name__ == '__main__':
+    main()
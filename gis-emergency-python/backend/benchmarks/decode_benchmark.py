@@ -0,0 +1,99 @@
+# backend/benchmarks/decode_benchmark.py
+"""
+Per-frame latency and peak memory of CrowdDetector.estimate_density on
+camera-sized JPEG frames: the full-resolution decode path it used to take
+versus the reduced-scale decode path.
+
+    python benchmarks/decode_benchmark.py --width 3840 --height 2160 --frames 20
+
+Each path runs in its own subprocess, reading a frame encoded up front by
+the parent, so peak RSS reflects only the decode path being measured.
+"""
+import argparse
+import base64
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# Add backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_frame(width, height, quality=85):
+    """A noisy synthetic camera frame encoded as a base64 data URL"""
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=quality)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def full_decode_stats(frame):
+    """What estimate_density did before: decode everything, grayscale, NumPy stats"""
+    image = Image.open(BytesIO(base64.b64decode(frame.split(',')[1])))
+    gray = image.convert('L')
+    array = np.array(gray)
+    return float(np.mean(array)), float(np.std(array))
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_path(path, frame_file, frames):
+    from app.services.crowd_detection import CrowdDetector
+
+    detector = CrowdDetector()
+    with open(frame_file) as f:
+        frame = f.read()
+    baseline_rss = peak_rss_mb()
+
+    latencies = []
+    for _ in range(frames):
+        started = time.perf_counter()
+        if path == 'full':
+            full_decode_stats(frame)
+        else:
+            detector.estimate_density(detector.process_image(frame))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies = np.array(latencies)
+    print(f"{path:>8}: p50 {np.percentile(latencies, 50):8.1f} ms   p95 {np.percentile(latencies, 95):8.1f} ms   "
+          f"peak RSS +{peak_rss_mb() - baseline_rss:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--path', choices=['full', 'reduced'])
+    parser.add_argument('--frame-file')
+    args = parser.parse_args()
+
+    if args.path:
+        run_path(args.path, args.frame_file, args.frames)
+        return
+
+    with tempfile.NamedTemporaryFile('w', suffix='.b64', delete=False) as f:
+        f.write(make_frame(args.width, args.height))
+    try:
+        print(f"{args.width}x{args.height} JPEG, {args.frames} frames")
+        for path in ('full', 'reduced'):
+            subprocess.run([sys.executable, __file__, '--path', path, '--frame-file', f.name,
+                            '--frames', str(args.frames)], check=True)
+    finally:
+        os.remove(f.name)
+
+
+if __name__ == '__main__':
+    main()
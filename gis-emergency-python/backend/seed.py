@@ -276,8 +276,9 @@ def seed_database():
         # =========================
         callers_created = 0
 
-        for _ in range(10):
-            caller_id = f"caller_{random.randint(1000, 9999)}"
+        # caller_id is unique - numbered, not random, so seeding never collides
+        for number in range(1, 11):
+            caller_id = f"caller_seed_{number:04d}"
             total = random.randint(1, 15)
             false_reports = random.randint(0, int(total * 0.3))
 
@@ -0,0 +1,38 @@
+# backend/tests/test_analytics.py
+import uuid
+
+from geoalchemy2.elements import WKTElement
+from sqlalchemy import insert, update
+
+from app.models.incidents import Incident
+
+
+def add_incidents(connection, incident_type, count, severity_score=5.0):
+    connection.execute(insert(Incident), [{
+        'incident_type': incident_type,
+        'severity': 3,
+        'severity_score': severity_score,
+        'location': WKTElement('POINT(77.2090 28.6139)', srid=4326)
+    } for _ in range(count)])
+
+
+def test_summary_sums_counters_written_from_several_connections(client, db):
+    incident_type = f'analytics_{uuid.uuid4().hex[:8]}'
+
+    # Separate connections, so the writes land in different counter slots
+    with db.engine.begin() as connection:
+        add_incidents(connection, incident_type, 3)
+    with db.engine.begin() as connection:
+        add_incidents(connection, incident_type, 2, severity_score=9.0)
+    before = client.get('/api/analytics/summary').get_json()['incidents']
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(Incident).where(Incident.incident_type == incident_type).values(status='resolved')
+        )
+    after = client.get('/api/analytics/summary').get_json()['incidents']
+
+    assert before['by_type'][incident_type] == 5
+    assert after['by_type'][incident_type] == 5
+    assert after['active'] == before['active'] - 5
+    assert after['total'] == before['total']
+    assert after['critical'] == before['critical']
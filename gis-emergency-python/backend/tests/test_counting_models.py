@@ -0,0 +1,107 @@
+# backend/tests/test_counting_models.py
+import threading
+from concurrent.futures import TimeoutError
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import crowd_detection
+from app.services.counting_models import CountingModel
+from app.services.crowd_detection import CrowdDetector, CrowdMonitor
+from app.services.micro_batcher import MicroBatcher
+
+
+class FixedCountModel(CountingModel):
+    """Puts `count` heads in the middle of every frame"""
+    name = 'fixed'
+
+    def __init__(self, count):
+        self.count = count
+
+    def predict(self, batch):
+        maps = np.zeros((len(batch), 16, 16), dtype=np.float32)
+        maps[:, 8, 8] = self.count
+        return maps
+
+
+def test_counting_model_needs_predict():
+    with pytest.raises(TypeError):
+        CountingModel()
+
+    class NoPredict(CountingModel):
+        pass
+
+    with pytest.raises(TypeError):
+        NoPredict()
+
+
+def test_model_counts_come_with_a_confidence():
+    detector = CrowdDetector(counting_model=FixedCountModel(120), max_batch_size=1, max_wait_ms=0)
+    estimate = detector.estimate_density(Image.new('RGB', (320, 240), color='gray'), 40.0)
+
+    assert estimate['model'] == 'fixed'
+    assert estimate['estimated_count'] == 120
+    assert estimate['density'] == 3.0
+    assert isinstance(estimate['confidence'], float)
+    assert 0 < estimate['confidence'] <= 1
+
+
+def test_batcher_fails_every_item_when_results_are_missing():
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(n) for n in range(3)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_model_count_times_out_instead_of_hanging():
+    release = threading.Event()
+
+    class StuckModel(FixedCountModel):
+        def predict(self, batch):
+            release.wait(5)
+            return super().predict(batch)
+
+    detector = CrowdDetector(counting_model=StuckModel(1), max_batch_size=1, max_wait_ms=0, counting_timeout=0.1)
+    try:
+        with pytest.raises(TimeoutError):
+            detector.estimate_density(Image.new('RGB', (64, 48)))
+    finally:
+        release.set()
+
+
+class FakeRegistry:
+    def __init__(self, locations):
+        self.locations = locations
+
+    def refresh(self):
+        return len(self.locations)
+
+    def active(self):
+        return self.locations
+
+
+def test_sweep_stores_the_models_density_map(monkeypatch):
+    def snapshot(*args, **kwargs):
+        out = BytesIO()
+        Image.new('RGB', (320, 240), color='gray').save(out, format='JPEG')
+        out.seek(0)
+        return out
+
+    detector = CrowdDetector(counting_model=FixedCountModel(120), max_batch_size=1, max_wait_ms=0)
+    monitor = CrowdMonitor(registry=FakeRegistry([{
+        'id': 7, 'location_id': 'cam_model', 'name': 'cam_model', 'camera_source': 'http://camera.invalid/snapshot.jpg',
+        'is_active': True, 'lat': 28.6139, 'lng': 77.2090
+    }]), detector=detector, poll_timeout=5.0)
+    monkeypatch.setattr(crowd_detection, 'urlopen', snapshot)
+    saved = []
+    monkeypatch.setattr(monitor, '_save_readings', saved.extend)
+
+    monitor.monitor_all_cameras()
+
+    assert saved[0]['estimated_count'] == 120
+    assert saved[0]['density_map'] == detector._count_with_model(Image.new('L', (64, 64)))[1]
+    assert saved[0]['density_map'] != detector._create_density_map(120)
@@ -0,0 +1,110 @@
+# backend/tests/test_crowd_monitor.py
+import uuid
+from io import BytesIO
+
+from geoalchemy2.elements import WKTElement
+from PIL import Image
+
+from app.models.crowd import CrowdLocation
+from app.services import crowd_detection
+from app.services.crowd_detection import CrowdMonitor
+from app.services.crowd_registry import CrowdLocationRegistry
+from app.services.heatmap_pyramid import HeatmapPyramid
+
+
+class FakeRegistry:
+    """Registry serving fixed locations; the first `failures` refreshes fail"""
+
+    def __init__(self, locations, failures=0):
+        self.locations = locations
+        self.failures = failures
+
+    def refresh(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('database is not reachable')
+        return len(self.locations)
+
+    def active(self):
+        return [loc for loc in self.locations if loc['is_active']]
+
+
+def camera(db_id, location_id, is_active=True):
+    return {
+        'id': db_id, 'location_id': location_id, 'name': location_id, 'camera_source': None,
+        'is_active': is_active, 'lat': 28.6139, 'lng': 77.2090
+    }
+
+
+CAMERAS = [camera(1, 'cam_a'), camera(2, 'cam_b'), camera(3, 'cam_off', is_active=False)]
+
+
+def sweep(monitor, monkeypatch, saved=None):
+    saved = [] if saved is None else saved
+    monkeypatch.setattr(monitor, '_save_readings', saved.extend)
+    results = monitor.monitor_all_cameras()
+    return {result['location_id'] for result in results}, sorted(row['crowd_location_id'] for row in saved)
+
+
+def jpeg_response(*args, **kwargs):
+    out = BytesIO()
+    Image.new('RGB', (320, 240), color=(90, 90, 90)).save(out, format='JPEG')
+    out.seek(0)
+    return out
+
+
+def test_sweep_covers_registered_cameras(monkeypatch):
+    monitor = CrowdMonitor(registry=FakeRegistry(CAMERAS), poll_timeout=1.0)
+
+    assert sweep(monitor, monkeypatch) == ({'cam_a', 'cam_b'}, [1, 2])
+
+
+def test_sweep_stores_density_map_of_the_analysed_frame(monkeypatch):
+    snapshot_camera = dict(camera(4, 'cam_http'), camera_source='http://camera.invalid/snapshot.jpg')
+    monitor = CrowdMonitor(registry=FakeRegistry([camera(1, 'cam_a'), snapshot_camera]), poll_timeout=1.0)
+    monkeypatch.setattr(crowd_detection, 'urlopen', jpeg_response)
+    frame_map = {'resolution': 2, 'max_density': 0.5, 'values': [0, 1, 2, 3]}
+    monkeypatch.setattr(monitor.detector, 'estimate_density',
+                        lambda image, **kwargs: {'estimated_count': 42, 'density_map': frame_map})
+
+    saved = []
+    sweep(monitor, monkeypatch, saved)
+    maps = {row['crowd_location_id']: row['density_map'] for row in saved}
+
+    assert maps[4] == frame_map
+    # No frame behind the mock camera: a synthetic map for its count
+    assert maps[1] == monitor.detector._create_density_map(monitor.locations['cam_a']['current_count'])
+
+
+def test_sweep_updates_heatmap_pyramid_with_every_reading(monkeypatch):
+    pyramid = HeatmapPyramid(min_zoom=8, max_zoom=10, tile_size=16)
+    monitor = CrowdMonitor(registry=FakeRegistry(CAMERAS), poll_timeout=1.0, heatmap_pyramid=pyramid)
+
+    sweep(monitor, monkeypatch)
+
+    points = pyramid.layers['crowd']['points']
+    assert set(points) == {'cam_a', 'cam_b'}
+    assert points['cam_a'][2] == monitor.locations['cam_a']['current_count']
+
+
+def test_sweep_loads_cameras_missed_at_startup(monkeypatch):
+    monitor = CrowdMonitor(registry=FakeRegistry(CAMERAS, failures=1), poll_timeout=1.0)
+    assert monitor.locations == {}
+
+    assert sweep(monitor, monkeypatch) == ({'cam_a', 'cam_b'}, [1, 2])
+
+
+def test_monitor_built_outside_app_context_loads_registered_cameras(app):
+    location_id = f'camera_{uuid.uuid4().hex}'
+    with app.app_context():
+        from app.models.database import db
+        db.session.add(CrowdLocation(
+            location_id=location_id, name='Registered camera',
+            location=WKTElement('POINT(77.2090 28.6139)', srid=4326)
+        ))
+        db.session.commit()
+
+    monitor = CrowdMonitor(registry=CrowdLocationRegistry(app))
+
+    assert location_id in monitor.locations
+    assert monitor.locations_loaded
@@ -0,0 +1,15 @@
+# backend/tests/test_crowd_registry.py
+import pytest
+
+from app.services.crowd_registry import CrowdLocationRegistry
+
+
+def test_refresh_without_app_context_raises():
+    with pytest.raises(RuntimeError, match='application context'):
+        CrowdLocationRegistry().refresh()
+
+
+def test_refresh_loads_locations_outside_app_context(app):
+    registry = CrowdLocationRegistry(app)
+
+    assert registry.refresh() == len(registry.all())
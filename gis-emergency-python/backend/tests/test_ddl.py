@@ -0,0 +1,25 @@
+# backend/tests/test_ddl.py
+"""The raw DDL run after create_all must survive SQLAlchemy's %-formatting"""
+from sqlalchemy import DDL
+from sqlalchemy.dialects import postgresql
+
+from app.models.crowd import CROWD_DATA_PARTITIONS_DDL, CrowdData
+
+
+def compile_ddl(statement, target):
+    ddl = DDL(statement)
+    ddl.target = target     # as when run from an after_create event
+    compiled = str(ddl.compile(dialect=postgresql.psycopg2.dialect()))
+    # What the server receives once the driver has applied (no) parameters
+    return compiled % {}
+
+
+def test_partition_ddl_compiles_for_postgresql():
+    compile_ddl(CROWD_DATA_PARTITIONS_DDL, CrowdData.__table__)
+
+
+def test_partition_ddl_keeps_plpgsql_placeholders():
+    sql = compile_ddl(CROWD_DATA_PARTITIONS_DDL, CrowdData.__table__)
+
+    assert "'CREATE TABLE IF NOT EXISTS %I PARTITION OF crowd_data FOR VALUES FROM (%L) TO (%L)'" in sql
+    assert "RAISE NOTICE 'crowd_data partition for % not created: %', day, SQLERRM;" in sql
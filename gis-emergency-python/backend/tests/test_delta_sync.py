@@ -0,0 +1,46 @@
+# backend/tests/test_delta_sync.py
+from geoalchemy2.elements import WKTElement
+from sqlalchemy import insert
+
+from app.models.resource import Resource
+
+
+def add_resource(connection, resource_type):
+    return connection.execute(
+        insert(Resource).values(
+            resource_type=resource_type,
+            current_location=WKTElement('POINT(77.2090 28.6139)', srid=4326),
+            status='available'
+        ).returning(Resource.id)
+    ).scalar()
+
+
+def feature_ids(collection):
+    return {feature['properties']['id'] for feature in collection['features']}
+
+
+def test_late_commit_shows_up_in_next_delta(client, db):
+    version = client.get('/api/resources/available').get_json()['version']
+
+    with db.engine.connect() as early, db.engine.connect() as late:
+        early_transaction = early.begin()
+        # Started first, so it has the lower transaction id - but commits last
+        early_id = add_resource(early, 'ambulance')
+        with late.begin():
+            late_id = add_resource(late, 'police')
+
+        first = client.get(f'/api/resources/available?since={version}').get_json()
+        early_transaction.commit()
+
+    assert late_id in feature_ids(first)
+    assert early_id not in feature_ids(first)
+
+    second = client.get(f"/api/resources/available?since={first['version']}").get_json()
+    assert early_id in feature_ids(second)
+
+
+def test_since_ahead_of_current_version_gets_full_fetch(client, db):
+    collection = client.get('/api/resources/available?since=9223372036854775807').get_json()
+
+    assert 'since' not in collection
+    assert collection['version'] < 9223372036854775807
@@ -0,0 +1,63 @@
+# backend/tests/test_detection_pool.py
+import os
+from io import BytesIO
+from multiprocessing import resource_tracker
+
+import pytest
+from PIL import Image
+from sqlalchemy import text
+
+from app.services.detection_pool import DetectionPool
+
+needs_fork = pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+
+
+def tracker_pid():
+    return resource_tracker._resource_tracker._pid
+
+
+def jpeg():
+    out = BytesIO()
+    Image.new('RGB', (64, 48), color='gray').save(out, format='JPEG')
+    return out.getvalue()
+
+
+def test_without_processes_frames_are_analysed_in_process():
+    pool = DetectionPool(processes=0)
+    results = pool.estimate([BytesIO(jpeg()), b'not an image'])
+
+    assert pool.executor is None
+    assert results[0]['image_size'] == [64, 48]
+    assert 'error' in results[1]
+
+
+@needs_fork
+def test_workers_share_the_parents_resource_tracker():
+    pool = DetectionPool(processes=1)
+    try:
+        pool.start()
+        results = pool.estimate([jpeg(), b'not an image'])
+        # A tracker of the worker's own would unlink the blocks behind the parent
+        assert pool._pool().submit(tracker_pid).result() == tracker_pid()
+    finally:
+        pool.shutdown()
+
+    assert results[0]['image_size'] == [64, 48]
+    assert 'error' in results[1]
+
+
+@needs_fork
+def test_forked_process_drops_inherited_connections(db):
+    db.session.execute(text('SELECT 1'))
+    db.session.commit()
+    engine = db.engine
+    assert engine.pool.checkedin()
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if engine.pool.checkedin() == 0 else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    # The parent's connection was not closed under it
+    assert db.session.execute(text('SELECT 1')).scalar() == 1
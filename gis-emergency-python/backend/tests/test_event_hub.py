@@ -0,0 +1,58 @@
+# backend/tests/test_event_hub.py
+import threading
+
+from app.services.event_hub import EventHub
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+
+def test_resume_replays_missed_events():
+    hub = EventHub()
+    first = hub.publish('incident', {'id': 1})
+    hub.publish('incident', {'id': 2})
+    hub.publish('incident', {'id': 3})
+
+    _, backlog = hub.subscribe(first)
+
+    assert len(backlog) == 2
+    assert RESYNC not in backlog
+
+
+def test_id_from_another_process_or_before_a_restart_gets_resync():
+    before_restart = EventHub()
+    old_id = before_restart.publish('incident', {'id': 1})
+    hub = EventHub()
+    for n in range(3):
+        hub.publish('incident', {'id': n})
+
+    for last_event_id in (old_id, '500', f'{hub.epoch}-500'):
+        _, backlog = hub.subscribe(last_event_id)
+        assert backlog == [RESYNC], last_event_id
+
+
+def test_listeners_run_in_order_off_the_publishing_thread():
+    hub = EventHub()
+    calls = []
+    hub.add_listener(lambda event_type, data: calls.append((data['n'], threading.current_thread())))
+
+    for n in range(5):
+        hub.publish('incident', {'n': n})
+    hub.wait_for_listeners()
+
+    assert [n for n, _ in calls] == list(range(5))
+    assert all(thread is not threading.current_thread() for _, thread in calls)
+
+
+def test_failing_listener_does_not_stop_the_others():
+    hub = EventHub()
+    seen = []
+
+    def broken(event_type, data):
+        raise ValueError('boom')
+
+    hub.add_listener(broken)
+    hub.add_listener(lambda event_type, data: seen.append(data))
+    hub.publish('dispatch', {'id': 7})
+    hub.wait_for_listeners()
+
+    assert seen == [{'id': 7}]
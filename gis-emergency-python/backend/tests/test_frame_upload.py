@@ -0,0 +1,66 @@
+# backend/tests/test_frame_upload.py
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.services.crowd_detection import CrowdDetector
+from app.services.frame_upload import FrameReader, FrameTooLarge, FrameUploads
+
+
+def jpeg(size=(64, 48)):
+    out = BytesIO()
+    Image.new('RGB', size, color='gray').save(out, format='JPEG')
+    return out.getvalue()
+
+
+def test_base64_frame_over_limit_is_rejected_before_decoding(monkeypatch):
+    uploads = FrameUploads(max_bytes=1000)
+    monkeypatch.setattr(base64, 'b64decode', lambda value: pytest.fail('decoded an oversized frame'))
+
+    with pytest.raises(FrameTooLarge):
+        uploads.decode_base64('data:image/jpeg;base64,' + base64.b64encode(bytes(1001)).decode())
+    assert uploads.stats()['rejected_size'] == 1
+
+
+@pytest.mark.parametrize('size', [998, 999, 1000])
+def test_base64_frame_at_limit_is_decoded(size):
+    uploads = FrameUploads(max_bytes=1000)
+    frame = bytes(range(256)) * 4
+
+    assert uploads.decode_base64(base64.b64encode(frame[:size]).decode()) == frame[:size]
+
+
+def test_open_frame_reads_buffer_in_place():
+    buffer = bytearray(jpeg())
+    frame = memoryview(buffer)
+
+    image = CrowdDetector().open_frame(frame)
+    # While the image is open its reader pins the buffer
+    with pytest.raises(BufferError):
+        buffer.extend(b'\0')
+    image.load()
+    assert image.size == (64, 48)
+
+    image.close()
+    frame.release()
+    buffer.extend(b'\0')
+
+
+def test_open_frame_releases_buffer_when_not_an_image():
+    buffer = bytearray(b'not an image')
+
+    with pytest.raises(Exception):
+        CrowdDetector().open_frame(memoryview(buffer))
+    buffer.extend(b'\0')
+
+
+def test_frame_reader_seeks_like_a_file():
+    reader = FrameReader(b'0123456789')
+
+    assert reader.read(3) == b'012'
+    assert reader.seek(-2, 2) == 8
+    assert reader.read() == b'89'
+    reader.seek(1)
+    assert reader.tell() == 1 and reader.read(2) == b'12'
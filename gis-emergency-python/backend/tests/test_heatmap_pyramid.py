@@ -0,0 +1,37 @@
+# backend/tests/test_heatmap_pyramid.py
+import numpy as np
+
+from app.services.heatmap_pyramid import HeatmapPyramid
+
+
+def scanned_peak(pyramid, layer, z):
+    tiles = pyramid.layers.get(layer, {}).get('tiles', {})
+    return max((float(raster.max()) for (tz, _, _), (raster, _, _) in tiles.items() if tz == z), default=0.0)
+
+
+def test_peak_follows_upserts_moves_and_removals():
+    pyramid = HeatmapPyramid(min_zoom=8, max_zoom=12, tile_size=16)
+    rng = np.random.default_rng(0)
+    keys = list(range(40))
+
+    for step in range(400):
+        key = int(rng.choice(keys))
+        if rng.random() < 0.3:
+            pyramid.remove('incidents', key)
+        else:
+            lng, lat = 77.2 + rng.normal(0, 0.05), 28.6 + rng.normal(0, 0.05)
+            pyramid.upsert('incidents', key, lng, lat, float(rng.uniform(0.1, 1.0)))
+        for z in (8, 10, 12):
+            assert np.isclose(pyramid.peak('incidents', z), scanned_peak(pyramid, 'incidents', z)), (step, z)
+
+
+def test_peak_after_replace_and_journal_replay():
+    pyramid = HeatmapPyramid(min_zoom=8, max_zoom=10, tile_size=16)
+    pyramid.begin_replace('crowd')
+    pyramid.upsert('crowd', 'late', 77.3, 28.7, 900)
+    pyramid.replace('crowd', [('a', 77.2, 28.6, 100), ('b', 77.6, 28.9, 250)])
+
+    assert pyramid.peak('crowd', 10) == 900
+    pyramid.remove('crowd', 'late')
+    assert pyramid.peak('crowd', 10) == scanned_peak(pyramid, 'crowd', 10) == 250
+    assert pyramid.peak('unknown', 10) == 0.0
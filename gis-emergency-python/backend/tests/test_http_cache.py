@@ -0,0 +1,65 @@
+# backend/tests/test_http_cache.py
+from geoalchemy2.elements import WKTElement
+from sqlalchemy import delete, insert
+
+from app.models.resource import Resource
+
+
+def test_etag_changes_when_a_row_is_deleted(client, db):
+    with db.engine.begin() as connection:
+        resource_id = connection.execute(
+            insert(Resource).values(
+                resource_type='ambulance',
+                current_location=WKTElement('POINT(77.2090 28.6139)', srid=4326),
+                status='available'
+            ).returning(Resource.id)
+        ).scalar()
+    before = client.get('/api/resources/available').headers['ETag']
+
+    with db.engine.begin() as connection:
+        connection.execute(delete(Resource).where(Resource.id == resource_id))
+    response = client.get('/api/resources/available', headers={'If-None-Match': before})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != before
+    assert client.get('/api/resources/available', headers={
+        'If-None-Match': response.headers['ETag']
+    }).status_code == 304
+
+
+def test_etag_ignores_uncommitted_writes(client, db):
+    before = client.get('/api/resources/available').headers['ETag']
+
+    with db.engine.connect() as connection:
+        transaction = connection.begin()
+        connection.execute(insert(Resource).values(
+            resource_type='police',
+            current_location=WKTElement('POINT(77.2090 28.6139)', srid=4326),
+            status='available'
+        ))
+        response = client.get('/api/resources/available', headers={'If-None-Match': before})
+        transaction.rollback()
+
+    assert response.status_code == 304
+
+
+def test_concurrent_writers_do_not_wait_on_the_counter(client, db):
+    before = client.get('/api/resources/available').headers['ETag']
+
+    def add_resource(connection):
+        connection.execute(insert(Resource).values(
+            resource_type='ambulance',
+            current_location=WKTElement('POINT(77.2090 28.6139)', srid=4326),
+            status='available'
+        ))
+
+    with db.engine.connect() as first, db.engine.connect() as second:
+        first_transaction = first.begin()
+        add_resource(first)
+        with second.begin():
+            # Would time out if both writers bumped the same counter row
+            second.exec_driver_sql("SET LOCAL lock_timeout = '2s'")
+            add_resource(second)
+        first_transaction.rollback()
+
+    assert client.get('/api/resources/available', headers={'If-None-Match': before}).status_code == 200
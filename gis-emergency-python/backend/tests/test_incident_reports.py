@@ -0,0 +1,43 @@
+# backend/tests/test_incident_reports.py
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from app.models.incidents import Incident
+
+
+@pytest.fixture
+def rejected_caller(db):
+    """A caller_id the caller_history table refuses, so its upsert fails"""
+    caller_id = f'rejected_{uuid.uuid4().hex[:8]}'
+    db.session.execute(text(
+        f"ALTER TABLE caller_history ADD CONSTRAINT test_reject_caller CHECK (caller_id <> '{caller_id}')"
+    ))
+    db.session.commit()
+    yield caller_id
+    db.session.rollback()
+    db.session.execute(text('ALTER TABLE caller_history DROP CONSTRAINT test_reject_caller'))
+    db.session.commit()
+
+
+def test_incident_is_saved_when_caller_history_fails(client, db, rejected_caller):
+    response = client.post('/api/incidents/report', json={
+        'type': 'fire',
+        'location': [77.2090, 28.6139],
+        'caller_id': rejected_caller
+    })
+
+    assert response.status_code == 201
+    assert db.session.get(Incident, response.get_json()['incident_id']) is not None
+
+
+def test_batch_is_saved_when_caller_history_fails(client, db, rejected_caller):
+    response = client.post('/api/incidents/report/batch', json=[
+        {'type': 'fire', 'location': [77.2090, 28.6139], 'caller_id': rejected_caller},
+        {'type': 'flood', 'location': [77.2190, 28.6239], 'caller_id': f'{rejected_caller}_ok'}
+    ])
+
+    assert response.status_code == 201
+    assert response.get_json()['created'] == 2
+    assert db.session.query(Incident).filter(Incident.caller_id.like(f'{rejected_caller}%')).count() == 2
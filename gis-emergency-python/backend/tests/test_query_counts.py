@@ -0,0 +1,65 @@
+# backend/tests/test_query_counts.py
+"""
+Round trips per request on the hot paths. These used to be checked at
+runtime around each request; they are pinned here instead.
+"""
+import uuid
+
+from geoalchemy2.elements import WKTElement
+
+from app.models.crowd import CrowdLocation, record_crowd_readings
+from app.utils.query_counter import count_queries
+
+# Incident insert, caller history upsert and the savepoint around it
+REPORT_QUERY_BUDGET = 4
+
+# ETag counters, change version, latest readings - whatever the number of cameras
+CROWD_GEOJSON_QUERY_BUDGET = 3
+# ... plus the removed locations on a delta
+CROWD_GEOJSON_DELTA_QUERY_BUDGET = 4
+
+
+def test_report_incident_query_count(client, db):
+    with count_queries(db.engine) as counter:
+        response = client.post('/api/incidents/report', json={
+            'type': 'fire',
+            'location': [77.2090, 28.6139],
+            'caller_id': 'caller_query_count',
+            'caller_type': 'verified'
+        })
+
+    assert response.status_code == 201
+    assert 'incident_id' in response.get_json()
+    assert counter.count <= REPORT_QUERY_BUDGET, counter.statements
+
+
+def add_cameras(db, count):
+    locations = [
+        CrowdLocation(
+            location_id=f'query_count_{uuid.uuid4().hex}',
+            name=f'Camera {n}',
+            location=WKTElement(f'POINT({77.2 + n / 1000} 28.6)', srid=4326)
+        )
+        for n in range(count)
+    ]
+    db.session.add_all(locations)
+    db.session.flush()
+    record_crowd_readings([
+        {'crowd_location_id': location.id, 'estimated_count': 50, 'crowd_level': 'LOW'}
+        for location in locations
+    ])
+    db.session.commit()
+
+
+def test_crowd_geojson_query_count_does_not_grow_with_cameras(client, db):
+    add_cameras(db, 20)
+
+    with count_queries(db.engine) as counter:
+        collection = client.get('/api/crowd/geojson').get_json()
+    assert len(collection['features']) >= 20
+    assert counter.count <= CROWD_GEOJSON_QUERY_BUDGET, counter.statements
+
+    with count_queries(db.engine) as counter:
+        delta = client.get(f"/api/crowd/geojson?since={collection['version']}").get_json()
+    assert 'removed' in delta
+    assert counter.count <= CROWD_GEOJSON_DELTA_QUERY_BUDGET, counter.statements
@@ -0,0 +1,97 @@
+# backend/tests/test_vector_tiles.py
+import os
+
+import pytest
+
+from app.services.vector_tiles import TileCache
+
+
+def test_sync_clears_layers_whose_table_was_written():
+    cache = TileCache(check_seconds=0)
+    versions = {'incidents': 1, 'resources': 1}
+    cache.sync(lambda: versions)
+    cache.put('incidents', 10, 1, 1, b'incident tile')
+    cache.put('resources', 10, 1, 1, b'resource tile')
+
+    versions = {'incidents': 2, 'resources': 1}     # e.g. an incident resolved by another process
+    cache.sync(lambda: versions)
+
+    assert cache.get('incidents', 10, 1, 1) is None
+    assert cache.get('resources', 10, 1, 1) == b'resource tile'
+
+
+def test_sync_keeps_layers_written_only_by_this_process():
+    cache = TileCache(check_seconds=0)
+    cache.sync(lambda: {'incidents': 1})
+    cache.put('incidents', 10, 1, 1, b'incident tile')
+
+    # Two reports committed here; their tiles were invalidated point by point
+    for _ in range(2):
+        with cache.own_write('incidents'):
+            pass
+    cache.sync(lambda: {'incidents': 3})
+    assert cache.get('incidents', 10, 1, 1) == b'incident tile'
+
+    # One own commit, but the counter moved by two
+    with cache.own_write('incidents'):
+        pass
+    cache.sync(lambda: {'incidents': 5})
+    assert cache.get('incidents', 10, 1, 1) is None
+
+
+def test_sync_ignores_checks_overlapping_an_own_commit():
+    cache = TileCache(check_seconds=0)
+    cache.sync(lambda: {'incidents': 1})
+    cache.put('incidents', 10, 1, 1, b'incident tile')
+
+    def commit_during_check():
+        # Commits, and its counter is read, before the write is counted as ours
+        with cache.own_write('incidents'):
+            pass
+        return {'incidents': 2}
+
+    with cache.own_write('incidents'):
+        cache.sync(lambda: pytest.fail('checked while committing'))
+    cache.sync(commit_during_check)
+    assert cache.layer_versions == {'incidents': 1}
+
+    # Both own commits are credited to the first check that sees them
+    cache.sync(lambda: {'incidents': 3})
+    assert cache.get('incidents', 10, 1, 1) == b'incident tile'
+    cache.sync(lambda: {'incidents': 4})
+    assert cache.get('incidents', 10, 1, 1) is None
+
+
+def test_sync_checks_at_most_every_check_seconds():
+    cache = TileCache(check_seconds=60)
+    calls = []
+    cache.sync(lambda: calls.append(1) or {'incidents': 1})
+    cache.sync(lambda: calls.append(1) or {'incidents': 2})
+
+    assert len(calls) == 1
+
+
+def tile_files(directory):
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(directory) for name in names)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_processes_sharing_a_directory_keep_their_own_tiles(tmp_path):
+    cache = TileCache(directory=str(tmp_path))
+    cache.put('incidents', 3, 1, 2, b'parent tile')
+    parent_files = tile_files(tmp_path)
+
+    # Another worker on the same directory (a forked one here) starts and spills a tile
+    pid = os.fork()
+    if pid == 0:
+        try:
+            TileCache(directory=str(tmp_path)).put('incidents', 3, 1, 2, b'child tile')
+            cache.put('incidents', 3, 1, 3, b'child tile')
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert len(parent_files) == 1
+    assert set(parent_files) < set(tile_files(tmp_path))
+    cache.memory.clear()
+    assert cache.get('incidents', 3, 1, 2) == b'parent tile'
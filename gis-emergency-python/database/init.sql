@@ -12,7 +12,16 @@ CREATE TABLE IF NOT EXISTS incidents (
     reported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(20) DEFAULT 'active',
     description TEXT,
-    affected_people INTEGER
+    affected_people INTEGER,
+    severity_score FLOAT,
+    prank_confidence FLOAT,
+    caller_id VARCHAR(100),
+    caller_type VARCHAR(50),
+    location_type VARCHAR(50),
+    call_count INTEGER DEFAULT 1,
+    -- Change version for delta sync: id of the transaction that last wrote the row.
+    -- Databases from before: run migrations/002_change_versions.sql
+    version BIGINT DEFAULT (pg_current_xact_id()::text)::bigint
 );
 
 -- Create resources table
@@ -22,7 +31,8 @@ CREATE TABLE IF NOT EXISTS resources (
     current_location GEOMETRY(Point, 4326) NOT NULL,
     status VARCHAR(20) DEFAULT 'available',
     capacity INTEGER,
-    details JSONB
+    details JSONB,
+    version BIGINT DEFAULT (pg_current_xact_id()::text)::bigint
 );
 
 -- Create resource allocations table
@@ -36,11 +46,33 @@ CREATE TABLE IF NOT EXISTS resource_allocations (
     route GEOMETRY(LineString, 4326)
 );
 
+-- Create caller history table (one row per caller, upserted on every report).
+-- Databases created before caller_id was unique: run
+-- migrations/001_caller_history_unique_caller_id.sql
+CREATE TABLE IF NOT EXISTS caller_history (
+    id SERIAL PRIMARY KEY,
+    caller_id VARCHAR(100) NOT NULL UNIQUE,
+    caller_type VARCHAR(50),
+    total_reports INTEGER DEFAULT 0,
+    false_reports INTEGER DEFAULT 0,
+    last_report TIMESTAMP,
+    reputation_score FLOAT DEFAULT 0.5
+);
+
+-- Running incident counts for /api/analytics/summary (table, triggers and
+-- backfill): run migrations/004_incident_counters.sql
+
 -- Create spatial indexes
 CREATE INDEX idx_incidents_location ON incidents USING GIST(location);
+CREATE INDEX idx_incidents_reported_at_id ON incidents (reported_at, id);
+CREATE INDEX idx_incidents_version ON incidents (version);
+CREATE INDEX idx_resources_version ON resources (version);
 CREATE INDEX idx_resources_location ON resources USING GIST(current_location);
 CREATE INDEX idx_resource_allocations_route ON resource_allocations USING GIST(route);
 
+-- Change counters behind the API's ETags: run migrations/003_table_change_counters.sql
+-- once the app has created its tables
+
 -- Create function to find nearest resources
 CREATE OR REPLACE FUNCTION find_nearest_resources(
     incident_point GEOMETRY,
@@ -0,0 +1,52 @@
+-- Make caller_history.caller_id unique on databases created before it was.
+--
+-- The report endpoints upsert caller history with
+-- INSERT ... ON CONFLICT (caller_id), which needs a unique constraint (or
+-- unique index) on caller_id. init.sql only runs on a fresh database
+-- volume, so existing databases must be migrated once:
+--
+--     psql "$DATABASE_URL" -f database/migrations/001_caller_history_unique_caller_id.sql
+--
+-- Duplicate rows for one caller are folded into the oldest one first.
+-- Safe to run more than once.
+
+BEGIN;
+
+LOCK TABLE caller_history IN SHARE ROW EXCLUSIVE MODE;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = 'caller_history'::regclass
+          AND i.indisunique AND i.indnatts = 1 AND a.attname = 'caller_id'
+    ) THEN
+        UPDATE caller_history AS keep
+        SET total_reports = merged.total_reports,
+            false_reports = merged.false_reports,
+            last_report = merged.last_report,
+            reputation_score = CASE WHEN merged.total_reports > 0
+                                    THEN 1.0 - merged.false_reports::float / merged.total_reports
+                                    ELSE keep.reputation_score END
+        FROM (
+            SELECT min(id) AS id,
+                   sum(COALESCE(total_reports, 0)) AS total_reports,
+                   sum(COALESCE(false_reports, 0)) AS false_reports,
+                   max(last_report) AS last_report
+            FROM caller_history
+            GROUP BY caller_id
+            HAVING count(*) > 1
+        ) AS merged
+        WHERE keep.id = merged.id;
+
+        DELETE FROM caller_history AS dup
+        USING caller_history AS keep
+        WHERE dup.caller_id = keep.caller_id AND dup.id > keep.id;
+
+        ALTER TABLE caller_history ADD CONSTRAINT caller_history_caller_id_key UNIQUE (caller_id);
+    END IF;
+END $$;
+
+COMMIT;
@@ -0,0 +1,52 @@
+-- Change versions for delta sync (?since=) on databases created before them,
+-- or before they became transaction ids.
+--
+-- Every versioned table has a version BIGINT column holding the id of the
+-- transaction that last wrote the row; the API hands clients the xmin of
+-- its snapshot to resume from. Needs PostgreSQL 13+ (pg_current_xact_id).
+-- init.sql and create_all only set this up for new tables, so existing
+-- databases must be migrated once:
+--
+--     psql "$DATABASE_URL" -f database/migrations/002_change_versions.sql
+--
+-- Columns that are missing are added; columns still filled from the old
+-- change_version_seq are reset to 0, since sequence numbers cannot be
+-- compared with transaction ids (clients holding an old version get a full
+-- fetch). This rewrites every row of those tables - crowd_data can take a
+-- while. Tables that do not exist yet are skipped. Safe to run more than once.
+
+BEGIN;
+
+DO $$
+DECLARE
+    tbl TEXT;
+    version_default TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['incidents', 'resources', 'crowd_locations', 'crowd_data'] LOOP
+        CONTINUE WHEN to_regclass(tbl) IS NULL;
+
+        SELECT c.column_default INTO version_default
+        FROM information_schema.columns AS c
+        WHERE c.table_schema = current_schema() AND c.table_name = tbl AND c.column_name = 'version';
+        CONTINUE WHEN FOUND AND version_default LIKE '%pg_current_xact_id%';
+
+        IF FOUND THEN
+            RAISE NOTICE '%: resetting sequence-based versions', tbl;
+        ELSE
+            RAISE NOTICE '%: adding version column', tbl;
+        END IF;
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS version BIGINT', tbl);
+        EXECUTE format('UPDATE %I SET version = 0', tbl);
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN version SET DEFAULT (pg_current_xact_id()::text)::bigint', tbl);
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = tbl AND indexdef LIKE '%(version)'
+        ) THEN
+            EXECUTE format('CREATE INDEX %I ON %I (version)', 'ix_' || tbl || '_version', tbl);
+        END IF;
+    END LOOP;
+END $$;
+
+DROP SEQUENCE IF EXISTS change_version_seq;
+
+COMMIT;
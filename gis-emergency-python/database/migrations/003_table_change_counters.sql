@@ -0,0 +1,68 @@
+-- Change counters behind the ETags of the versioned tables.
+--
+-- Each table gets a sequence, <table>_changes, that a trigger advances once
+-- per writing transaction, when it commits. Sequences are not transactional:
+-- concurrent writers never wait on each other for a counter, unlike the
+-- single table_changes row per table this replaces. The API only compares
+-- counters for equality, so numbers burnt by failed commits do no harm.
+--
+-- create_all does not install this. Run it once after init.sql and after
+-- the app has created its tables (crowd_locations, crowd_data):
+--
+--     psql "$DATABASE_URL" -f database/migrations/003_table_change_counters.sql
+--
+-- Tables that do not exist yet are skipped. Safe to run more than once;
+-- triggers that are already there are left alone.
+
+BEGIN;
+
+-- The argument is the table's sequence: on a partitioned table the trigger
+-- fires with the partition's name, not the table's.
+CREATE OR REPLACE FUNCTION table_changes_bump() RETURNS trigger AS $$
+BEGIN
+    -- Once per table and transaction, however many rows it wrote
+    IF COALESCE(current_setting('table_changes.' || TG_ARGV[0], true), '') = '' THEN
+        PERFORM set_config('table_changes.' || TG_ARGV[0], 'bumped', true);
+        PERFORM nextval(TG_ARGV[0]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['incidents', 'resources', 'crowd_locations', 'crowd_data'] LOOP
+        CONTINUE WHEN to_regclass(tbl) IS NULL;
+
+        EXECUTE format('CREATE SEQUENCE IF NOT EXISTS %I', tbl || '_changes');
+
+        -- Statement trigger from before, writing to table_changes
+        IF EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = tbl::regclass AND tgname = 'table_changes_bump') THEN
+            EXECUTE format('DROP TRIGGER table_changes_bump ON %I', tbl);
+        END IF;
+
+        -- Deferred to commit, so readers cannot see the new counter long
+        -- before the rows it stands for
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = tbl::regclass AND tgname = 'table_changes_commit') THEN
+            RAISE NOTICE '%: adding change counter triggers', tbl;
+            EXECUTE format(
+                'CREATE CONSTRAINT TRIGGER table_changes_commit AFTER INSERT OR UPDATE OR DELETE ON %I '
+                'DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION table_changes_bump(%L)',
+                tbl, tbl || '_changes'
+            );
+        END IF;
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = tbl::regclass AND tgname = 'table_changes_truncate') THEN
+            EXECUTE format(
+                'CREATE TRIGGER table_changes_truncate AFTER TRUNCATE ON %I '
+                'FOR EACH STATEMENT EXECUTE FUNCTION table_changes_bump(%L)',
+                tbl, tbl || '_changes'
+            );
+        END IF;
+    END LOOP;
+END $$;
+
+DROP TABLE IF EXISTS table_changes;
+
+COMMIT;
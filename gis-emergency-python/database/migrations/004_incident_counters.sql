@@ -0,0 +1,107 @@
+-- Trigger-maintained incident counts behind /api/analytics/summary.
+--
+-- Every write to incidents folds its rows into incident_counters with one
+-- grouped upsert per statement. Each (incident_type, status, is_critical)
+-- key is spread over 16 slot rows and the writer picks the slot from its
+-- backend pid, so concurrent reports of the same type from different
+-- connections update different rows instead of queueing on one. Readers
+-- sum the slots.
+--
+-- create_all does not install this. Run it once, after init.sql or the
+-- app has created incidents:
+--
+--     psql "$DATABASE_URL" -f database/migrations/004_incident_counters.sql
+--
+-- Counters from before slots (one row per key) become slot 0. An empty
+-- counters table is filled from incidents. Safe to run more than once.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS incident_counters (
+    incident_type VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    is_critical BOOLEAN NOT NULL,
+    slot SMALLINT NOT NULL DEFAULT 0,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (incident_type, status, is_critical, slot)
+);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'incident_counters' AND column_name = 'slot'
+    ) THEN
+        RAISE NOTICE 'incident_counters: adding slot column';
+        ALTER TABLE incident_counters ADD COLUMN slot SMALLINT NOT NULL DEFAULT 0;
+        ALTER TABLE incident_counters DROP CONSTRAINT incident_counters_pkey;
+        ALTER TABLE incident_counters ADD PRIMARY KEY (incident_type, status, is_critical, slot);
+    END IF;
+END $$;
+
+CREATE OR REPLACE FUNCTION incident_counters_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO incident_counters (incident_type, status, is_critical, slot, count)
+        SELECT incident_type, COALESCE(status, 'unknown'), COALESCE(severity_score >= 8, false),
+               pg_backend_pid() % 16, count(*)
+        FROM new_rows GROUP BY 1, 2, 3
+        ON CONFLICT (incident_type, status, is_critical, slot)
+        DO UPDATE SET count = incident_counters.count + EXCLUDED.count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO incident_counters (incident_type, status, is_critical, slot, count)
+        SELECT incident_type, COALESCE(status, 'unknown'), COALESCE(severity_score >= 8, false),
+               pg_backend_pid() % 16, -count(*)
+        FROM old_rows GROUP BY 1, 2, 3
+        ON CONFLICT (incident_type, status, is_critical, slot)
+        DO UPDATE SET count = incident_counters.count + EXCLUDED.count;
+    ELSE
+        INSERT INTO incident_counters (incident_type, status, is_critical, slot, count)
+        SELECT incident_type, status, is_critical, pg_backend_pid() % 16, sum(delta)
+        FROM (
+            SELECT incident_type, COALESCE(status, 'unknown') AS status,
+                   COALESCE(severity_score >= 8, false) AS is_critical, 1 AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT incident_type, COALESCE(status, 'unknown'),
+                   COALESCE(severity_score >= 8, false), -1
+            FROM old_rows
+        ) AS changes
+        GROUP BY 1, 2, 3
+        HAVING sum(delta) <> 0
+        ON CONFLICT (incident_type, status, is_critical, slot)
+        DO UPDATE SET count = incident_counters.count + EXCLUDED.count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- No incident writes between installing the triggers and the backfill
+LOCK TABLE incidents IN SHARE ROW EXCLUSIVE MODE;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = 'incidents'::regclass AND tgname = 'incident_counters_insert') THEN
+        CREATE TRIGGER incident_counters_insert AFTER INSERT ON incidents
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION incident_counters_sync();
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = 'incidents'::regclass AND tgname = 'incident_counters_update') THEN
+        CREATE TRIGGER incident_counters_update AFTER UPDATE ON incidents
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION incident_counters_sync();
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = 'incidents'::regclass AND tgname = 'incident_counters_delete') THEN
+        CREATE TRIGGER incident_counters_delete AFTER DELETE ON incidents
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION incident_counters_sync();
+    END IF;
+END $$;
+
+INSERT INTO incident_counters (incident_type, status, is_critical, count)
+SELECT incident_type, COALESCE(status, 'unknown'), COALESCE(severity_score >= 8, false), count(*)
+FROM incidents
+WHERE NOT EXISTS (SELECT 1 FROM incident_counters)
+GROUP BY 1, 2, 3;
+
+COMMIT;
@@ -0,0 +1,91 @@
+-- Range partition crowd_data by day on databases created before it was.
+--
+-- create_all only partitions crowd_data when it creates the table, and only
+-- then adds the default partition and crowd_data_ensure_partitions(), which
+-- the app calls at startup and once a day. An existing, unpartitioned
+-- crowd_data must be migrated once, after 002 (and before or after 003):
+--
+--     psql "$DATABASE_URL" -f database/migrations/005_partition_crowd_data.sql
+--
+-- The old table is renamed, a partitioned crowd_data with the same columns
+-- takes its name, ids included, and the rows are copied over. Readings from
+-- before yesterday land in the default partition. The table is locked for
+-- the whole copy, so run it in a quiet period; camera sweeps fail until it
+-- commits. The ETag triggers from 003 are carried over. Does nothing once
+-- crowd_data is partitioned.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION crowd_data_ensure_partitions(days_ahead integer) RETURNS void AS $$
+DECLARE
+    day date;
+BEGIN
+    FOR day IN SELECT generate_series(current_date - 1, current_date + days_ahead, interval '1 day')::date LOOP
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF crowd_data FOR VALUES FROM (%L) TO (%L)',
+                'crowd_data_' || to_char(day, 'YYYYMMDD'), day, day + 1
+            );
+        EXCEPTION WHEN others THEN
+            -- e.g. the default partition already holds rows for that day
+            RAISE NOTICE 'crowd_data partition for % not created: %', day, SQLERRM;
+        END;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('crowd_data')) IS DISTINCT FROM 'r' THEN
+        RETURN;
+    END IF;
+    RAISE NOTICE 'crowd_data: partitioning by day';
+
+    LOCK TABLE crowd_data IN ACCESS EXCLUSIVE MODE;
+    ALTER TABLE crowd_data RENAME TO crowd_data_unpartitioned;
+    ALTER TABLE crowd_data_unpartitioned RENAME CONSTRAINT crowd_data_pkey TO crowd_data_unpartitioned_pkey;
+    ALTER TABLE crowd_data_unpartitioned DROP CONSTRAINT IF EXISTS crowd_data_crowd_location_id_fkey;
+    DROP INDEX IF EXISTS idx_crowd_data_location_timestamp;
+    DROP INDEX IF EXISTS ix_crowd_data_version;
+    -- Keep the id sequence when the old table goes
+    ALTER SEQUENCE crowd_data_id_seq OWNED BY NONE;
+    ALTER SEQUENCE crowd_data_id_seq AS bigint;
+
+    -- As create_all makes it from models.crowd.CrowdData
+    CREATE TABLE crowd_data (
+        id BIGINT NOT NULL DEFAULT nextval('crowd_data_id_seq'),
+        timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        crowd_location_id INTEGER REFERENCES crowd_locations (id),
+        estimated_count INTEGER,
+        crowd_level VARCHAR(20),
+        density_map JSON,
+        is_anomaly BOOLEAN,
+        anomaly_type VARCHAR(50),
+        version BIGINT DEFAULT (pg_current_xact_id()::text)::bigint,
+        PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp);
+    ALTER SEQUENCE crowd_data_id_seq OWNED BY crowd_data.id;
+    CREATE INDEX idx_crowd_data_location_timestamp ON crowd_data (crowd_location_id, timestamp);
+    CREATE INDEX ix_crowd_data_version ON crowd_data (version);
+
+    CREATE TABLE crowd_data_default PARTITION OF crowd_data DEFAULT;
+    PERFORM crowd_data_ensure_partitions(7);
+
+    INSERT INTO crowd_data (id, timestamp, crowd_location_id, estimated_count, crowd_level,
+                            density_map, is_anomaly, anomaly_type, version)
+    SELECT id, COALESCE(timestamp, 'epoch'), crowd_location_id, estimated_count, crowd_level,
+           density_map, is_anomaly, anomaly_type, version
+    FROM crowd_data_unpartitioned;
+
+    IF to_regproc('table_changes_bump') IS NOT NULL THEN
+        CREATE CONSTRAINT TRIGGER table_changes_commit AFTER INSERT OR UPDATE OR DELETE ON crowd_data
+            DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION table_changes_bump('crowd_data_changes');
+        CREATE TRIGGER table_changes_truncate AFTER TRUNCATE ON crowd_data
+            FOR EACH STATEMENT EXECUTE FUNCTION table_changes_bump('crowd_data_changes');
+        PERFORM nextval('crowd_data_changes');
+    END IF;
+
+    DROP TABLE crowd_data_unpartitioned;
+END $$;
+
+COMMIT;
@@ -345,7 +345,10 @@ function startAutoRefresh() {
         clearInterval(updateInterval);
     }
     updateInterval = setInterval(() => {
-        emergencyMap.loadData();
+        // The map's live stream pushes changes; poll only while it is down
+        if (!emergencyMap.streamConnected) {
+            emergencyMap.loadData();
+        }
     }, 30000);
 }
 
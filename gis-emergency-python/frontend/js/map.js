@@ -15,6 +15,13 @@ class EmergencyMap {
         this.activeCrowds = [];          // 👥 Crowd detection data cache
         this.baseUrl = 'http://localhost:5000';
         this.isReportModalOpen = false;
+        this.moveReloadTimer = null;
+        this.syncState = {};             // Per-layer change version + cached features for delta sync
+        this.pollsSinceFullSync = 0;
+        this.eventSource = null;         // Live /api/stream connection
+        this.streamConnected = false;
+        this.streamReloadTimer = null;
+        this.vectorTileLayers = {};      // MVT overlays from /tiles (needs Leaflet.VectorGrid)
 
         this.initialize();
         this.startLiveUpdates();
@@ -50,12 +57,20 @@ class EmergencyMap {
         this.crowdLayer = L.layerGroup().addTo(this.map);  // 👥 Crowd layer
 
         // Add layer control
-        L.control.layers(baseLayers, {
+        const overlays = {
             'Active Incidents': this.incidentsLayer,
             'Emergency Resources': this.resourcesLayer,
             'Dispatch Routes': this.routesLayer,
             '👥 Crowd Detections': this.crowdLayer
-        }).addTo(this.map);
+        };
+        overlays['🔥 Incident Density'] = this.createHeatmapTileLayer('incidents');
+        overlays['👥 Crowd Density'] = this.createHeatmapTileLayer('crowd');
+        if (L.vectorGrid) {
+            overlays['Incidents (vector tiles)'] = this.createVectorTileLayer('incidents', '#d32f2f');
+            overlays['Resources (vector tiles)'] = this.createVectorTileLayer('resources', '#1976d2');
+            overlays['Cameras (vector tiles)'] = this.createVectorTileLayer('crowd_locations', '#7b1fa2');
+        }
+        L.control.layers(baseLayers, overlays).addTo(this.map);
 
         // Add controls
         this.addControls();
@@ -65,6 +80,16 @@ class EmergencyMap {
         // Add click handler for location selection
         this.map.on('click', (e) => this.handleMapClick(e));
 
+        // Only the viewport is fetched, so reload after the user pans or zooms
+        this.map.on('moveend', () => {
+            clearTimeout(this.moveReloadTimer);
+            this.moveReloadTimer = setTimeout(() => {
+                this.resetSync();
+                this.loadData();
+                if (this.heatmapLayer) this.createHeatmap();
+            }, 300);
+        });
+
         // Load initial data
         this.loadData();
 
@@ -248,11 +273,45 @@ class EmergencyMap {
         }
     }
 
+    getViewportBbox() {
+        // Padded so small pans stay inside what was already fetched
+        const bounds = this.map.getBounds().pad(0.2);
+        return [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()]
+            .map(v => v.toFixed(5))
+            .join(',');
+    }
+
+    resetSync() {
+        // Forget cached versions so the next poll fetches full collections
+        this.syncState = {};
+        this.pollsSinceFullSync = 0;
+    }
+
+    async fetchCollection(key, path, idOf) {
+        // Fetch only what changed since the last poll and merge it into the cached collection
+        const state = this.syncState[key] || (this.syncState[key] = { version: null, features: new Map() });
+        const params = new URLSearchParams(path.includes('?') ? path.split('?')[1] : '');
+        if (state.version !== null) params.set('since', state.version);
+
+        const response = await fetch(`${this.baseUrl}${path.split('?')[0]}?${params}`);
+        if (!response.ok) throw new Error(`Failed to fetch ${key}`);
+        const data = await response.json();
+
+        if (data.since === undefined) state.features = new Map();
+        (data.removed || []).forEach(id => state.features.delete(id));
+        (data.features || []).forEach(feature => state.features.set(idOf(feature), feature));
+        state.version = data.version ?? null;
+
+        return { type: 'FeatureCollection', features: [...state.features.values()] };
+    }
+
     async fetchIncidents() {
         try {
-            const response = await fetch(`${this.baseUrl}/api/incidents/active`);
-            if (!response.ok) throw new Error('Failed to fetch incidents');
-            return await response.json();
+            return await this.fetchCollection(
+                'incidents',
+                `/api/incidents/active?bbox=${this.getViewportBbox()}`,
+                feature => feature.properties.id
+            );
         } catch (error) {
             console.error('Fetch incidents error:', error);
             return this.getMockIncidents();
@@ -261,9 +320,11 @@ class EmergencyMap {
 
     async fetchResources() {
         try {
-            const response = await fetch(`${this.baseUrl}/api/resources/available`);
-            if (!response.ok) throw new Error('Failed to fetch resources');
-            return await response.json();
+            return await this.fetchCollection(
+                'resources',
+                `/api/resources/available?bbox=${this.getViewportBbox()}`,
+                feature => feature.properties.id
+            );
         } catch (error) {
             console.error('Fetch resources error:', error);
             return this.getMockResources();
@@ -276,9 +337,11 @@ class EmergencyMap {
 
     async fetchCrowds() {
         try {
-            const response = await fetch(`${this.baseUrl}/api/crowd/geojson`);
-            if (!response.ok) throw new Error('Failed to fetch crowd data');
-            return await response.json();
+            return await this.fetchCollection(
+                'crowds',
+                '/api/crowd/geojson',
+                feature => feature.properties.location_id ?? feature.properties.id
+            );
         } catch (error) {
             console.error('Fetch crowds error:', error);
             return this.getMockCrowds();
@@ -801,22 +864,115 @@ class EmergencyMap {
             this.heatmapLayer = null;
             if (typeof showToast === 'function') showToast('Heatmap disabled', 'info');
         } else {
-            this.createHeatmap();
+            this.createHeatmap().then(created => {
+                if (typeof showToast !== 'function') return;
+                if (created) showToast('Heatmap enabled', 'success');
+                else showToast('No data for heatmap', 'warning');
+            });
         }
     }
 
-    createHeatmap() {
-        const heatData = [];
-        this.incidentsLayer.eachLayer(layer => {
-            const latlng = layer.getLatLng();
-            heatData.push([latlng.lat, latlng.lng, 1]);
+    createVectorTileLayer(layer, color) {
+        // Only visible tiles are fetched, as compact binary MVT
+        const tileLayer = L.vectorGrid.protobuf(`${this.baseUrl}/tiles/${layer}/{z}/{x}/{y}.mvt`, {
+            vectorTileLayerStyles: {
+                [layer]: { radius: 5, weight: 1, color: '#ffffff', fill: true, fillColor: color, fillOpacity: 0.9 }
+            },
+            interactive: true,
+            getFeatureId: feature => feature.properties.id
+        });
+        tileLayer.on('click', (e) => {
+            const props = e.layer.properties || {};
+            L.popup()
+                .setLatLng(e.latlng)
+                .setContent(Object.entries(props).map(([k, v]) => `<strong>${k}:</strong> ${v}`).join('<br>'))
+                .openOn(this.map);
+        });
+        this.vectorTileLayers[layer] = tileLayer;
+        return tileLayer;
+    }
+
+    createHeatmapTileLayer(layer) {
+        // Precomputed density rasters (uint8 per cell) painted onto canvas tiles
+        const baseUrl = this.baseUrl;
+        const HeatTiles = L.GridLayer.extend({
+            createTile(coords, done) {
+                const canvas = document.createElement('canvas');
+                const size = this.getTileSize();
+                canvas.width = size.x;
+                canvas.height = size.y;
+
+                fetch(`${baseUrl}/api/heatmap/tiles/${layer}/${coords.z}/${coords.x}/${coords.y}`)
+                    .then(response => {
+                        if (response.status !== 200) return null;
+                        const cells = Number(response.headers.get('X-Tile-Size'));
+                        return response.arrayBuffer().then(buffer => ({ cells, values: new Uint8Array(buffer) }));
+                    })
+                    .then(raster => {
+                        if (raster) {
+                            const ctx = canvas.getContext('2d');
+                            const cellPx = size.x / raster.cells;
+                            raster.values.forEach((value, i) => {
+                                if (!value) return;
+                                const t = value / 255;
+                                ctx.fillStyle = `rgba(255, ${Math.round(220 * (1 - t))}, 0, ${0.25 + 0.6 * t})`;
+                                ctx.fillRect((i % raster.cells) * cellPx, Math.floor(i / raster.cells) * cellPx, cellPx, cellPx);
+                            });
+                        }
+                        done(null, canvas);
+                    })
+                    .catch(error => done(error, canvas));
+                return canvas;
+            }
         });
+        return new HeatTiles({ minZoom: 8, maxZoom: 16, opacity: 0.7 });
+    }
+
+    redrawVectorTiles() {
+        Object.values(this.vectorTileLayers).forEach(tileLayer => {
+            if (this.map.hasLayer(tileLayer)) tileLayer.redraw();
+        });
+    }
+
+    async fetchHeatmapGrid() {
+        // Server aggregates active incidents into a grid sized for the current zoom
+        const params = new URLSearchParams({
+            bbox: this.getViewportBbox(),
+            zoom: this.map.getZoom(),
+            smooth: 1
+        });
+        const response = await fetch(`${this.baseUrl}/api/heatmap/grid?${params}`);
+        if (!response.ok) throw new Error('Failed to fetch heatmap grid');
+        return await response.json();
+    }
+
+    async createHeatmap() {
+        let heatData = [];
+        let cellRadius = 25;
+        try {
+            const grid = await this.fetchHeatmapGrid();
+            heatData = grid.data || [];
+            // One heat point per grid cell; size it to cover the cell on screen
+            const cellPixels = grid.cell_size.lng * 256 * Math.pow(2, grid.zoom) / 360;
+            cellRadius = Math.max(10, Math.round(cellPixels));
+        } catch (error) {
+            console.error('Error loading heatmap grid:', error);
+            this.incidentsLayer.eachLayer(layer => {
+                const latlng = layer.getLatLng();
+                heatData.push([latlng.lat, latlng.lng, 1]);
+            });
+        }
+
+        if (this.heatmapLayer) {
+            this.map.removeLayer(this.heatmapLayer);
+            this.heatmapLayer = null;
+        }
 
         if (heatData.length > 0) {
             this.heatmapLayer = L.heatLayer(heatData, {
-                radius: 25,
+                radius: cellRadius,
                 blur: 15,
-                maxZoom: 10,
+                max: 1,
                 gradient: {
                     0.2: '#00ff00',
                     0.4: '#ffff00',
@@ -825,10 +981,9 @@ class EmergencyMap {
                 }
             }).addTo(this.map);
 
-            if (typeof showToast === 'function') showToast('Heatmap enabled', 'success');
-        } else {
-            if (typeof showToast === 'function') showToast('No data for heatmap', 'warning');
+            return true;
         }
+        return false;
     }
 
     centerMap() {
@@ -842,7 +997,49 @@ class EmergencyMap {
     }
 
     startLiveUpdates() {
-        setInterval(() => this.loadData(), 30000);
+        this.connectLiveStream();
+
+        setInterval(() => {
+            // Full resync every 5 minutes as a safety net; otherwise poll only without the live stream
+            if (++this.pollsSinceFullSync >= 10) this.resetSync();
+            else if (this.streamConnected) return;
+            this.loadData();
+        }, 30000);
+    }
+
+    connectLiveStream() {
+        if (typeof EventSource === 'undefined') return;
+
+        // EventSource reconnects on its own and resumes from the last event id
+        const source = new EventSource(`${this.baseUrl}/api/stream`);
+        source.onopen = () => { this.streamConnected = true; };
+        source.onerror = () => { this.streamConnected = false; };
+
+        // Coalesce bursts of events into one delta fetch
+        const refresh = () => {
+            clearTimeout(this.streamReloadTimer);
+            this.streamReloadTimer = setTimeout(() => {
+                this.loadData();
+                this.redrawVectorTiles();
+            }, 1000);
+        };
+
+        source.addEventListener('incident', refresh);
+        source.addEventListener('dispatch', refresh);
+        source.addEventListener('crowd_location', refresh);
+        source.addEventListener('crowd_anomaly', (event) => {
+            const anomaly = JSON.parse(event.data);
+            if (typeof showToast === 'function') {
+                showToast(`👥 ${anomaly.name || anomaly.location_id}: ${anomaly.message}`, 'warning');
+            }
+            refresh();
+        });
+        source.addEventListener('resync', () => {
+            this.resetSync();
+            this.loadData();
+        });
+
+        this.eventSource = source;
     }
 
     getMockIncidents() {